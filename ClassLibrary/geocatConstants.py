@@ -142,6 +142,9 @@ api3RequestUrl = "https://api3.geo.admin.ch/rest/services/api/MapServer"
 
 bmdRequestUrl = "https://ltbmd.adr.admin.ch/BmdService/Read/SqlInDataBase?statement=select distinct geocatuuid as idGeoCat, techpublayername as layerBodId, ingeststate from bmd.PubLayer where geocatuuid <> '' and geocatuuid <> '-' and ingeststate = 'Productive'&format=json"
 
+# maximum number of uuids sent in one batchediting request (records sharing the same edit)
+batchEditChunkSize = 100
+
 #-----------------------------------------------------------------------------------------------------
 # Kt. BS only
 
@@ -7,6 +7,7 @@ import os
 from pathlib import Path
 import geocatConstants as const
 import geocatApiCalls as API
+import geocatJournal as Journal
 
 class FunctionLibrary:
     """
@@ -19,6 +20,7 @@ class FunctionLibrary:
 
     def __init__(self):
         self.__logFile = None
+        self.__journal = None
 
     def setLogFile(self, logFile):
         """ it is need to know the reference of the logFile object in this modul
@@ -32,6 +34,21 @@ class FunctionLibrary:
         self.__sessionCalls = sessionCalls
         self.__requestCalls = requestCalls
 
+    def setJournal(self, journal :Journal.ProgressJournal):
+        """ set a progress journal, the batch functions skip the MD records already done with this journal
+        and record the new ones (restart of an interrupted batch)
+
+        :journal: the ProgressJournal object, None to disable it
+        """
+        self.__journal = journal
+
+    def __isDone(self, uuid :str, step :str):
+        return self.__journal is not None and self.__journal.isDone(uuid, step)
+
+    def __markDone(self, uuid :str, step :str):
+        if self.__journal is not None:
+            self.__journal.markDone(uuid, step)
+
     def writeLog(self, logValue: str):
         """ write logging-informations to file and screen with a timestamp
 
@@ -109,6 +126,25 @@ class FunctionLibrary:
         elif response.status_code == 400:
             return response.text
 
+    def formatBulkResponse(self, response, uuidsList :list):
+        """ match the answer of a batchediting request sent for many MD records with each uuid
+        a MD record is successful if it has an info and no error, the MD records without info were not processed
+        :response: the answer of the GeoNetwork REST API batchediting request
+        :uuidsList: the uuids sent in the request
+
+        :return: dictionary {uuid: (isSuccessful, message)}
+        """
+        if response.status_code != 201:
+            return {uuid: (False, "(status code: " + str(response.status_code) + ") " + response.text) for uuid in uuidsList}
+        responseJson = response.json()
+        _messages = {}
+        for isSuccessful, key in ((False, 'metadataErrors'), (True, 'metadataInfos')):
+            for reportList in responseJson.get(key, {}).values():
+                for report in reportList:
+                    if report.get('uuid') not in _messages:
+                        _messages[report.get('uuid')] = (isSuccessful, report.get('message', ""))
+        return {uuid: _messages.get(uuid, (False, "not processed (not found, not editable or unchanged)")) for uuid in uuidsList}
+
     def getDistributionNodeAsRoot(self, uuid :str):
         """ get the xml_Distribution-Node as root from the MD with the given uuid
         uuid: uuid from the MD-record
@@ -216,12 +252,18 @@ class FunctionLibrary:
             _uuidBakupsPath.mkdir(parents=True, exist_ok=True)
         _countOfMDs = str(len(uuidsList))
         for uuid in uuidsList:
+            if self.__isDone(uuid, "backup-" + batchName):
+                self.writeLog(str(uuidsList.index(uuid) + 1) + "/" + _countOfMDs + ") backup from MD " + uuid + " already done")
+                continue
             self.writeLog(str(uuidsList.index(uuid) + 1) + "/" + _countOfMDs + ") write backup from MD " + uuid)
             _uuidJsonFilePath = _uuidBakupsPath.joinpath(uuid + ".json")
             _mdRecordDetailsAsJson = self.getMdRecordDetails(uuid, batchName, isBackup=True)
             _uuidJsonFilePath.write_bytes(json.dumps(_mdRecordDetailsAsJson).encode('utf-8'))
             _uuidXmlFilePath = _uuidBakupsPath.joinpath(uuid + ".xml")
             _uuidXmlFilePath.write_bytes(self.getMdRecordAsXml(uuid))
+            self.__markDone(uuid, "backup-" + batchName)
+        if self.__journal is not None:
+            self.__journal.flush()
 
     def doRestor(self, batchName :str):
         """
@@ -641,11 +683,23 @@ class FunctionLibrary:
         if uuids.get('uuid'):
             _deleteCounter += runTask(uuids['uuid'])
         else:
-            _uuidsList = uuids.get('uuidsList')
-            for uuid in _uuidsList:
-                _countOfMDs = str(len(_uuidsList))
-                self.writeLog(str(_uuidsList.index(uuid) + 1) + "/" + _countOfMDs + ") delete xml-Node onLine")
-                _deleteCounter += runTask(uuid.text)
+            # all MD records get the same edit, send them together in chunks of batchEditChunkSize uuids
+            _uuidsList = [uuid.text for uuid in uuids.get('uuidsList') if not self.__isDone(uuid.text, "deleteOnLine-" + protocol)]
+            _countOfMDs = str(len(uuids.get('uuidsList')))
+            if len(_uuidsList) < len(uuids.get('uuidsList')):
+                self.writeLog(str(len(uuids.get('uuidsList')) - len(_uuidsList)) + "/" + _countOfMDs + " xml-Node onLine already deleted (journal)")
+            for start in range(0, len(_uuidsList), const.batchEditChunkSize):
+                _chunk = _uuidsList[start:start + const.batchEditChunkSize]
+                self.writeLog(str(start + len(_chunk)) + "/" + str(len(_uuidsList)) + ") delete xml-Node onLine")
+                urlValue = "api/0.1/records/batchediting?uuids=" + "&uuids=".join(_chunk) + "&updateDateStamp=true"
+                response = self.__sessionCalls.sendPutRequest(urlValue, _value, _xpath)
+                for uuid, (isSuccessful, message) in self.formatBulkResponse(response, _chunk).items():
+                    self.writeLog("      " + uuid + ": " + ("Info: " if isSuccessful else "Error: ") + message)
+                    if isSuccessful:
+                        _deleteCounter += 1
+                        self.__markDone(uuid, "deleteOnLine-" + protocol)
+            if self.__journal is not None:
+                self.__journal.flush()
         self.writeLog("      " + str(_deleteCounter) + " online resources was deleted")
 
     def deleteXpath(self, xPath :str, uuid :str):
@@ -0,0 +1,62 @@
+import os
+import json
+import weakref
+import datetime as TimeStamp
+
+class ProgressJournal():
+    """
+    append-only progress journal (one json line per completed step) for the batch scripts
+    a restarted batch with the same journal file skips the steps already done for a uuid
+    the entries are written every flushEvery steps, at the end of the batch and when the journal
+    object is destroyed (also on interpreter exit), so an interruption doesn't loose the progress
+    journalPath: the path of the journal file, created if it doesn't exist
+    flushEvery: the number of entries kept in memory before writing them to the file
+    """
+
+    def __init__(self, journalPath :str, flushEvery=50):
+        self.__journalPath = journalPath
+        self.__flushEvery = flushEvery
+        self.__done = set()
+        self.__buffer = []
+        weakref.finalize(self, ProgressJournal._writeEntries, journalPath, self.__buffer)
+        if os.path.isfile(journalPath):
+            with open(journalPath, 'r', encoding='utf-8') as _journalFile:
+                for line in _journalFile:
+                    try:
+                        _entry = json.loads(line)
+                    except json.JSONDecodeError:
+                        # the last line could be truncated by an interruption
+                        continue
+                    self.__done.add((_entry['uuid'], _entry['step']))
+            # terminate a truncated line before appending new entries
+            with open(journalPath, 'rb+') as _journalFile:
+                _journalFile.seek(0, os.SEEK_END)
+                if _journalFile.tell() > 0:
+                    _journalFile.seek(-1, os.SEEK_END)
+                    if _journalFile.read(1) != b"\n":
+                        _journalFile.write(b"\n")
+
+    def isDone(self, uuid :str, step :str):
+        """ :return: True if the step was already done for the MD record with the given uuid """
+        return (uuid, step) in self.__done
+
+    def markDone(self, uuid :str, step :str):
+        """ record that the step is done for the MD record with the given uuid """
+        if (uuid, step) in self.__done:
+            return
+        self.__done.add((uuid, step))
+        self.__buffer.append({'uuid': uuid, 'step': step, 'time': TimeStamp.datetime.now().strftime("%Y-%m-%d-%H:%M:%S")})
+        if len(self.__buffer) >= self.__flushEvery:
+            self.flush()
+
+    def flush(self):
+        """ write the buffered entries to the journal file """
+        ProgressJournal._writeEntries(self.__journalPath, self.__buffer)
+
+    @staticmethod
+    def _writeEntries(journalPath :str, buffer :list):
+        if not buffer:
+            return
+        with open(journalPath, 'a', encoding='utf-8') as _journalFile:
+            _journalFile.write("".join(json.dumps(entry) + "\n" for entry in buffer))
+        buffer.clear()
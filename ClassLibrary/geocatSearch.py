@@ -0,0 +1,32 @@
+import copy
+
+def scanRecords(session, url :str, body=None, includes=None, pageSize=1000, params=None):
+    """
+    generator streaming all the hits of a search on the geocat Elasticsearch API
+    the pages are walked with search_after on a stable sort (the sort of the body or _id) instead of from/size,
+    so the scan is neither slowed down by deep offsets nor capped by the ES max result window
+    the hits are yielded as returned by ES: {"_id": ..., "_source": {...}, "sort": [...]}
+    session: requests session used for the search (authentication, proxies)
+    url: the url of the search endpoint (.../geonetwork/srv/api/search/records/_search)
+    body: the ES request body, its query is kept, from/size/search_after are managed by the scan
+    includes: the list of the _source fields to return, overrides the _source of the body
+    pageSize: the number of hits per request
+    params: the query parameters of the request (e.g. {"bucket": "s101"})
+    """
+    _body = copy.deepcopy(body) if body is not None else {"query": {"match_all": {}}}
+    _body.pop("from", None)
+    _body["size"] = pageSize
+    _body["track_total_hits"] = False
+    if not _body.get("sort"):
+        _body["sort"] = [{"_id": "asc"}]
+    if includes is not None:
+        _body["_source"] = {"includes": includes}
+    _headers = {"accept": "application/json", "Content-Type": "application/json"}
+    while True:
+        _response = session.post(url, params=params, json=_body, headers=_headers)
+        _response.raise_for_status()
+        _hits = _response.json().get("hits", {}).get("hits", [])
+        yield from _hits
+        if len(_hits) < pageSize:
+            break
+        _body["search_after"] = _hits[-1]["sort"]
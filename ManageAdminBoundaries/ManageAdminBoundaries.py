@@ -17,15 +17,28 @@ Usage examples :
 """
 
 import geopycat
+import hashlib
+import io
 import logging
 import os
+import queue
+import threading
 import colorama
+import numpy as np
 import pandas as pd
 import xml.etree.ElementTree as ET
 import json
+import re
 import sys
 from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor
+from itertools import chain
 from string import ascii_uppercase
+from extent_discovery import discover_extents, search_extent_uuids
+
+# Progress journal shared with the other tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ClassLibrary"))
+from geocatJournal import ProgressJournal
 
 colorama.init()
 
@@ -84,7 +97,191 @@ CANTON_NAMES = {
            "EN": "Canton of Jura (JU)", "RM": "Chantun Giura (JU)"},
 }
 
-def geojson_to_geocatgml(geojson_feature: dict):
+def feature_polygons(geojson_feature: dict) -> list:
+    """
+    Returns the polygons (MultiPolygon coordinates) of a geojson feature. If the geometry is a collection,
+    the first geometry is taken.
+    """
+    if "coordinates" in geojson_feature["geometry"]:
+        return geojson_feature["geometry"]["coordinates"]
+
+    return geojson_feature["geometry"]["geometries"][0]["coordinates"]
+
+
+def ring_to_array(ring) -> np.ndarray:
+    """
+    Returns the x and y of a ring (list of coordinates or numpy array) as numpy array of shape (number of vertices, 2).
+    """
+    if isinstance(ring, np.ndarray):
+        return ring[:, :2].astype(float, copy=False)
+
+    return np.array([coordinates[:2] for coordinates in ring], dtype=float).reshape(-1, 2)
+
+
+def geometry_bbox(polygons: list) -> dict:
+    """
+    Bounding box of a geometry (MultiPolygon coordinates, e.g. feature_polygons), computed with numpy on
+    the exterior rings. The interior rings are within the exterior ones.
+
+    Returns:
+        dict with west, east, south, north
+    """
+    mins = list()
+    maxs = list()
+
+    for polygon in polygons:
+        xy = ring_to_array(polygon[0])
+        if len(xy) > 0:
+            mins.append(xy.min(axis=0))
+            maxs.append(xy.max(axis=0))
+
+    west, south = np.min(mins, axis=0)
+    east, north = np.max(maxs, axis=0)
+
+    return {"west": float(west), "east": float(east), "south": float(south), "north": float(north)}
+
+
+def geometry_hash(polygons: list, precision: int = 7) -> str:
+    """
+    Hash (sha256) of a normalised geometry (MultiPolygon coordinates) : only x and y are kept, rounded
+    to precision decimals. Rings given as lists or as numpy arrays (see parse_poslist) give the same hash.
+    """
+    sha256 = hashlib.sha256()
+
+    for polygon in polygons:
+        sha256.update(b"polygon")
+
+        for ring in polygon:
+            # + 0.0 normalises -0.0 to 0.0
+            sha256.update(b"ring")
+            sha256.update(np.ascontiguousarray(np.round(ring_to_array(ring), precision) + 0.0).tobytes())
+
+    return sha256.hexdigest()
+
+
+def simplify_feature(geojson_feature: dict, tolerance: float) -> dict:
+    """
+    Returns a copy of the geojson feature with a simplified MultiPolygon geometry (Douglas-Peucker,
+    topology preserving). Requires shapely.
+
+    Each feature is simplified on its own : the validity of its polygons is preserved but the boundaries
+    shared with the neighbouring features may slightly diverge.
+
+    Args:
+        geojson_feature:
+            dict, required, geojson feature
+        tolerance:
+            float, required, maximum distance between the original and the simplified geometry,
+            in the unit of the coordinates (degrees for WGS84, e.g. 0.00001 ~ 1 meter)
+    """
+    try:
+        from shapely.geometry import MultiPolygon, shape
+    except ImportError:
+        print(geopycat.utils.warningred("The package shapely is needed to simplify the geometries : pip install shapely"))
+        sys.exit()
+
+    geometry = shape({"type": "MultiPolygon", "coordinates": feature_polygons(geojson_feature)})
+    geometry = geometry.simplify(tolerance, preserve_topology=True)
+
+    if geometry.geom_type == "Polygon":
+        geometry = MultiPolygon([geometry])
+
+    polygons = [[list(polygon.exterior.coords)] + [list(interior.coords) for interior in polygon.interiors]
+                for polygon in geometry.geoms]
+
+    return {**geojson_feature, "geometry": {"type": "MultiPolygon", "coordinates": polygons}}
+
+
+def parse_poslist(poslist: str) -> np.ndarray:
+    """
+    Parse a GML posList "x1 y1 x2 y2 ..." into a numpy array of shape (number of vertices, 2), in one call.
+    """
+    return np.array(poslist.split(), dtype=float).reshape(-1, 2)
+
+
+def format_poslist(ring: list, precision: int = None) -> str:
+    """
+    Format the coordinates of a ring (list of [x, y]) as GML posList "x1 y1 x2 y2 ...".
+    The whole ring is formatted at once, not vertex by vertex.
+
+    Without precision, most of the time is spent writing the shortest representation of each float
+    (as str), the gain over a vertex by vertex formatting is small. Rounding to a precision is much faster.
+
+    Args:
+        ring:
+            list, required, coordinates of the ring. Only x and y are kept.
+        precision:
+            int, number of decimals of the coordinates. Default = None, coordinates are written as given.
+    """
+    if len(ring) == 0:
+        return ""
+
+    if precision is None:
+        xy = list(chain.from_iterable(ring))
+
+        # Coordinates with z or m values
+        if len(xy) != 2 * len(ring):
+            return " ".join(f"{coordinates[0]} {coordinates[1]}" for coordinates in ring)
+
+        return " ".join(map(str, xy))
+
+    xy = np.asarray([coordinates[:2] for coordinates in ring], dtype=float).ravel()
+
+    return ((f"%.{precision}f " * len(xy)) % tuple(xy))[:-1]
+
+
+def write_geocatgml(geojson_feature: dict, buffer, precision: int = None):
+    """
+    Write the GML of a single geojson feature (type=Feature) for extent subtemplate of geocat (ISO 19115-3)
+    to a text buffer (e.g. io.StringIO or an opened file), ring by ring. See geojson_to_geocatgml.
+
+    Args:
+        geojson_feature:
+            dict, required, geojson feature
+        buffer:
+            required, text buffer with a write method
+        precision:
+            int, number of decimals of the coordinates. Default = None, coordinates are written as given.
+    """
+    import uuid as uuid_module
+
+    # Generate unique IDs for GML elements
+    multisurface_id = f"ms-{uuid_module.uuid4().hex[:8]}"
+
+    buffer.write(f"<gex:polygon xmlns:gex='http://standards.iso.org/iso/19115/-3/gex/1.0'>"
+                 f"<gml:MultiSurface xmlns:gml='http://www.opengis.net/gml/3.2' gml:id='{multisurface_id}' srsDimension='2'>")
+
+    # Exterior polygons
+    for exterior in feature_polygons(geojson_feature):
+        polygon_id = f"poly-{uuid_module.uuid4().hex[:8]}"
+
+        buffer.write("<gml:surfaceMember>"
+                     f"<gml:Polygon gml:id='{polygon_id}'>"
+                     "<gml:exterior>"
+                     "<gml:LinearRing>"
+                     "<gml:posList>")
+        buffer.write(format_poslist(exterior[0], precision))
+        buffer.write("</gml:posList>"
+                     "</gml:LinearRing>"
+                     "</gml:exterior>")
+
+        # Interior polygons, if exist
+        for interior in exterior[1:]:
+            buffer.write("<gml:interior>"
+                         "<gml:LinearRing>"
+                         "<gml:posList>")
+            buffer.write(format_poslist(interior, precision))
+            buffer.write("</gml:posList>"
+                         "</gml:LinearRing>"
+                         "</gml:interior>")
+
+        buffer.write("</gml:Polygon>"
+                     "</gml:surfaceMember>")
+
+    buffer.write("</gml:MultiSurface></gex:polygon>")
+
+
+def geojson_to_geocatgml(geojson_feature: dict, precision: int = None):
     """
     Transform a single geojson feature (type=Feature) into a GML ready for extent subtemplate of geocat (ISO 19115-3).
 
@@ -95,67 +292,166 @@ def geojson_to_geocatgml(geojson_feature: dict):
     Args:
         geojson_feature:
             dict, required, geojson feature
+        precision:
+            int, number of decimals of the coordinates. Default = None, coordinates are written as given.
 
     Returns:
         GML snippet at the tag level <gex:polygon> ready for extent subtemplate in geocat (ISO 19115-3).
     """
-    import uuid as uuid_module
-    
-    # Generate unique IDs for GML elements
-    multisurface_id = f"ms-{uuid_module.uuid4().hex[:8]}"
-    
-    gml_start = f"<gex:polygon xmlns:gex='http://standards.iso.org/iso/19115/-3/gex/1.0'>" \
-                f"<gml:MultiSurface xmlns:gml='http://www.opengis.net/gml/3.2' gml:id='{multisurface_id}' srsDimension='2'>"
+    buffer = io.StringIO()
+    write_geocatgml(geojson_feature, buffer, precision)
 
-    gml_end = "</gml:MultiSurface></gex:polygon>"
+    return buffer.getvalue()
 
-    gml_core = ""
 
-    # Exterior polygons
-    if "coordinates" in geojson_feature["geometry"]:
-        exteriors = geojson_feature["geometry"]["coordinates"]
-    else:
-        exteriors = geojson_feature["geometry"]["geometries"][0]["coordinates"]
+class CheckBoundaries:
+    """
+    Base class of the admin boundaries checks, comparing the admin boundaries exported from geocat
+    (csv list geocat_{LABEL}.csv) with the reference geojson file.
 
-    for exterior in exteriors:
-        polygon_id = f"poly-{uuid_module.uuid4().hex[:8]}"
-        
-        gml_core += "<gml:surfaceMember>" \
-                    f"<gml:Polygon gml:id='{polygon_id}'>" \
-                    "<gml:exterior>" \
-                    "<gml:LinearRing>" \
-                    "<gml:posList>"
+    The subclasses give the kind of boundaries (LABEL, e.g. 'municipalities'), the columns of the
+    csv lists for the ID and the Name (ID, NAME, e.g. 'GMDNR', 'GMDNAME') and export the boundaries
+    from geocat.
 
-        for coordinates in exterior[0]:
-            gml_core += f"{coordinates[0]} {coordinates[1]} "
-        gml_core = gml_core[:-1]
+    Instead of exporting the boundaries from geocat, they can be read from a snapshot (see
+    UpdateSubtemplatesExtent.export_snapshot).
 
-        gml_core += "</gml:posList>" \
-                    "</gml:LinearRing>" \
-                    "</gml:exterior>"
+    Args:
+        ref_geojson:
+            str, required ! The path to the reference geojson file.
+        ref_id:
+            str, required ! The attribute name in the reference file corresponding to the ID
+        ref_name:
+            str, required ! The attribute name in the reference file corresponding to the Name
+        env:
+            str, indicating the geocat's environment to work with, 'int' or 'prod', default = 'int'.
+        output_dir:
+            str, the directory path where to save the results, default = current directory.
+        snapshot:
+            str, the path to a snapshot of the geocat boundaries to check instead of the csv list, default = None.
+    """
 
-        # Interior polygons, if exist
-        if len(exterior) > 1:
-            for interior in exterior[1:]:
-                gml_core += "<gml:interior>" \
-                            "<gml:LinearRing>" \
-                            "<gml:posList>"
+    LABEL = None
+    ID = None
+    NAME = None
+    NUMERIC_ID = True
 
-                for coordinates in interior:
-                    gml_core += f"{coordinates[0]} {coordinates[1]} "
-                gml_core = gml_core[:-1]
+    def __init__(self, ref_geojson, ref_id, ref_name, env: str = 'int', output_dir: str = os.path.dirname(__file__),
+                 snapshot: str = None):
 
-                gml_core += "</gml:posList>" \
-                            "</gml:LinearRing>" \
-                            "</gml:interior>"
+        self.api = geopycat.geocat(env)
+        self.output_dir = output_dir
+        self.ref_geojson = ref_geojson
+        self.ref_id = ref_id
+        self.ref_name = ref_name
+        self.snapshot = snapshot
+
+    def name_from_geocat(self, name: str) -> str:
+        """Returns the name of a geocat boundary as given in the csv list. None if the boundary is ignored."""
+        return name
+
+    def read_snapshot_boundaries(self) -> pd.DataFrame:
+        """
+        Read the geocat boundaries (ID and NAME) from the snapshot, memory-mapped. The geometries are not loaded.
+        """
+        try:
+            from snapshot import read_snapshot
+        except ImportError:
+            print(geopycat.utils.warningred("The package pyarrow is needed to read the snapshots : pip install pyarrow"))
+            sys.exit()
 
-        gml_core += "</gml:Polygon>" \
-                    "</gml:surfaceMember>"
+        df = read_snapshot(self.snapshot).select(["number", "name"]).to_pandas()
+        df = df.rename(columns={"number": self.ID, "name": self.NAME})
 
-    return gml_start + gml_core + gml_end
+        if self.NUMERIC_ID:
+            df[self.ID] = df[self.ID].astype(int)
 
+        df[self.NAME] = df[self.NAME].map(self.name_from_geocat)
 
-class CheckMunicipalityBoundaries:
+        return df.dropna(subset=[self.NAME]).reset_index(drop=True)
+
+    def diff_boundaries(self, df_ref: pd.DataFrame, df_geocat: pd.DataFrame) -> dict:
+        """
+        Compare the reference boundaries with the geocat boundaries, both dataframes with the columns ID and NAME.
+
+        Geocat boundaries are indexed once by ID and by Name, each reference boundary is then classified
+        in a single pass. Returns a dictionnary of dataframes :
+                correct : ID and Name correct in geocat and reference
+                name_incorrect : ID is found but Name is different in geocat
+                id_incorrect : Name is found but ID is different in geocat
+                new : ID and Name not found in geocat
+                old : ID and Name not found in reference
+        """
+
+        ID, NAME = self.ID, self.NAME
+
+        # When an ID or a Name is duplicated in geocat, the first one is taken
+        names_by_id = df_geocat.drop_duplicates(ID).set_index(ID)[NAME].to_dict()
+        ids_by_name = df_geocat.drop_duplicates(NAME).set_index(NAME)[ID].to_dict()
+
+        correct, name_change, id_change, new = list(), list(), list(), list()
+
+        for ref_id, ref_name in zip(df_ref[ID], df_ref[NAME]):
+
+            # Case where id exists, with the same name or a different one
+            if ref_id in names_by_id:
+                if ref_name == names_by_id[ref_id]:
+                    correct.append((ref_id, ref_name))
+                else:
+                    name_change.append((ref_id, ref_name, names_by_id[ref_id]))
+
+            # Case where id is different for a given name
+            elif ref_name in ids_by_name:
+                id_change.append((ref_name, ref_id, ids_by_name[ref_name]))
+
+            # Case where id and name doesn't exist. New boundary to add to geocat.
+            else:
+                new.append((ref_id, ref_name))
+
+        # Case where boundaries in geocat doesn't exist at all (no id, no name) in the reference
+        old = df_geocat.loc[~df_geocat[ID].isin(df_ref[ID]) & ~df_geocat[NAME].isin(df_ref[NAME]), [ID, NAME]]
+
+        return {
+            "correct": pd.DataFrame(correct, columns=[ID, NAME]),
+            "name_incorrect": pd.DataFrame(name_change, columns=[ID, f"{NAME}_new", f"{NAME}_old"]),
+            "id_incorrect": pd.DataFrame(id_change, columns=[NAME, f"{ID}_new", f"{ID}_old"]),
+            "new": pd.DataFrame(new, columns=[ID, NAME]),
+            "old": old.reset_index(drop=True),
+        }
+
+    def check_boundaries(self):
+        """
+        Compare the boundaries (names and id) from geocat (i.e. from the csv list geocat_{LABEL}.csv
+        created by the export function, or from the snapshot) with the boundaries from the reference geojson file.
+
+        It saves 5 csv lists at the root of the folder given at the class level (if not empty) :
+                correct_{LABEL}.csv : ID and Name correct in geocat and reference
+                name_incorrect_{LABEL}.csv : ID is found but Name is different in geocat
+                id_incorrect_{LABEL}.csv : Name is found but ID is different in geocat
+                new_{LABEL}.csv : ID and Name not found in geocat
+                old_{LABEL}.csv : ID and Name not found in reference
+        """
+        print(f"Checking {self.LABEL}...", end="\r")
+
+        with open(self.ref_geojson, "rb") as file:
+            geojson_ref_file = json.load(file)
+
+        df_ref = pd.DataFrame([(feature["properties"][self.ref_id], feature["properties"][self.ref_name])
+                               for feature in geojson_ref_file["features"]], columns=[self.ID, self.NAME])
+
+        if self.snapshot is not None:
+            df_geocat = self.read_snapshot_boundaries()
+        else:
+            df_geocat = pd.read_csv(os.path.join(self.output_dir, f"geocat_{self.LABEL}.csv"))
+
+        for result, df in self.diff_boundaries(df_ref, df_geocat).items():
+            if len(df) > 0:
+                df.to_csv(os.path.join(self.output_dir, f"{result}_{self.LABEL}.csv"), index=False)
+
+        print(f"Checking {self.LABEL}...{geopycat.utils.okgreen('Done')}")
+
+
+class CheckMunicipalityBoundaries(CheckBoundaries):
     """
     Check the municipalities admin boundaries from geocat by comparing them to a reference geojson file.
     The geojson file must be encoded in utf-8 to support special characters (accents).
@@ -171,6 +467,8 @@ class CheckMunicipalityBoundaries:
             str, indicating the geocat's environment to work with, 'int' or 'prod', default = 'int'.
         output_dir:
             str, the directory path where to save the results, default = current directory.
+        snapshot:
+            str, the path to a snapshot of the geocat boundaries to check, default = None (export from geocat).
 
     It saves 5 csv lists (if not empty):
             correct_municipalities.csv : ID and Name correct in geocat and reference
@@ -180,15 +478,18 @@ class CheckMunicipalityBoundaries:
             old_municipalities.csv : ID and Name not found in reference
     """
 
-    def __init__(self, ref_geojson, gmdnr, gmdname, env: str = 'int', output_dir: str = os.path.dirname(__file__)):
+    LABEL = "municipalities"
+    ID = "GMDNR"
+    NAME = "GMDNAME"
 
-        self.api = geopycat.geocat(env)
-        self.output_dir = output_dir
-        self.ref_geojson = ref_geojson
-        self.gmdnr = gmdnr
-        self.gmdname = gmdname
+    def __init__(self, ref_geojson, gmdnr, gmdname, env: str = 'int', output_dir: str = os.path.dirname(__file__),
+                 snapshot: str = None):
+
+        super().__init__(ref_geojson=ref_geojson, ref_id=gmdnr, ref_name=gmdname, env=env, output_dir=output_dir,
+                         snapshot=snapshot)
 
-        self.export_municipalities()
+        if snapshot is None:
+            self.export_municipalities()
         self.check_gmd()
 
     def export_municipalities(self):
@@ -199,36 +500,10 @@ class CheckMunicipalityBoundaries:
         It saves a csv list named 'geocat_municipalities.csv' with the attributes GMDNR and GMDNAME at the root of
         the folder given at the class level.
         """
-        print("Exporting all municipalities from geocat : ", end="\r")
-        headers = {"accept": "application/xml", "Content-Type": "application/xml"}
-        df = pd.DataFrame(columns=["GMDNR", "GMDNAME"])
-
-        # Namespaces ISO 19115-3
-        ns = {
-            'gex': 'http://standards.iso.org/iso/19115/-3/gex/1.0',
-            'gco': 'http://standards.iso.org/iso/19115/-3/gco/1.0'
-        }
-
-        count = 0
-        for i in range(1, 10000):
-
-            uuid = f"geocatch-subtpl-extent-hoheitsgebiet-{i}"
-            response = self.api.session.get(url=self.api.env + f"/geonetwork/srv/api/registries/entries/{uuid}",
-                                            headers=headers)
-
-            if response.status_code == 200:
-                xmlroot = ET.fromstring(response.content)
-                
-                # Nouveau chemin ISO 19115-3
-                gmd_name_elem = xmlroot.find('.//gex:description/gco:CharacterString', ns)
-                if gmd_name_elem is not None:
-                    gmd_name = gmd_name_elem.text
+        municipalities = discover_extents(self.api, kind="hoheitsgebiet", numbers=range(1, 10000),
+                                          label="municipalities")
 
-                    row = pd.Series({"GMDNR": i, "GMDNAME": gmd_name})
-                    df = pd.concat([df, row.to_frame().T], ignore_index=True)
-
-            count += 1
-            print(f"Exporting all municipalities from geocat : {round((count / 10000) * 100, 1)}%", end="\r")
+        df = pd.DataFrame(list(municipalities.items()), columns=["GMDNR", "GMDNAME"])
 
         df.to_csv(os.path.join(self.output_dir, "geocat_municipalities.csv"), index=False)
         print(f"Exporting all municipalities from geocat : {geopycat.utils.okgreen('Done')}")
@@ -245,99 +520,10 @@ class CheckMunicipalityBoundaries:
                 new_municipalities.csv : ID and Name not found in geocat
                 old_municipalities.csv : ID and Name not found in reference
         """
-        print("Checking municipalities...", end="\r")
-
-        with open(self.ref_geojson, "rb") as file:
-            geojson_ref_file = json.load(file)
-
-        df_geocat = pd.read_csv(os.path.join(self.output_dir, "geocat_municipalities.csv"))
-
-        df_name_change = pd.DataFrame(columns=["GMDNR", "GMDNAME_new", "GMDNAME_old"])
-        df_id_change = pd.DataFrame(columns=["GMDNAME", "GMDNR_new", "GMDNR_old"])
-        df_new = pd.DataFrame(columns=["GMDNR", "GMDNAME"])
-        df_old = pd.DataFrame(columns=["GMDNR", "GMDNAME"])
-        df_correct = pd.DataFrame(columns=["GMDNR", "GMDNAME"])
-
-        # 1 - Testing new municipalities against geocat
-        for feature in geojson_ref_file["features"]:
-            gmdnr = feature["properties"][self.gmdnr]
-            gmdname = feature["properties"][self.gmdname]
-
-            # Case where id exists but name is different
-            if gmdnr in df_geocat.values:
-                if gmdname != df_geocat.loc[df_geocat["GMDNR"] == gmdnr].iloc[0]["GMDNAME"]:
-                    
-                    new_row = pd.Series({
-                        "GMDNR": gmdnr,
-                        "GMDNAME_new": gmdname,
-                        "GMDNAME_old": df_geocat.loc[df_geocat["GMDNR"] == gmdnr].iloc[0]["GMDNAME"],
-                    })
-
-                    df_name_change = pd.concat([df_name_change, new_row.to_frame().T], ignore_index=True)
-
-                else:
-
-                    new_row = pd.Series({
-                        "GMDNR": gmdnr,
-                        "GMDNAME": gmdname,
-                    })
-
-                    df_correct = pd.concat([df_correct, new_row.to_frame().T], ignore_index=True)
-
-            # Case where id is different for a given name
-            else:
-                if gmdname in df_geocat.values:
-
-                    new_row = pd.Series({
-                        "GMDNAME": gmdname,
-                        "GMDNR_new": gmdnr,
-                        "GMDNR_old": df_geocat.loc[df_geocat["GMDNAME"] == gmdname].iloc[0]["GMDNR"],
-                    })
-
-                    df_id_change = pd.concat([df_id_change, new_row.to_frame().T], ignore_index=True)
-
-                # Case where id and name doesn't exist. New municipality to add to geocat.
-                else:
-
-                    new_row = pd.Series({
-                        "GMDNAME": gmdname,
-                        "GMDNR": gmdnr,
-                    })
-
-                    df_new = pd.concat([df_new, new_row.to_frame().T], ignore_index=True)
-
-        # 2 - Testing geocat against new municipalities
-        # 2 - Testing geocat against new municipalities
-        ref_gmdnrs = [feature["properties"][self.gmdnr] for feature in geojson_ref_file["features"]]  # ← CORRIGÉ
-        ref_gmdnames = [feature["properties"][self.gmdname] for feature in geojson_ref_file["features"]]  # ← CORRIGÉ
+        self.check_boundaries()
 
-        for _, row in df_geocat.iterrows():
 
-            # Case where municipalities in geocat doesn't exist at all (no id, no name) in the new ones
-            if (row["GMDNR"] not in ref_gmdnrs) and (row["GMDNAME"] not in ref_gmdnames):
-
-                new_row = pd.Series({
-                    "GMDNAME": row["GMDNAME"],
-                    "GMDNR": row["GMDNR"],
-                })
-
-                df_old = pd.concat([df_old, new_row.to_frame().T], ignore_index=True)
-
-        if len(df_name_change) > 0:
-            df_name_change.to_csv(os.path.join(self.output_dir, "name_incorrect_municipalities.csv"), index=False)
-        if len(df_id_change) > 0:
-            df_id_change.to_csv(os.path.join(self.output_dir, "id_incorrect_municipalities.csv"), index=False)
-        if len(df_new) > 0:
-            df_new.to_csv(os.path.join(self.output_dir, "new_municipalities.csv"), index=False)
-        if len(df_old) > 0:
-            df_old.to_csv(os.path.join(self.output_dir, "old_municipalities.csv"), index=False)
-        if len(df_correct) > 0:
-            df_correct.to_csv(os.path.join(self.output_dir, "correct_municipalities.csv"), index=False)
-
-        print(f"Checking municipalities...{geopycat.utils.okgreen('Done')}")
-
-
-class CheckDistrictBoundaries:
+class CheckDistrictBoundaries(CheckBoundaries):
     """
     Check the districts admin boundaries from geocat by comparing them to a reference geojson file.
     The geojson file must be encoded in utf-8 to support special characters (accents).
@@ -353,6 +539,8 @@ class CheckDistrictBoundaries:
             str, indicating the geocat's environment to work with, 'int' or 'prod', default = 'int'.
         output_dir:
             str, the directory path where to save the results, default = current directory.
+        snapshot:
+            str, the path to a snapshot of the geocat boundaries to check, default = None (export from geocat).
 
     It saves 5 csv lists (if not empty):
             correct_districts.csv : ID and Name correct in geocat and reference
@@ -362,15 +550,18 @@ class CheckDistrictBoundaries:
             old_districts.csv : ID and Name not found in reference
     """
 
-    def __init__(self, ref_geojson, bznr, bzname, env: str = 'int', output_dir: str = os.path.dirname(__file__)):
+    LABEL = "districts"
+    ID = "BZNR"
+    NAME = "BZNAME"
 
-        self.api = geopycat.geocat(env)
-        self.output_dir = output_dir
-        self.ref_geojson = ref_geojson
-        self.bznr = bznr
-        self.bzname = bzname
+    def __init__(self, ref_geojson, bznr, bzname, env: str = 'int', output_dir: str = os.path.dirname(__file__),
+                 snapshot: str = None):
+
+        super().__init__(ref_geojson=ref_geojson, ref_id=bznr, ref_name=bzname, env=env, output_dir=output_dir,
+                         snapshot=snapshot)
 
-        self.export_districts()
+        if snapshot is None:
+            self.export_districts()
         self.check_bz()
 
     def export_districts(self):
@@ -381,35 +572,9 @@ class CheckDistrictBoundaries:
         It saves a csv list named 'geocat_districts.csv' with the attributes BZNR and BZNAME at the root of
         the folder given at the class level.
         """
-        print("Exporting all districts from geocat : ", end="\r")
-        headers = {"accept": "application/xml", "Content-Type": "application/xml"}
-        df = pd.DataFrame(columns=["BZNR", "BZNAME"])
-
-        ns = {
-            'gex': 'http://standards.iso.org/iso/19115/-3/gex/1.0',
-            'gco': 'http://standards.iso.org/iso/19115/-3/gco/1.0'
-        }
+        districts = discover_extents(self.api, kind="bezirk", numbers=range(1, 3000), label="districts")
 
-        count = 0
-        for i in range(1, 3000):
-
-            uuid = f"geocatch-subtpl-extent-bezirk-{i}"
-            response = self.api.session.get(url=self.api.env + f"/geonetwork/srv/api/registries/entries/{uuid}",
-                                            headers=headers)
-
-            if response.status_code == 200:
-                xmlroot = ET.fromstring(response.content)
-                
-                # Nouveau chemin ISO 19115-3
-                bz_name_elem = xmlroot.find('.//gex:description/gco:CharacterString', ns)
-                if bz_name_elem is not None:
-                    bz_name = bz_name_elem.text
-
-                    row = pd.Series({"BZNR": i, "BZNAME": bz_name})
-                    df = pd.concat([df, row.to_frame().T], ignore_index=True)
-
-            count += 1
-            print(f"Exporting all districts from geocat : {round((count / 3000) * 100, 1)}%", end="\r")
+        df = pd.DataFrame(list(districts.items()), columns=["BZNR", "BZNAME"])
 
         df.to_csv(os.path.join(self.output_dir, "geocat_districts.csv"), index=False)
         print(f"Exporting all districts from geocat : {geopycat.utils.okgreen('Done')}")
@@ -426,99 +591,10 @@ class CheckDistrictBoundaries:
                 new_districts.csv : ID and Name not found in geocat
                 old_districts.csv : ID and Name not found in reference
         """
-        print("Checking districts...", end="\r")
-
-        with open(self.ref_geojson, "rb") as file:
-            geojson_ref_file = json.load(file)
-
-        df_geocat = pd.read_csv(os.path.join(self.output_dir, "geocat_districts.csv"))
-
-        df_name_change = pd.DataFrame(columns=["BZNR", "BZNAME_new", "BZNAME_old"])
-        df_id_change = pd.DataFrame(columns=["BZNAME", "BZNR_new", "BZNR_old"])
-        df_new = pd.DataFrame(columns=["BZNR", "BZNAME"])
-        df_old = pd.DataFrame(columns=["BZNR", "BZNAME"])
-        df_correct = pd.DataFrame(columns=["BZNR", "BZNAME"])
-
-        # 1 - Testing new districts against geocat
-        for feature in geojson_ref_file["features"]:
-            bznr = feature["properties"][self.bznr]
-            bzname = feature["properties"][self.bzname]
-
-            # Case where id exists but name is different
-            if bznr in df_geocat.values:
-                if bzname != df_geocat.loc[df_geocat["BZNR"] == bznr].iloc[0]["BZNAME"]:
-
-                    new_row = pd.Series({
-                        "BZNR": bznr,
-                        "BZNAME_new": bzname,
-                        "BZNAME_old": df_geocat.loc[df_geocat["BZNR"] == bznr].iloc[0]["BZNAME"],
-                    })
-
-                    df_name_change = pd.concat([df_name_change, new_row.to_frame().T], ignore_index=True)
-
-                else:
+        self.check_boundaries()
 
-                    new_row = pd.Series({
-                        "BZNR": bznr,
-                        "BZNAME": bzname,
-                    })
 
-                    df_correct = pd.concat([df_correct, new_row.to_frame().T], ignore_index=True)
-
-            # Case where id is different for a given name
-            else:
-                if bzname in df_geocat.values:
-
-                    new_row = pd.Series({
-                        "BZNAME": bzname,
-                        "BZNR_new": bznr,
-                        "BZNR_old": df_geocat.loc[df_geocat["BZNAME"] == bzname].iloc[0]["BZNR"],
-                    })
-
-                    df_id_change = pd.concat([df_id_change, new_row.to_frame().T], ignore_index=True)
-
-                # Case where id and name doesn't exist. New district to add to geocat.
-                else:
-
-                    new_row = pd.Series({
-                        "BZNAME": bzname,
-                        "BZNR": bznr,
-                    })
-
-                    df_new = pd.concat([df_new, new_row.to_frame().T], ignore_index=True)
-
-
-        # 2 - Testing geocat against new districts
-        ref_bznrs = [feature["properties"][self.bznr] for feature in geojson_ref_file["features"]]  # ← CORRIGÉ
-        ref_bznames = [feature["properties"][self.bzname] for feature in geojson_ref_file["features"]]  # ← CORRIGÉ
-
-        for _, row in df_geocat.iterrows():
-
-            # Case where districts in geocat doesn't exist at all (no id, no name) in the new ones
-            if (row["BZNR"] not in ref_bznrs) and (row["BZNAME"] not in ref_bznames):
-
-                new_row = pd.Series({
-                    "BZNAME": row["BZNAME"],
-                    "BZNR": row["BZNR"],
-                })
-
-                df_old = pd.concat([df_old, new_row.to_frame().T], ignore_index=True)
-
-        if len(df_name_change) > 0:
-            df_name_change.to_csv(os.path.join(self.output_dir, "name_incorrect_districts.csv"), index=False)
-        if len(df_id_change) > 0:
-            df_id_change.to_csv(os.path.join(self.output_dir, "id_incorrect_districts.csv"), index=False)
-        if len(df_new) > 0:
-            df_new.to_csv(os.path.join(self.output_dir, "new_districts.csv"), index=False)
-        if len(df_old) > 0:
-            df_old.to_csv(os.path.join(self.output_dir, "old_districts.csv"), index=False)
-        if len(df_correct) > 0:
-            df_correct.to_csv(os.path.join(self.output_dir, "correct_districts.csv"), index=False)
-
-        print(f"Checking districts...{geopycat.utils.okgreen('Done')}")
-
-
-class CheckCantonBoundaries:
+class CheckCantonBoundaries(CheckBoundaries):
     """
     Check the cantons admin boundaries from geocat by comparing them to a reference geojson file.
     The geojson file must be encoded in utf-8 to support special characters (accents).
@@ -534,6 +610,8 @@ class CheckCantonBoundaries:
             str, indicating the geocat's environment to work with, 'int' or 'prod', default = 'int'.
         output_dir:
             str, the directory path where to save the results, default = current directory.
+        snapshot:
+            str, the path to a snapshot of the geocat boundaries to check, default = None (export from geocat).
 
     It saves 5 csv lists (if not empty):
             correct_cantons.csv : ID and Name correct in geocat and reference
@@ -543,15 +621,23 @@ class CheckCantonBoundaries:
             old_cantons.csv : ID and Name not found in reference
     """
 
-    def __init__(self, ref_geojson, ktnr, ktname, env: str = 'int', output_dir: str = os.path.dirname(__file__)):
+    LABEL = "cantons"
+    ID = "KTNR"
+    NAME = "KTNAME"
 
-        self.api = geopycat.geocat(env)
-        self.output_dir = output_dir
-        self.ref_geojson = ref_geojson
-        self.ktnr = ktnr
-        self.ktname = ktname
+    def name_from_geocat(self, name: str) -> str:
+        """The cantons are compared by their code, e.g. 'ZH' for 'Kanton Zürich (ZH)'"""
+        match = re.search(r'\(([A-Z]{2})\)', name)
+        return match.group(1) if match else None
 
-        self.export_cantons()
+    def __init__(self, ref_geojson, ktnr, ktname, env: str = 'int', output_dir: str = os.path.dirname(__file__),
+                 snapshot: str = None):
+
+        super().__init__(ref_geojson=ref_geojson, ref_id=ktnr, ref_name=ktname, env=env, output_dir=output_dir,
+                         snapshot=snapshot)
+
+        if snapshot is None:
+            self.export_cantons()
         self.check_kt()
 
     def export_cantons(self):
@@ -562,40 +648,15 @@ class CheckCantonBoundaries:
         It saves a csv list named 'geocat_cantons.csv' with the attributes KTNR and KTNAME at the root of
         the folder given at the class level.
         """
-        print("Exporting all cantons from geocat : ", end="\r")
-        headers = {"accept": "application/xml", "Content-Type": "application/xml"}
-        df = pd.DataFrame(columns=["KTNR", "KTNAME"])
+        cantons = discover_extents(self.api, kind="kantonsgebiet", numbers=range(1, 100), label="cantons")
 
-        # Namespaces ISO 19115-3
-        ns = {
-            'gex': 'http://standards.iso.org/iso/19115/-3/gex/1.0',
-            'gco': 'http://standards.iso.org/iso/19115/-3/gco/1.0'
-        }
+        rows = list()
+        for kt_nr, kt_name_full in cantons.items():
+            kt_code = self.name_from_geocat(kt_name_full)
+            if kt_code is not None:
+                rows.append((kt_nr, kt_code))
 
-        count = 0
-        for i in range(1, 100):
-
-            uuid = f"geocatch-subtpl-extent-kantonsgebiet-{i}"
-            response = self.api.session.get(url=self.api.env + f"/geonetwork/srv/api/registries/entries/{uuid}",
-                                            headers=headers)
-
-            if response.status_code == 200:
-                xmlroot = ET.fromstring(response.content)
-                
-                kt_name_elem = xmlroot.find('.//gex:description/gco:CharacterString', ns)
-                if kt_name_elem is not None:
-                    kt_name_full = kt_name_elem.text
-                    
-                    import re
-                    match = re.search(r'\(([A-Z]{2})\)', kt_name_full)
-                    if match:
-                        kt_code = match.group(1)
-                        
-                        new_row = pd.Series({"KTNR": i, "KTNAME": kt_code})
-                        df = pd.concat([df, new_row.to_frame().T], ignore_index=True)
-
-            count += 1
-            print(f"Exporting all cantons from geocat : {round((count / 100) * 100, 1)}%", end="\r")
+        df = pd.DataFrame(rows, columns=["KTNR", "KTNAME"])
 
         df.to_csv(os.path.join(self.output_dir, "geocat_cantons.csv"), index=False)
         print(f"Exporting all cantons from geocat : {geopycat.utils.okgreen('Done')}")
@@ -612,98 +673,10 @@ class CheckCantonBoundaries:
                 new_cantons.csv : ID and Name not found in geocat
                 old_cantons.csv : ID and Name not found in reference
         """
-        print("Checking cantons...", end="\r")
+        self.check_boundaries()
 
-        with open(self.ref_geojson, "rb") as file:
-            geojson_ref_file = json.load(file)
-
-        df_geocat = pd.read_csv(os.path.join(self.output_dir, "geocat_cantons.csv"))
-
-        df_name_change = pd.DataFrame(columns=["KTNR", "KTNAME_new", "KTNAME_old"])
-        df_id_change = pd.DataFrame(columns=["KTNAME", "KTNR_new", "KTNR_old"])
-        df_new = pd.DataFrame(columns=["KTNR", "KTNAME"])
-        df_old = pd.DataFrame(columns=["KTNR", "KTNAME"])
-        df_correct = pd.DataFrame(columns=["KTNR", "KTNAME"])
-
-        # 1 - Testing new cantons against geocat
-        for feature in geojson_ref_file["features"]:
-            ktnr = feature["properties"][self.ktnr]
-            ktname = feature["properties"][self.ktname]
-
-            # Case where id exists but name is different
-            if ktnr in df_geocat.values:
-                if ktname != df_geocat.loc[df_geocat["KTNR"] == ktnr].iloc[0]["KTNAME"]:
-
-                    new_row = pd.Series({
-                        "KTNR": ktnr,
-                        "KTNAME_new": ktname,
-                        "KTNAME_old": df_geocat.loc[df_geocat["KTNR"] == ktnr].iloc[0]["KTNAME"],
-                    })
-
-                    df_name_change = pd.concat([df_name_change, new_row.to_frame().T], ignore_index=True)
-
-                else:
-
-                    new_row = pd.Series({
-                        "KTNR": ktnr,
-                        "KTNAME": ktname,
-                    })
-
-                    df_correct = pd.concat([df_correct, new_row.to_frame().T], ignore_index=True)
-
-            # Case where id is different for a given name
-            else:
-                if ktname in df_geocat.values:
-
-                    new_row = pd.Series({
-                        "KTNAME": ktname,
-                        "KTNR_new": ktnr,
-                        "KTNR_old": df_geocat.loc[df_geocat["KTNAME"] == ktname].iloc[0]["KTNR"],
-                    })
-
-                    df_id_change = pd.concat([df_id_change, new_row.to_frame().T], ignore_index=True)
 
-                # Case where id and name doesn't exist. New canton to add to geocat.
-                else:
-
-                    new_row = pd.Series({
-                        "KTNAME": ktname,
-                        "KTNR": ktnr,
-                    })
-
-                    df_new = pd.concat([df_new, new_row.to_frame().T], ignore_index=True)
-
-        # 2 - Testing geocat against new cantons
-        ref_ktnrs = [feature["properties"][self.ktnr] for feature in geojson_ref_file["features"]]  # ← CORRIGÉ
-        ref_ktnames = [feature["properties"][self.ktname] for feature in geojson_ref_file["features"]]  # ← CORRIGÉ
-
-        for _, row in df_geocat.iterrows():
-
-            # Case where cantons in geocat doesn't exist at all (no id, no name) in the new ones
-            if (row["KTNR"] not in ref_ktnrs) and (row["KTNAME"] not in ref_ktnames):
-
-                new_row = pd.Series({
-                    "KTNAME": row["KTNAME"],
-                    "KTNR": row["KTNR"],
-                })
-
-                df_old = pd.concat([df_old, new_row.to_frame().T], ignore_index=True)
-
-        if len(df_name_change) > 0:
-            df_name_change.to_csv(os.path.join(self.output_dir, "name_incorrect_cantons.csv"), index=False)
-        if len(df_id_change) > 0:
-            df_id_change.to_csv(os.path.join(self.output_dir, "id_incorrect_cantons.csv"), index=False)
-        if len(df_new) > 0:
-            df_new.to_csv(os.path.join(self.output_dir, "new_cantons.csv"), index=False)
-        if len(df_old) > 0:
-            df_old.to_csv(os.path.join(self.output_dir, "old_cantons.csv"), index=False)
-        if len(df_correct) > 0:
-            df_correct.to_csv(os.path.join(self.output_dir, "correct_cantons.csv"), index=False)
-
-        print(f"Checking cantons...{geopycat.utils.okgreen('Done')}")
-
-
-class CheckCountryBoundaries:
+class CheckCountryBoundaries(CheckBoundaries):
     """
     Check the countries admin boundaries from geocat by comparing them to a reference geojson file.
     The geojson file must be encoded in utf-8 to support special characters (accents).
@@ -719,6 +692,8 @@ class CheckCountryBoundaries:
             str, indicating the geocat's environment to work with, 'int' or 'prod', default = 'int'.
         output_dir:
             str, the directory path where to save the results, default = current directory.
+        snapshot:
+            str, the path to a snapshot of the geocat boundaries to check, default = None (export from geocat).
 
     It saves 5 csv lists (if not empty):
             correct_countries.csv : ID and Name correct in geocat and reference
@@ -728,15 +703,19 @@ class CheckCountryBoundaries:
             old_countries.csv : ID and Name not found in reference
     """
 
-    def __init__(self, ref_geojson, landnr, landname, env: str = 'int', output_dir: str = os.path.dirname(__file__)):
+    LABEL = "countries"
+    ID = "LANDNR"
+    NAME = "LANDNAME"
+    NUMERIC_ID = False
 
-        self.api = geopycat.geocat(env)
-        self.output_dir = output_dir
-        self.ref_geojson = ref_geojson
-        self.landnr =landnr
-        self.landname = landname
+    def __init__(self, ref_geojson, landnr, landname, env: str = 'int', output_dir: str = os.path.dirname(__file__),
+                 snapshot: str = None):
+
+        super().__init__(ref_geojson=ref_geojson, ref_id=landnr, ref_name=landname, env=env, output_dir=output_dir,
+                         snapshot=snapshot)
 
-        self.export_countries()
+        if snapshot is None:
+            self.export_countries()
         self.check_land()
 
     def export_countries(self):
@@ -747,37 +726,11 @@ class CheckCountryBoundaries:
         It saves a csv list named 'geocat_countries.csv' with the attributes LANDNR and LANDNAME at the root of
         the folder given at the class level.
         """
-        print("Exporting all countries from geocat : ", end="\r")
-        headers = {"accept": "application/xml", "Content-Type": "application/xml"}
-        df = pd.DataFrame(columns=["LANDNR", "LANDNAME"])
-
-        # Namespaces ISO 19115-3
-        ns = {
-            'gex': 'http://standards.iso.org/iso/19115/-3/gex/1.0',
-            'gco': 'http://standards.iso.org/iso/19115/-3/gco/1.0'
-        }
-
-        count = 0
-        for first in ascii_uppercase:
-            for second in ascii_uppercase:
-                uuid = f"geocatch-subtpl-extent-landesgebiet-{first}{second}"
+        countries = discover_extents(self.api, kind="landesgebiet",
+                                     numbers=[first + second for first in ascii_uppercase for second in ascii_uppercase],
+                                     label="countries")
 
-                response = self.api.session.get(url=self.api.env + f"/geonetwork/srv/api/registries/entries/{uuid}",
-                                                headers=headers)
-
-                if response.status_code == 200:
-                    xmlroot = ET.fromstring(response.content)
-                    
-                    # Nouveau chemin ISO 19115-3
-                    land_name_elem = xmlroot.find('.//gex:description/gco:CharacterString', ns)
-                    if land_name_elem is not None:
-                        land_name = land_name_elem.text
-
-                        new_row = pd.Series({"LANDNR": first + second, "LANDNAME": land_name})
-                        df = pd.concat([df, new_row.to_frame().T], ignore_index=True)
-
-                count += 1
-                print(f"Exporting all countries from geocat : {round((count / (26*26)) * 100, 1)}%", end="\r")
+        df = pd.DataFrame(list(countries.items()), columns=["LANDNR", "LANDNAME"])
 
         df.to_csv(os.path.join(self.output_dir, "geocat_countries.csv"), index=False)
         print(f"Exporting all countries from geocat : {geopycat.utils.okgreen('Done')}")
@@ -794,95 +747,7 @@ class CheckCountryBoundaries:
                 new_countries.csv : ID and Name not found in geocat
                 old_countries.csv : ID and Name not found in reference
         """
-        print("Checking countries...", end="\r")
-
-        with open(self.ref_geojson, "rb") as file:
-            geojson_ref_file = json.load(file)
-
-        df_geocat = pd.read_csv(os.path.join(self.output_dir, "geocat_countries.csv"))
-
-        df_name_change = pd.DataFrame(columns=["LANDNR", "LANDNAME_new", "LANDNAME_old"])
-        df_id_change = pd.DataFrame(columns=["LANDNAME", "LANDNR_new", "LANDNR_old"])
-        df_new = pd.DataFrame(columns=["LANDNR", "LANDNAME"])
-        df_old = pd.DataFrame(columns=["LANDNR", "LANDNAME"])
-        df_correct = pd.DataFrame(columns=["LANDNR", "LANDNAME"])
-
-        # 1 - Testing new countries against geocat
-        for feature in geojson_ref_file["features"]:
-            landnr = feature["properties"][self.landnr]
-            landname = feature["properties"][self.landname]
-
-            # Case where id exists but name is different
-            if landnr in df_geocat.values:
-                if landname != df_geocat.loc[df_geocat["LANDNR"] == landnr].iloc[0]["LANDNAME"]:
-
-                    new_row = pd.Series({
-                        "LANDNR": landnr,
-                        "LANDNAME_new": landname,
-                        "LANDNAME_old": df_geocat.loc[df_geocat["LANDNR"] == landnr].iloc[0]["LANDNAME"],
-                    })
-
-                    df_name_change = pd.concat([df_name_change, new_row.to_frame().T], ignore_index=True)
-
-                else:
-
-                    new_row = pd.Series({
-                        "LANDNR": landnr,
-                        "LANDNAME": landname,
-                    })
-
-                    df_correct = pd.concat([df_correct, new_row.to_frame().T], ignore_index=True)
-
-            # Case where id is different for a given name
-            else:
-                if landname in df_geocat.values:
-
-                    new_row = pd.Series({
-                        "LANDNAME": landname,
-                        "LANDNR_new": landnr,
-                        "LANDNR_old": df_geocat.loc[df_geocat["LANDNAME"] == landname].iloc[0]["LANDNR"],
-                    })
-
-                    df_id_change = pd.concat([df_id_change, new_row.to_frame().T], ignore_index=True)
-
-                # Case where id and name doesn't exist. New country to add to geocat.
-                else:
-
-                    new_row = pd.Series({
-                        "LANDNAME": landname,
-                        "LANDNR": landnr,
-                    })
-
-                    df_new = pd.concat([df_new, new_row.to_frame().T], ignore_index=True)
-
-        # 2 - Testing geocat against new countries
-        ref_landnrs = [feature["properties"][self.landnr] for feature in geojson_ref_file["features"]]  # ← CORRIGÉ
-        ref_landnames = [feature["properties"][self.landname] for feature in geojson_ref_file["features"]]  # ← CORRIGÉ
-
-        for _, row in df_geocat.iterrows():
-
-            # Case where countries in geocat doesn't exist at all (no id, no name) in the new ones
-            if (row["LANDNR"] not in ref_landnrs) and (row["LANDNAME"] not in ref_landnames):
-
-                new_row = pd.Series({
-                    "LANDNAME": row["LANDNAME"],
-                    "LANDNR": row["LANDNR"],
-                })
-
-                df_old = pd.concat([df_old, new_row.to_frame().T], ignore_index=True)
-
-        if len(df_name_change) > 0:
-            df_name_change.to_csv(os.path.join(self.output_dir, "name_incorrect_countries.csv"), index=False)
-        if len(df_id_change) > 0:
-            df_id_change.to_csv(os.path.join(self.output_dir, "id_incorrect_countries.csv"), index=False)
-        if len(df_new) > 0:
-            df_new.to_csv(os.path.join(self.output_dir, "new_countries.csv"), index=False)
-        if len(df_old) > 0:
-            df_old.to_csv(os.path.join(self.output_dir, "old_countries.csv"), index=False)
-        if len(df_correct) > 0:
-            df_correct.to_csv(os.path.join(self.output_dir, "correct_countries.csv"), index=False)
-
-        print(f"Checking countries...{geopycat.utils.okgreen('Done')}")
+        self.check_boundaries()
 
 
 class UpdateSubtemplatesExtent:
@@ -937,17 +802,11 @@ class UpdateSubtemplatesExtent:
             print(f"{geopycat.utils.warningred('You must be admin to run this tool !')}")
             sys.exit()
 
-    def extent_to_geojson(self, uuids: list) -> list:
+    def parse_extent(self, uuid: str, extent: bytes) -> dict:
         """
-        Convert geocat extent subtemplates (ISO 19115-3) into geojson.
+        Convert a geocat extent subtemplate (ISO 19115-3) into a geojson feature.
+        The rings of the geometry are numpy arrays of shape (number of vertices, 2).
         """
-        print("Convert extent subtemplates to geojson : ", end="\r")
-
-        now = datetime.now().strftime("%Y%m%d%H%M%S")
-        geojson = [{"type": "FeatureCollection", "name": f"GeocatExtent_{now}", "features": []}]
-
-        headers = {"accept": "application/xml", "Content-Type": "application/xml"}
-
         # Namespaces ISO 19115-3
         ns = {
             'gex': 'http://standards.iso.org/iso/19115/-3/gex/1.0',
@@ -956,74 +815,339 @@ class UpdateSubtemplatesExtent:
             'gco': 'http://standards.iso.org/iso/19115/-3/gco/1.0'
         }
 
-        count = 0
-        for uuid in uuids:
-            response = self.api.session.get(
-                url=self.api.env + f"/geonetwork/srv/api/registries/entries/{uuid}?lang=fre,ger,ita,eng,roh",
-                headers=headers)
-
-            if response.status_code == 200:
-                geojson[0]["features"].append({"type": "Feature",
-                                               "geometry": {"type": "MultiPolygon", "coordinates": []},
-                                               "properties": {}})
-
-                xmlroot = ET.fromstring(response.content)
-
-                # Extract names (ISO 19115-3 paths)
-                name = xmlroot.find('.//gex:description/gco:CharacterString', ns).text
-                name_de = xmlroot.find('.//lan:LocalisedCharacterString[@locale="#DE"]', ns).text
-                name_fr = xmlroot.find('.//lan:LocalisedCharacterString[@locale="#FR"]', ns).text
-                name_it = xmlroot.find('.//lan:LocalisedCharacterString[@locale="#IT"]', ns).text
-                name_en = xmlroot.find('.//lan:LocalisedCharacterString[@locale="#EN"]', ns).text
-                name_rm = xmlroot.find('.//lan:LocalisedCharacterString[@locale="#RM"]', ns).text
-
-                geojson[0]["features"][-1]["properties"][self.name] = name
-                geojson[0]["features"][-1]["properties"][f"{self.name}_DE"] = name_de
-                geojson[0]["features"][-1]["properties"][f"{self.name}_FR"] = name_fr
-                geojson[0]["features"][-1]["properties"][f"{self.name}_IT"] = name_it
-                geojson[0]["features"][-1]["properties"][f"{self.name}_EN"] = name_en
-                geojson[0]["features"][-1]["properties"][f"{self.name}_RM"] = name_rm
-
-                # Extract number
-                if self.type == "landesgebiet":
-                    geojson[0]["features"][-1]["properties"][self.number] = uuid.split('-')[-1]
-                else:
-                    geojson[0]["features"][-1]["properties"][self.number] = int(uuid.split('-')[-1])
+        feature = {"type": "Feature", "geometry": {"type": "MultiPolygon", "coordinates": []}, "properties": {}}
 
-                # Extract geometry
-                for exterior in xmlroot.findall(".//gml:surfaceMember", ns):
-                    geojson[0]["features"][-1]["geometry"]["coordinates"].append([[]])
+        xmlroot = ET.fromstring(extent)
 
-                    exterior_poly = exterior.find(".//gml:exterior//gml:posList", ns)
-                    coordinates = exterior_poly.text.split(" ")
+        # Extract names (ISO 19115-3 paths)
+        feature["properties"][self.name] = xmlroot.find('.//gex:description/gco:CharacterString', ns).text
+        for lang in ["DE", "FR", "IT", "EN", "RM"]:
+            feature["properties"][f"{self.name}_{lang}"] = xmlroot.find(
+                f'.//lan:LocalisedCharacterString[@locale="#{lang}"]', ns).text
 
-                    # Coordinates order (lon-lat)
-                    for i in range(0, len(coordinates), 2):
-                        geojson[0]["features"][-1]["geometry"]["coordinates"][-1][-1].append(
-                            [float(coordinates[i]), float(coordinates[i + 1])])
+        # Extract number
+        if self.type == "landesgebiet":
+            feature["properties"][self.number] = uuid.split('-')[-1]
+        else:
+            feature["properties"][self.number] = int(uuid.split('-')[-1])
 
-                    # Interior polygons
-                    for interior in exterior.findall(".//gml:interior", ns):
-                        geojson[0]["features"][-1]["geometry"]["coordinates"][-1].append([])
-                        interior_poly = interior.find(".//gml:posList", ns)
-                        coordinates = interior_poly.text.split(" ")
+        # Extract geometry, coordinates order (lon-lat)
+        for exterior in xmlroot.findall(".//gml:surfaceMember", ns):
+            polygon = [parse_poslist(exterior.find(".//gml:exterior//gml:posList", ns).text)]
 
-                        for i in range(0, len(coordinates), 2):
-                            geojson[0]["features"][-1]["geometry"]["coordinates"][-1][-1].append(
-                                [float(coordinates[i]), float(coordinates[i + 1])])
+            # Interior polygons
+            for interior in exterior.findall(".//gml:interior", ns):
+                polygon.append(parse_poslist(interior.find(".//gml:posList", ns).text))
+
+            feature["geometry"]["coordinates"].append(polygon)
+
+        return feature
+
+    def fetch_extent(self, uuid: str) -> dict:
+        """
+        Fetch a geocat extent subtemplate and convert it into a geojson feature (see parse_extent).
+        Returns None if the subtemplate doesn't exist.
+        """
+        headers = {"accept": "application/xml", "Content-Type": "application/xml"}
+
+        response = self.api.session.get(
+            url=self.api.env + f"/geonetwork/srv/api/registries/entries/{uuid}?lang=fre,ger,ita,eng,roh",
+            headers=headers)
+
+        if response.status_code != 200:
+            return None
+
+        return self.parse_extent(uuid, response.content)
+
+    def iter_extents(self, uuids: list, workers: int = 8):
+        """
+        Generator of the geocat extent subtemplates as geojson features (see parse_extent), in the order of uuids.
+        The subtemplates are fetched concurrently, the ones that don't exist are skipped.
+        """
+        print("Convert extent subtemplates to geojson : ", end="\r")
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+
+            count = 0
+            for feature in executor.map(self.fetch_extent, uuids):
+                if feature is not None:
+                    yield feature
+
+                count += 1
+                print(f"Convert extent subtemplates to geojson : {round((count / len(uuids)) * 100, 1)}%", end="\r")
 
-            count += 1
-            print(f"Convert extent subtemplates to geojson : {round((count / len(uuids)) * 100, 1)}%", end="\r")
-        
         print(f"Convert extent subtemplates to geojson : {geopycat.utils.okgreen('Done')}")
+
+    def extent_to_geojson(self, uuids: list) -> list:
+        """
+        Convert geocat extent subtemplates (ISO 19115-3) into geojson.
+        """
+        now = datetime.now().strftime("%Y%m%d%H%M%S")
+        geojson = [{"type": "FeatureCollection", "name": f"GeocatExtent_{now}", "features": []}]
+
+        for feature in self.iter_extents(uuids):
+            feature["geometry"]["coordinates"] = [[ring.tolist() for ring in polygon]
+                                                  for polygon in feature["geometry"]["coordinates"]]
+            geojson[0]["features"].append(feature)
+
         return geojson
 
-    def backup_subtemplates(self):
+    def write_extents_geojson(self, uuids: list, path: str, workers: int = 8, fingerprints: dict = None):
+        """
+        Save geocat extent subtemplates into a geojson file, in the same structure as extent_to_geojson.
+        The features are written to the file one by one, as soon as they are fetched, in a .part file
+        renamed once complete. If a fetch raises, the file at path is not written.
+        If a fingerprints dict is given, the fingerprint of each written subtemplate (see existing_fingerprint)
+        is added to it, so the changes can be detected without fetching the subtemplates again.
+        """
+        now = datetime.now().strftime("%Y%m%d%H%M%S")
+
+        with open(path + ".part", "w", encoding="utf-8") as f:
+            f.write(f'[{{"type": "FeatureCollection", "name": "GeocatExtent_{now}", "features": [')
+
+            separator = ""
+            for feature in self.iter_extents(uuids, workers=workers):
+                if fingerprints is not None:
+                    uuid, fingerprint = self.existing_fingerprint(feature)
+                    fingerprints[uuid] = fingerprint
+
+                f.write(separator)
+                json.dump(feature, f, ensure_ascii=False, default=np.ndarray.tolist)
+                separator = ", "
+
+            f.write("]}]")
+
+        os.replace(path + ".part", path)
+
+    def expected_names(self, name: str) -> dict:
+        """
+        Returns the names written by update_extent in the extent subtemplate for the given reference name,
+        as the properties of parse_extent {name: , name_DE: , name_FR: , name_IT: , name_EN: , name_RM: }.
+        """
+        name = str(name)
+
+        if len(name) == 2 and name.upper() in CANTON_NAMES:
+            main_name = CANTON_NAMES[name.upper()]["DE"]
+            names = CANTON_NAMES[name.upper()]
+        else:
+            main_name = name
+            names = dict.fromkeys(["DE", "FR", "IT", "EN", "RM"], name)
+
+        return {self.name: main_name, **{f"{self.name}_{lang}": names[lang] for lang in ["DE", "FR", "IT", "EN", "RM"]}}
+
+    def extent_fingerprint(self, names: dict, polygons: list) -> str:
+        """
+        Fingerprint of an extent : hash of its normalised geometry (see geometry_hash) and, if
+        update_name is set, of its names (see expected_names).
+        """
+        fingerprint = geometry_hash(polygons)
+
+        if self.update_name:
+            fingerprint += json.dumps(names, sort_keys=True, ensure_ascii=False)
+
+        return hashlib.sha256(fingerprint.encode("utf-8")).hexdigest()
+
+    def existing_fingerprint(self, extent: dict) -> tuple:
+        """
+        Returns the uuid and the fingerprint (see extent_fingerprint) of an extent subtemplate fetched
+        from geocat (see parse_extent).
+        """
+        names = {key: value for key, value in extent["properties"].items() if key != self.number}
+        uuid = f"geocatch-subtpl-extent-{self.type}-{extent['properties'][self.number]}"
+
+        return uuid, self.extent_fingerprint(names, extent["geometry"]["coordinates"])
+
+    def changed_subtemplates(self, features: list, workers: int = 8, snapshot: str = None,
+                             fingerprints: dict = None) -> set:
+        """
+        Compare the reference features with the existing extent subtemplates (fetched concurrently, or read
+        from a snapshot, see export_snapshot), by their fingerprint (see extent_fingerprint).
+        If the fingerprints of the existing subtemplates are given (e.g. computed by the backup, see
+        write_extents_geojson), the subtemplates are not fetched.
+
+        Returns the set of uuids of the subtemplates that don't exist or whose geometry or names are different.
+        """
+        print("Detect changed subtemplates...")
+
+        uuids = {f"geocatch-subtpl-extent-{self.type}-{feature['properties'][self.number]}": feature
+                 for feature in features}
+
+        if fingerprints is None:
+            # Only the fingerprints of the existing subtemplates are kept
+            fingerprints = dict()
+
+            if snapshot is not None:
+                for extent in self.iter_snapshot(snapshot):
+                    if extent["uuid"] in uuids:
+                        fingerprints[extent["uuid"]] = self.extent_fingerprint(extent["names"], extent["polygons"])
+            else:
+                for extent in self.iter_extents(list(uuids), workers=workers):
+                    uuid, fingerprint = self.existing_fingerprint(extent)
+                    fingerprints[uuid] = fingerprint
+
+        changed = set()
+        for uuid, feature in uuids.items():
+            names = self.expected_names(feature["properties"][self.name])
+
+            if fingerprints.get(uuid) != self.extent_fingerprint(names, feature_polygons(feature)):
+                changed.add(uuid)
+
+        print(f"Detect changed subtemplates...{geopycat.utils.okgreen('Done')} - "
+              f"{len(changed)} to create or update, {len(uuids) - len(changed)} unchanged")
+
+        return changed
+
+    def export_snapshot(self, uuids: list = None, env: str = None) -> str:
+        """
+        Save the extent subtemplates into a snapshot file (see snapshot.py) : uuid, number, names, geometry (WKB),
+        bbox and geometry hash. The subtemplates are fetched concurrently and written batch by batch.
+        Requires pyarrow.
+
+        The snapshot can then be checked (see CheckBoundaries), used to detect the changed subtemplates before an
+        update (see update_all_subtemplates) and compared with the snapshot of another date
+        (snapshot.compare_snapshots), without requesting geocat.
+
+        Args:
+            uuids: optional, the extent subtemplates to save. Default = all extent subtemplates of the type in geocat
+            env: optional, the geocat environment written in the snapshot metadata
+
+        Returns:
+            the path of the snapshot, 'snapshot_{type}_{datetime}.arrow' in the output directory
+        """
+        try:
+            from snapshot import SnapshotWriter
+        except ImportError:
+            print(geopycat.utils.warningred("The package pyarrow is needed to write the snapshots : pip install pyarrow"))
+            sys.exit()
+
+        if uuids is None:
+            uuids = search_extent_uuids(self.api, f"geocatch-subtpl-extent-{self.type}-")
+
+            if not uuids:
+                print(geopycat.utils.warningred("The extent subtemplates could not be listed, give the uuids to save"))
+                return None
+
+        now = datetime.now()
+        path = os.path.join(self.output_dir, f"snapshot_{self.type}_{now.strftime('%Y%m%d%H%M%S')}.arrow")
+        metadata = {"created": now.isoformat(timespec="seconds"), "env": env or self.api.env, "type": self.type}
+
+        print("Export snapshot...")
+
+        with SnapshotWriter(path, metadata) as writer:
+            for extent in self.iter_extents(sorted(uuids)):
+                polygons = extent["geometry"]["coordinates"]
+
+                writer.write({
+                    "uuid": f"geocatch-subtpl-extent-{self.type}-{extent['properties'][self.number]}",
+                    "number": extent["properties"][self.number],
+                    "name": extent["properties"][self.name],
+                    **{f"name_{lang.lower()}": extent["properties"][f"{self.name}_{lang}"]
+                       for lang in ["DE", "FR", "IT", "EN", "RM"]},
+                    "polygons": polygons,
+                    "bbox": geometry_bbox(polygons),
+                    "geometry_hash": geometry_hash(polygons),
+                })
+
+        print(f"Export snapshot...{geopycat.utils.okgreen('Done')} - {path}")
+
+        return path
+
+    def iter_snapshot(self, snapshot: str):
+        """
+        Generator of the extent subtemplates of a snapshot (see export_snapshot), read memory-mapped.
+        Yields {"uuid": , "names": (as the properties of parse_extent), "polygons": (rings as numpy arrays)}.
+        """
+        try:
+            from snapshot import read_snapshot, from_wkb
+        except ImportError:
+            print(geopycat.utils.warningred("The package pyarrow is needed to read the snapshots : pip install pyarrow"))
+            sys.exit()
+
+        table = read_snapshot(snapshot)
+
+        for batch in table.to_batches():
+            columns = batch.to_pydict()
+
+            for index, uuid in enumerate(columns["uuid"]):
+                names = {self.name: columns["name"][index]}
+                for lang in ["DE", "FR", "IT", "EN", "RM"]:
+                    names[f"{self.name}_{lang}"] = columns[f"name_{lang.lower()}"][index]
+
+                yield {"uuid": uuid, "names": names, "polygons": from_wkb(columns["geometry"][index])}
+
+    def match_subtemplates(self, uuids: list = None, min_overlap: float = 0.5, min_iou: float = 0.8) -> pd.DataFrame:
+        """
+        Pair the features of the reference geojson with existing extent subtemplates by their geometry (see
+        extent_matching.match_extents), e.g. to find the old subtemplates of merged or renamed municipalities.
+        Requires shapely.
+
+        It saves a csv list named 'matched_subtemplates_{type}.csv' in the output directory, with the reference
+        number and name, the subtemplate uuid and name, the overlaps and the relation (same, merged, split).
+
+        Args:
+            uuids: optional, the extent subtemplates to match. Default = all extent subtemplates of the type in geocat
+            min_overlap: optional, default = 0.5, minimum overlap to pair boundaries that are not the same
+            min_iou: optional, default = 0.8, minimum intersection over union to consider boundaries as the same
+
+        Returns:
+            the matches as dataframe
+        """
+        try:
+            from extent_matching import match_extents
+        except ImportError:
+            print(geopycat.utils.warningred("The package shapely is needed to match the geometries : pip install shapely"))
+            sys.exit()
+
+        if uuids is None:
+            uuids = search_extent_uuids(self.api, f"geocatch-subtpl-extent-{self.type}-")
+
+            if not uuids:
+                print(geopycat.utils.warningred("The extent subtemplates could not be listed, give the uuids to match"))
+                return None
+
+        print("Match subtemplates...")
+
+        candidates = dict()
+        candidate_names = dict()
+        for extent in self.iter_extents(sorted(uuids)):
+            uuid = f"geocatch-subtpl-extent-{self.type}-{extent['properties'][self.number]}"
+            candidates[uuid] = extent["geometry"]["coordinates"]
+            candidate_names[uuid] = extent["properties"][self.name]
+
+        references = dict()
+        reference_names = dict()
+        for feature in self.ref_geojson["features"]:
+            references[feature["properties"][self.number]] = feature_polygons(feature)
+            reference_names[feature["properties"][self.number]] = feature["properties"][self.name]
+
+        matches = match_extents(references, candidates, min_overlap=min_overlap, min_iou=min_iou)
+
+        df = pd.DataFrame([{
+            self.number: match["reference"],
+            self.name: reference_names[match["reference"]],
+            "uuid": match["candidate"],
+            "uuid_name": candidate_names[match["candidate"]],
+            "overlap_reference": match["overlap_reference"],
+            "overlap_subtemplate": match["overlap_candidate"],
+            "iou": match["iou"],
+            "relation": match["relation"],
+        } for match in matches], columns=[self.number, self.name, "uuid", "uuid_name", "overlap_reference",
+                                          "overlap_subtemplate", "iou", "relation"])
+
+        df.to_csv(os.path.join(self.output_dir, f"matched_subtemplates_{self.type}.csv"), index=False)
+
+        print(f"Match subtemplates...{geopycat.utils.okgreen('Done')} - {len(df)} matches")
+
+        return df
+
+    def backup_subtemplates(self, fingerprints: dict = None):
         """
-        Backup all subtemplates that are in the reference geojson file. It uses the method extent_to_geojson
+        Backup all subtemplates that are in the reference geojson file. It uses the method write_extents_geojson
         to generate the geojson
 
         Save the subtemplates into a single geojson (FeaturesCollection)
+        If a fingerprints dict is given, it is filled with the fingerprints of the backed-up subtemplates
+        (see write_extents_geojson).
         """
         print("Backup subtemplates...")
 
@@ -1037,11 +1161,9 @@ class UpdateSubtemplatesExtent:
             uuid = f"geocatch-subtpl-extent-{self.type}-{feature['properties'][self.number]}"
             uuids.append(uuid)
 
-        geojson = self.extent_to_geojson(uuids)
         now = datetime.now().strftime("%Y%m%d%H%M%S")
-
-        with open(os.path.join(output_dir_backup, f"Backup_{now}.json"), "w", encoding="utf-8") as f:
-            json.dump(geojson, f, ensure_ascii=False)
+        self.write_extents_geojson(uuids, os.path.join(output_dir_backup, f"Backup_{now}.json"),
+                                   fingerprints=fingerprints)
 
         print(f"Backup subtemplates...{geopycat.utils.okgreen('Done')}")
 
@@ -1118,7 +1240,7 @@ class UpdateSubtemplatesExtent:
             response = Response()
             return response  
 
-    def update_extent(self, uuid: str, name: str, gml: str) -> object:
+    def update_extent(self, uuid: str, name: str, gml: str, bbox: dict = None) -> object:
         """
         Update the name and geometry of the given extent subtemplate (ISO 19115-3).
         
@@ -1129,6 +1251,8 @@ class UpdateSubtemplatesExtent:
             uuid: string, required, the extent subtemplate uuid
             name: string, required, the new name (for cantons: 2-letter code like "VD")
             gml: string, required, the new geometry (GML with gex: namespace)
+            bbox: dict, optional, the bounding box of the geometry (see geometry_bbox). If not given,
+                  it is calculated from the GML.
 
         Returns:
             response of the PUT records API request.
@@ -1217,7 +1341,8 @@ class UpdateSubtemplatesExtent:
             parent.append(gml_element)
         
         # 4. Calculate and update bounding box from the geometry
-        bbox = self._calculate_bbox_from_gml(gml, namespaces)
+        if bbox is None:
+            bbox = self._calculate_bbox_from_gml(gml, namespaces)
         
         west = root.find('.//gex:westBoundLongitude/gco:Decimal', namespaces)
         if west is not None:
@@ -1272,25 +1397,11 @@ class UpdateSubtemplatesExtent:
             dict with west, east, south, north
         """
         gml_element = ET.fromstring(gml)
-        
-        # Extract all coordinates from posList
-        all_coords = []
-        for poslist in gml_element.findall('.//gml:posList', namespaces):
-            coords = poslist.text.strip().split()
-            # Convert to pairs of floats (lon, lat)
-            for i in range(0, len(coords), 2):
-                all_coords.append((float(coords[i]), float(coords[i+1])))
-        
-        # Calculate bbox
-        lons = [coord[0] for coord in all_coords]
-        lats = [coord[1] for coord in all_coords]
-        
-        return {
-            "west": min(lons),
-            "east": max(lons),
-            "south": min(lats),
-            "north": max(lats)
-        }
+
+        polygons = [[parse_poslist(poslist.text)]
+                    for poslist in gml_element.findall('.//gml:exterior//gml:posList', namespaces)]
+
+        return geometry_bbox(polygons)
 
     def validate_extent(self, uuid: str) -> object:
         """
@@ -1408,7 +1519,8 @@ class UpdateSubtemplatesExtent:
         # Update extent
         name = feature["properties"][self.name]
         gml = geojson_to_geocatgml(feature)
-        response = self.update_extent(uuid=uuid, name=name, gml=gml)
+        bbox = geometry_bbox(feature_polygons(feature))
+        response = self.update_extent(uuid=uuid, name=name, gml=gml, bbox=bbox)
         if geopycat.utils.process_ok(response=response):
             print(f"{uuid} : {geopycat.utils.okgreen('update successful')}")
         else:
@@ -1435,26 +1547,47 @@ class UpdateSubtemplatesExtent:
         else:
             print(f"{uuid} : {geopycat.utils.warningred('set ownership unsuccessful')}")
 
-    def update_all_subtemplates(self, with_backup: bool = True):
+    def update_all_subtemplates(self, with_backup: bool = True, journal: str = None, only_changed: bool = False,
+                                simplify_tolerance: float = None, workers: int = 4, snapshot: str = None):
         """
         Update all subtemplates that match a feature in the reference geojson.
 
         If the subtemplate doesn't exist, it is created. By default, the subtemplates that already exist in geocat
         are backed-up into a single geojson file before the update.
 
+        The subtemplates go through a pipeline of stages (existence check and creation, update, validation,
+        permission setting, ownership setting). Each stage has its own queue and workers, so many subtemplates
+        are at different steps at the same time. A subtemplate failing at a step is not passed to the next
+        stages, without stopping the others.
+
         The method write and save a log file in the output directory specified at the class level. It contains a line
         by step (creation, update, validation, permission setting, ownership setting) indicating if the process was
         successful or not.
 
+        If a journal file is given, each successful step (update, validation, permission, ownership) is recorded
+        in it. When the method is restarted with the same journal, the steps already done are skipped.
+
+        With only_changed, the existing subtemplates are first compared with the reference features (see
+        changed_subtemplates) and only the new and changed ones are uploaded, validated and given permissions.
+        The existing subtemplates are read from the snapshot if given, instead of being fetched from geocat.
+        With simplify_tolerance, the reference geometries are simplified before the upload (see simplify_feature).
+
         Args:
             with_backup: optional, default = True, if set to False no backup is done before the update
+            journal: optional, path of the progress journal file
+            only_changed: optional, default = False, if set to True the unchanged subtemplates are skipped
+            simplify_tolerance: optional, tolerance of the geometry simplification, default = None (no simplification)
+            workers: optional, default = 4, number of workers of each stage
+            snapshot: optional, path of a recent snapshot of the subtemplates (see export_snapshot) used with only_changed
         """
         print(f"Update all subtemplates - Number of subtemplates : {len(self.ref_geojson['features'])}")  # ← CORRIGÉ
 
-        if with_backup:
-            self.backup_subtemplates()
+        # With only_changed and no snapshot, the fingerprints of the existing subtemplates are computed
+        # from the backup instead of fetching the subtemplates a second time
+        fingerprints = dict() if with_backup and only_changed and snapshot is None else None
 
-        print("Update all subtemplates : ", end="\r")
+        if with_backup:
+            self.backup_subtemplates(fingerprints=fingerprints)
 
         logfile = f"UpdateAllSubtemplates_{datetime.now().strftime('%Y%m%d-%H%M%S')}.log"
 
@@ -1463,99 +1596,278 @@ class UpdateSubtemplatesExtent:
         
         logger = logging.getLogger(__name__)
 
-        subtemplate_created = 0
-        subtemplate_updated = 0
-        subtemplate_creation_failed = 0
-        subtemplate_update_failed = 0
+        counters = {
+            "created": 0,
+            "updated": 0,
+            "creation_failed": 0,
+            "update_failed": 0,
+            "unchanged": 0,
+            "finished": 0,
+        }
+        lock = threading.Lock()
 
-        count = 0
-        total = len(self.ref_geojson["features"])
-        for feature in self.ref_geojson["features"]:
+        features = self.ref_geojson["features"]
 
-            new_subtemplate = False
+        if simplify_tolerance is not None:
+            features = [simplify_feature(feature, simplify_tolerance) for feature in features]
 
-            count += 1
-            print(f"Update all subtemplates : {round((count / total) * 100, 1)}%", end="\r")
+        total = len(features)
+        changed = None
+        if only_changed:
+            changed = self.changed_subtemplates(features, snapshot=snapshot, fingerprints=fingerprints)
 
-            uuid = f'geocatch-subtpl-extent-{self.type}-{feature["properties"][self.number]}'
+        print("Update all subtemplates : ", end="\r")
+
+        if journal is not None:
+            journal = ProgressJournal(journal)
+
+        def done(uuid: str, step: str) -> bool:
+            return journal is not None and journal.isDone(uuid, step)
+
+        def mark_done(uuid: str, step: str):
+            if journal is not None:
+                with lock:
+                    journal.markDone(uuid, step)
 
+        def increment(counter: str):
+            with lock:
+                counters[counter] += 1
+
+        def finish():
+            """A subtemplate leaves the pipeline, successfully or not"""
+            with lock:
+                counters["finished"] += 1
+                print(f"Update all subtemplates : {round((counters['finished'] / total) * 100, 1)}%", end="\r")
+
+        # Stages of the pipeline. Each stage returns True if the subtemplate goes to the next stage
+        def check(task: dict) -> bool:
             headers = {"accept": "application/xml", "Content-Type": "application/xml"}
-            response = self.api.session.get(url=self.api.env + f"/geonetwork/srv/api/registries/entries/{uuid}",
+            response = self.api.session.get(url=self.api.env + f"/geonetwork/srv/api/registries/entries/{task['uuid']}",
                                             headers=headers)
 
             # If subtemplate doesn't already exist, creates it
             if response.status_code == 404:
-                logger.info(f"{count}/{total} - {uuid} - subtemplate does not already exist")
-                response = self.create_extent(uuid=uuid)
+                logger.info(f"{task['count']}/{total} - {task['uuid']} - subtemplate does not already exist")
+                response = self.create_extent(uuid=task["uuid"])
                 if response.status_code == 201:
-                    logger.info(f"{count}/{total} - {uuid} - creation successful")
-                    new_subtemplate = True
-                    subtemplate_created += 1  # ← DÉPLACÉ ICI (incrémente immédiatement)
+                    logger.info(f"{task['count']}/{total} - {task['uuid']} - creation successful")
+                    task["new_subtemplate"] = True
+                    increment("created")
                 else:
-                    logger.error(f"{count}/{total} - {uuid} - creation unsuccessful")
-                    subtemplate_creation_failed += 1
-                    continue  # If creation failed, stop the process and pass to next subtemplate !
+                    logger.error(f"{task['count']}/{total} - {task['uuid']} - creation unsuccessful")
+                    increment("creation_failed")
+                    return False  # If creation failed, stop the process and pass to next subtemplate !
             else:
-                logger.info(f"{count}/{total} - {uuid} - subtemplate already exists")
+                logger.info(f"{task['count']}/{total} - {task['uuid']} - subtemplate already exists")
+
+            return True
+
+        def update(task: dict) -> bool:
+            if done(task["uuid"], "update") and not task["new_subtemplate"]:
+                return True
 
-            # Update extent
-            name = feature["properties"][self.name]
-            gml = geojson_to_geocatgml(feature)
-            response = self.update_extent(uuid=uuid, name=name, gml=gml)
+            name = task["feature"]["properties"][self.name]
+            gml = geojson_to_geocatgml(task["feature"])
+            bbox = geometry_bbox(feature_polygons(task["feature"]))
+            response = self.update_extent(uuid=task["uuid"], name=name, gml=gml, bbox=bbox)
             if geopycat.utils.process_ok(response=response):
-                logger.info(f"{count}/{total} - {uuid} - update successful")
-            else:
-                logger.error(f"{count}/{total} - {uuid} - update unsuccessful")
-                subtemplate_update_failed += 1
-                continue
+                logger.info(f"{task['count']}/{total} - {task['uuid']} - update successful")
+                mark_done(task["uuid"], "update")
+                return True
+
+            logger.error(f"{task['count']}/{total} - {task['uuid']} - update unsuccessful")
+            increment("update_failed")
+            return False
+
+        def validation(task: dict) -> bool:
+            if done(task["uuid"], "validation") and not task["new_subtemplate"]:
+                return True
 
-            # Validate extent
-            response = self.validate_extent(uuid=uuid)
+            response = self.validate_extent(uuid=task["uuid"])
             if geopycat.utils.process_ok(response=response):
-                logger.info(f"{count}/{total} - {uuid} - validation successful")
-            else:
-                logger.error(f"{count}/{total} - {uuid} - validation unsuccessful")
-                subtemplate_update_failed += 1
-                continue
+                logger.info(f"{task['count']}/{total} - {task['uuid']} - validation successful")
+                mark_done(task["uuid"], "validation")
+                return True
+
+            logger.error(f"{task['count']}/{total} - {task['uuid']} - validation unsuccessful")
+            increment("update_failed")
+            return False
+
+        def permission(task: dict) -> bool:
+            if done(task["uuid"], "permission") and not task["new_subtemplate"]:
+                return True
 
-            # Set permission, good response= 204, no message
-            response = self.set_extent_permissions(uuid=uuid)
+            # Good response= 204, no message
+            response = self.set_extent_permissions(uuid=task["uuid"])
             if response.status_code == 204:
-                logger.info(f"{count}/{total} - {uuid} - set permission successful")
-            else:
-                logger.error(f"{count}/{total} - {uuid} - set permission unsuccessful")
-                subtemplate_update_failed += 1
-                continue
+                logger.info(f"{task['count']}/{total} - {task['uuid']} - set permission successful")
+                mark_done(task["uuid"], "permission")
+                return True
 
-            # Set ownership
-            response = self.set_extent_owner(uuid=uuid)
+            logger.error(f"{task['count']}/{total} - {task['uuid']} - set permission unsuccessful")
+            increment("update_failed")
+            return False
+
+        def ownership(task: dict) -> bool:
+            response = self.set_extent_owner(uuid=task["uuid"])
             if geopycat.utils.process_ok(response=response):
-                logger.info(f"{count}/{total} - {uuid} - set ownership successful")
-                if not new_subtemplate:  # ← CORRIGÉ : incrémente seulement si c'était un update
-                    subtemplate_updated += 1
-            else:
-                logger.error(f"{count}/{total} - {uuid} - set ownership unsuccessful")
-                subtemplate_update_failed += 1
+                logger.info(f"{task['count']}/{total} - {task['uuid']} - set ownership successful")
+                mark_done(task["uuid"], "ownership")
+                if not task["new_subtemplate"]:  # ← CORRIGÉ : incrémente seulement si c'était un update
+                    increment("updated")
+                return True
+
+            logger.error(f"{task['count']}/{total} - {task['uuid']} - set ownership unsuccessful")
+            increment("update_failed")
+            return False
+
+        stages = [check, update, validation, permission, ownership]
+        queues = [queue.Queue() for _ in stages]
+
+        def worker(index: int):
+            stage, stage_queue = stages[index], queues[index]
+
+            while True:
+                task = stage_queue.get()
+
+                if task is None:
+                    stage_queue.task_done()
+                    return
+
+                try:
+                    passed = stage(task)
+                except Exception as error:
+                    logger.error(f"{task['count']}/{total} - {task['uuid']} - {stage.__name__} unsuccessful : {error}")
+                    increment("creation_failed" if stage is check else "update_failed")
+                    passed = False
+
+                if passed and index + 1 < len(stages):
+                    queues[index + 1].put(task)
+                else:
+                    finish()
+
+                stage_queue.task_done()
+
+        threads = [threading.Thread(target=worker, args=(index,), daemon=True)
+                   for index in range(len(stages)) for _ in range(workers)]
+        for thread in threads:
+            thread.start()
+
+        for count, feature in enumerate(features, start=1):
+
+            uuid = f'geocatch-subtpl-extent-{self.type}-{feature["properties"][self.number]}'
+
+            if done(uuid, "ownership"):
+                logger.info(f"{count}/{total} - {uuid} - already updated (journal)")
+                finish()
+                continue
+
+            if changed is not None and uuid not in changed:
+                logger.info(f"{count}/{total} - {uuid} - unchanged")
+                increment("unchanged")
+                finish()
                 continue
 
+            queues[0].put({"count": count, "uuid": uuid, "feature": feature, "new_subtemplate": False})
+
+        # A stage is over when the previous ones are over and its queue is empty
+        for stage_queue in queues:
+            stage_queue.join()
+
+        for stage_queue in queues:
+            for _ in range(workers):
+                stage_queue.put(None)
+        for thread in threads:
+            thread.join()
+
+        if journal is not None:
+            journal.flush()
+
         print(f"Update all subtemplates : {geopycat.utils.okgreen('Done')}")
-        print(f"Subtemplates successfully created : {geopycat.utils.okgreen(subtemplate_created)}")
-        print(f"Subtemplates successfully updated : {geopycat.utils.okgreen(subtemplate_updated)}")
-        print(f"Subtemplates unsuccessfully created : {geopycat.utils.warningred(subtemplate_creation_failed)}")
-        print(f"Subtemplates unsuccessfully updated : {geopycat.utils.warningred(subtemplate_update_failed)}")
+        print(f"Subtemplates successfully created : {geopycat.utils.okgreen(counters['created'])}")
+        print(f"Subtemplates successfully updated : {geopycat.utils.okgreen(counters['updated'])}")
+        if only_changed:
+            print(f"Subtemplates unchanged : {geopycat.utils.okgreen(counters['unchanged'])}")
+        print(f"Subtemplates unsuccessfully created : {geopycat.utils.warningred(counters['creation_failed'])}")
+        print(f"Subtemplates unsuccessfully updated : {geopycat.utils.warningred(counters['update_failed'])}")
+
+    def delete_subtemplate(self, uuid: str) -> dict:
+        """
+        Delete a single subtemplate. Returns the outcome {"success": bool, "message": str}.
+        """
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+
+        response = self.api.session.delete(url=self.api.env + f"/geonetwork/srv/api/records/{uuid}",
+                                            headers=headers)
+
+        if response.status_code == 204:
+            return {"success": True, "message": "deleted"}
+
+        if response.status_code == 404:
+            return {"success": False, "message": "not found"}
+
+        return {"success": False, "message": f"status code {response.status_code}"}
+
+    def delete_subtemplates_bulk(self, uuids: list) -> tuple:
+        """
+        Delete a list of subtemplates with a single request on the multi-UUID records endpoint.
+
+        Returns a tuple (results, deleted) : the outcome {"success": bool, "message": str} of the UUID the
+        processing report of geocat accounts for (deleted or in error), and the number of subtemplates
+        deleted among the other UUID. Returns None if the endpoint is not available.
+        """
+        headers = {"Content-Type": "application/json", "Accept": "application/json"}
+
+        response = self.api.session.delete(url=self.api.env + "/geonetwork/srv/api/records",
+                                            params={"uuids": uuids}, headers=headers)
+
+        if response.status_code != 200:
+            return None
+
+        report = response.json()
+        results = dict()
+
+        for errors in report.get("metadataErrors", {}).values():
+            for error in errors:
+                if error.get("uuid") in uuids:
+                    results[error["uuid"]] = {"success": False, "message": error.get("message", "error")}
 
-    def delete_subtemplates(self, uuids: list, with_backup: bool = True):
+        # The report only gives the number of records deleted, they can't be attributed by UUID
+        # when some records were not found or not editable
+        deleted = report.get("numberOfRecordsProcessed", 0)
+
+        if deleted == len(uuids) - len(results):
+            for uuid in uuids:
+                if uuid not in results:
+                    results[uuid] = {"success": True, "message": "deleted (bulk)"}
+            deleted = 0
+
+        return results, deleted
+
+    def delete_subtemplates(self, uuids: list, with_backup: bool = True, bulk: bool = True,
+                            batch_size: int = 100, workers: int = 8) -> dict:
         """
         Delete a list of subtemplates. As an option, the subtemplates can be backed-up first.
 
-        If the backup option is choosen, the subtemplates are saved in a single geojson file using the
-        extent_to_geojson method.
+        If the backup option is choosen, the subtemplates are fetched concurrently and saved in a single geojson
+        file using the write_extents_geojson method.
+
+        In bulk mode, the subtemplates are deleted by batch of batch_size on the multi-UUID records endpoint.
+        The subtemplates the endpoint can't account for (endpoint not available, records not found, etc.) are
+        deleted one by one, with at most workers concurrent requests. When a bulk request deleted only part of
+        its batch, the subtemplates of the batch not found anymore are reported as deleted if their number is
+        the number of subtemplates the bulk request deleted, otherwise as not found.
 
         The method write and save a log file in the output directory specified at the class level. It contains a line
         by step (deletion) indicating if the process was successful or not.
 
         Args:
             with_backup: optional, default = True, if set to False no backup is done before the update
+            bulk: optional, default = True, if set to False the subtemplates are only deleted one by one
+            batch_size: optional, default = 100, number of subtemplates per bulk request
+            workers: optional, default = 8, maximum number of concurrent requests
+
+        Returns a dictionnary {uuid: {"success": bool, "message": str}}, in the order of uuids.
         """
         print(f"Delete subtemplates - Number of subtemplates : {len(uuids)}")
 
@@ -1566,17 +1878,12 @@ class UpdateSubtemplatesExtent:
             if not os.path.exists(output_dir_backup):
                 os.mkdir(output_dir_backup)
 
-            geojson = self.extent_to_geojson(uuids)
             now = datetime.now().strftime("%Y%m%d%H%M%S")
-
-            with open(os.path.join(output_dir_backup, f"BackupDeleted_{now}.json"), "w", encoding="utf-8") as f:
-                json.dump(geojson, f, ensure_ascii=False)
+            self.write_extents_geojson(uuids, os.path.join(output_dir_backup, f"BackupDeleted_{now}.json"),
+                                       workers=workers)
 
         print("Delete subtemplates : ", end="\r")
 
-        subtemplates_deleted = 0
-        subtemplates_delete_failed = 0
-
         logfile = f"DeleteSubtemplates_{datetime.now().strftime('%Y%m%d-%H%M%S')}.log"
 
         log_config = geopycat.utils.get_log_config(logfile, log2stdout = False)
@@ -1584,23 +1891,71 @@ class UpdateSubtemplatesExtent:
         
         logger = logging.getLogger(__name__)
 
-        count = 0
-        for uuid in uuids:
-            count += 1
-
-            headers = {"Content-Type": "application/json", "Accept": "application/json"}
+        results = dict()
 
-            response = self.api.session.delete(url=self.api.env + f"/geonetwork/srv/api/records/{uuid}",
-                                                headers=headers)
+        def log(uuid: str, result: dict):
+            results[uuid] = result
 
-            if response.status_code == 204:
-                logger.info(f"{count}/{len(uuids)} - {uuid} - successfully deleted")
-                subtemplates_deleted += 1
+            if result["success"]:
+                logger.info(f"{len(results)}/{len(uuids)} - {uuid} - successfully deleted - {result['message']}")
             else:
-                logger.error(f"{count}/{len(uuids)} - {uuid} - unsuccessfully deleted")
-                subtemplates_delete_failed += 1
+                logger.error(f"{len(results)}/{len(uuids)} - {uuid} - unsuccessfully deleted - {result['message']}")
+
+            print(f"Delete subtemplates : {round((len(results) / len(uuids)) * 100, 1)}%", end="\r")
+
+        # Subtemplates to delete one by one, and the subtemplates of the bulk requests that deleted only part
+        # of their batch with the number of subtemplates deleted [(uuids, deleted)]
+        remaining = list(uuids)
+        partial = list()
+
+        if bulk:
+            remaining = list()
+
+            for i in range(0, len(uuids), batch_size):
+                batch = uuids[i:i + batch_size]
+                bulk_result = self.delete_subtemplates_bulk(batch)
+
+                if bulk_result is None:
+                    # Endpoint not available, no need to try the next batches
+                    remaining += uuids[i:]
+                    break
+
+                batch_results, deleted = bulk_result
+
+                for uuid in batch:
+                    if uuid in batch_results:
+                        log(uuid, batch_results[uuid])
+
+                unresolved = [uuid for uuid in batch if uuid not in batch_results]
+                if len(unresolved) > 0:
+                    partial.append((unresolved, deleted))
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for uuid, result in zip(remaining, executor.map(self.delete_subtemplate, remaining)):
+                log(uuid, result)
+
+            for unresolved, deleted in partial:
+                unresolved_results = dict(zip(unresolved, executor.map(self.delete_subtemplate, unresolved)))
+                not_found = [uuid for uuid, result in unresolved_results.items() if result["message"] == "not found"]
+
+                # The subtemplates deleted by the bulk request are not found anymore. If there are more
+                # subtemplates not found, the ones that never existed can't be told apart
+                if len(not_found) == deleted:
+                    for uuid in not_found:
+                        unresolved_results[uuid] = {"success": True, "message": "deleted (bulk)"}
+                else:
+                    for uuid in not_found:
+                        unresolved_results[uuid] = {"success": False,
+                                                    "message": "not found (not existing or deleted by the bulk request)"}
+
+                for uuid, result in unresolved_results.items():
+                    log(uuid, result)
+
+        subtemplates_deleted = sum(result["success"] for result in results.values())
+        subtemplates_delete_failed = len(results) - subtemplates_deleted
 
-            print(f"Delete subtemplates : {round((count / len(uuids)) * 100, 1)}%", end="\r")
         print(f"Delete subtemplates : {geopycat.utils.okgreen('Done')}")
         print(f"Subtemplates successfully deleted : {geopycat.utils.okgreen(subtemplates_deleted)}")
         print(f"Subtemplates unsuccessfully deleted : {geopycat.utils.warningred(subtemplates_delete_failed)}")
+
+        return {uuid: results[uuid] for uuid in uuids}
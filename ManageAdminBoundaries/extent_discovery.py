@@ -0,0 +1,121 @@
+"""
+Discovery of the admin boundaries extent subtemplates in geocat.
+
+The admin boundaries have predictable UUID (e.g. geocatch-subtpl-extent-hoheitsgebiet-{BFS number}).
+Instead of requesting every possible UUID one after the other, the existing ones are listed with
+a single prefix query on the search index. If the index can't be queried or returns no subtemplate
+(e.g. subtemplates not indexed or filtered for the user), the possible UUID are probed concurrently.
+The registry entries found are then fetched concurrently to get their name.
+"""
+
+import xml.etree.ElementTree as ET
+from concurrent.futures import ThreadPoolExecutor, as_completed
+import requests
+
+ES_SEARCH_PATH = "/geonetwork/srv/api/search/records/_search"
+PREFIX = "geocatch-subtpl-extent-"
+WORKERS = 16
+
+# Namespaces ISO 19115-3
+NS = {
+    'gex': 'http://standards.iso.org/iso/19115/-3/gex/1.0',
+    'gco': 'http://standards.iso.org/iso/19115/-3/gco/1.0'
+}
+
+
+def search_extent_uuids(api, prefix: str, page_size: int = 1000) -> set:
+    """
+    List the UUID of the records starting with prefix from the search index.
+    Returns None if the search index couldn't be queried.
+    """
+
+    headers = {"accept": "application/json", "Content-Type": "application/json"}
+
+    body = {
+        "query": {"prefix": {"uuid": prefix}},
+        "_source": {"includes": ["uuid"]},
+        "sort": [{"_id": "asc"}],
+        "size": page_size,
+        "track_total_hits": False,
+    }
+
+    uuids = set()
+
+    while True:
+        try:
+            response = api.session.post(url=api.env + ES_SEARCH_PATH, json=body, headers=headers)
+        except requests.exceptions.RequestException:
+            return None
+
+        if response.status_code != 200:
+            return None
+
+        hits = response.json().get("hits", {}).get("hits", [])
+        uuids.update(hit["_source"]["uuid"] for hit in hits)
+
+        if len(hits) < page_size:
+            return uuids
+
+        body["search_after"] = hits[-1]["sort"]
+
+
+def get_extent_name(api, uuid: str) -> str:
+    """
+    Get the name (description) of an extent subtemplate from the registry.
+    Returns None if the subtemplate doesn't exist or has no name.
+    """
+
+    headers = {"accept": "application/xml", "Content-Type": "application/xml"}
+
+    response = api.session.get(url=api.env + f"/geonetwork/srv/api/registries/entries/{uuid}",
+                               headers=headers)
+
+    if response.status_code != 200:
+        return None
+
+    name = ET.fromstring(response.content).find('.//gex:description/gco:CharacterString', NS)
+
+    return name.text if name is not None else None
+
+
+def discover_extents(api, kind: str, numbers: list, label: str, workers: int = WORKERS) -> dict:
+    """
+    Get the extent subtemplates geocatch-subtpl-extent-{kind}-{number} existing in geocat for
+    the given numbers, with their name.
+
+    Args:
+        api: geopycat.geocat instance
+        kind: the kind of admin boundary in the UUID, e.g. 'hoheitsgebiet', 'bezirk'
+        numbers: the possible numbers (or codes) of the admin boundaries
+        label: the label of the progress printed, e.g. 'municipalities'
+        workers: the maximum number of concurrent requests
+
+    Returns a dictionnary {number: name}, in the order of numbers.
+    """
+
+    print(f"Exporting all {label} from geocat : ", end="\r")
+
+    prefix = f"{PREFIX}{kind}-"
+    candidates = {f"{prefix}{number}": number for number in numbers}
+
+    # Only the existing subtemplates are requested, all the candidates if the index is not available
+    # or doesn't list any, otherwise all the boundaries would be considered as new
+    found = search_extent_uuids(api, prefix)
+    uuids = [uuid for uuid in candidates if not found or uuid in found]
+
+    names = dict()
+
+    with ThreadPoolExecutor(max_workers=workers) as executor:
+        futures = {executor.submit(get_extent_name, api, uuid): uuid for uuid in uuids}
+
+        count = 0
+        for future in as_completed(futures):
+            name = future.result()
+
+            if name is not None:
+                names[candidates[futures[future]]] = name
+
+            count += 1
+            print(f"Exporting all {label} from geocat : {round((count / len(futures)) * 100, 1)}%", end="\r")
+
+    return {number: names[number] for number in numbers if number in names}
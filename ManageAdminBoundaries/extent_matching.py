@@ -0,0 +1,82 @@
+"""
+Geometric matching of admin boundaries with extent subtemplates.
+
+The candidate geometries (e.g. the extent subtemplates of geocat) are indexed in a STRtree. Each reference
+geometry is only compared with the candidates whose bounding box intersects it, and paired by overlap :
+    overlap_reference : part of the reference covered by the candidate
+    overlap_candidate : part of the candidate covered by the reference
+    iou : intersection over union
+
+Requires shapely (version 2 or more).
+"""
+
+from shapely import STRtree, make_valid
+from shapely.geometry import shape
+
+
+def to_geometry(polygons: list) -> object:
+    """Returns a valid shapely MultiPolygon from MultiPolygon coordinates (lists or numpy arrays)"""
+
+    geometry = shape({"type": "MultiPolygon", "coordinates": polygons})
+
+    return geometry if geometry.is_valid else make_valid(geometry)
+
+
+def match_extents(references: dict, candidates: dict, min_overlap: float = 0.5, min_iou: float = 0.8) -> list:
+    """
+    Pair reference geometries with candidate geometries by overlap.
+
+    Args:
+        references: dict {key: MultiPolygon coordinates}, e.g. the features of the reference geojson
+        candidates: dict {key: MultiPolygon coordinates}, e.g. the extent subtemplates of geocat
+        min_overlap: minimum overlap to pair a reference and a candidate that are not the same boundary
+        min_iou: minimum intersection over union to consider a reference and a candidate as the same boundary
+
+    Returns a list of matches {"reference": , "candidate": , "overlap_reference": , "overlap_candidate": ,
+    "iou": , "relation": }. The relation is :
+        same : the reference and the candidate are the same boundary (iou >= min_iou)
+        merged : the candidate is mostly within the reference (overlap_candidate >= min_overlap and
+                 >= overlap_reference), e.g. an old municipality merged into a new one
+        split : the reference is mostly within the candidate (overlap_reference >= min_overlap and
+                > overlap_candidate), e.g. a new municipality split from an old one
+    """
+
+    keys = list(candidates)
+    geometries = [to_geometry(candidates[key]) for key in keys]
+    tree = STRtree(geometries)
+
+    matches = list()
+
+    for reference, polygons in references.items():
+        geometry = to_geometry(polygons)
+
+        for index in tree.query(geometry, predicate="intersects"):
+            candidate = geometries[index]
+            intersection = geometry.intersection(candidate).area
+
+            if intersection == 0:
+                continue
+
+            overlap_reference = intersection / geometry.area
+            overlap_candidate = intersection / candidate.area
+            iou = intersection / (geometry.area + candidate.area - intersection)
+
+            if iou >= min_iou:
+                relation = "same"
+            elif max(overlap_reference, overlap_candidate) < min_overlap:
+                continue
+            elif overlap_candidate >= overlap_reference:
+                relation = "merged"
+            else:
+                relation = "split"
+
+            matches.append({
+                "reference": reference,
+                "candidate": keys[index],
+                "overlap_reference": round(overlap_reference, 4),
+                "overlap_candidate": round(overlap_candidate, 4),
+                "iou": round(iou, 4),
+                "relation": relation,
+            })
+
+    return matches
@@ -0,0 +1,189 @@
+"""
+Offline snapshots of the admin boundaries extent subtemplates of geocat.
+
+A snapshot is an Arrow IPC file, one row per extent subtemplate, with the columns :
+    uuid, number, name, name_de, name_fr, name_it, name_en, name_rm,
+    geometry (MultiPolygon, WKB), bbox_west, bbox_east, bbox_south, bbox_north, geometry_hash
+
+The geometry column is tagged as geoarrow.wkb. The file metadata gives the creation date, the geocat
+environment and the type of admin boundaries. Snapshots are read memory-mapped, so the columns that are
+not used (e.g. the geometry) are not loaded, and two snapshots can be compared without requesting geocat.
+
+Requires pyarrow.
+"""
+
+import json
+import struct
+import numpy as np
+import pyarrow as pa
+
+LANGS = ["de", "fr", "it", "en", "rm"]
+
+SCHEMA = pa.schema(
+    [
+        ("uuid", pa.string()),
+        ("number", pa.string()),
+        ("name", pa.string()),
+    ] + [(f"name_{lang}", pa.string()) for lang in LANGS] + [
+        pa.field("geometry", pa.binary(), metadata={"ARROW:extension:name": "geoarrow.wkb"}),
+        ("bbox_west", pa.float64()),
+        ("bbox_east", pa.float64()),
+        ("bbox_south", pa.float64()),
+        ("bbox_north", pa.float64()),
+        ("geometry_hash", pa.string()),
+    ]
+)
+
+
+def to_wkb(polygons: list) -> bytes:
+    """Encode MultiPolygon coordinates (rings as lists or numpy arrays) into WKB (little endian, 2D)"""
+
+    parts = [struct.pack("<BII", 1, 6, len(polygons))]
+
+    for polygon in polygons:
+        parts.append(struct.pack("<BII", 1, 3, len(polygon)))
+
+        for ring in polygon:
+            if len(ring) == 0:
+                parts.append(struct.pack("<I", 0))
+                continue
+
+            xy = np.ascontiguousarray(np.asarray(ring, dtype="<f8").reshape(len(ring), -1)[:, :2])
+            parts.append(struct.pack("<I", len(xy)))
+            parts.append(xy.tobytes())
+
+    return b"".join(parts)
+
+
+def from_wkb(wkb: bytes) -> list:
+    """
+    Decode a MultiPolygon WKB written by to_wkb into MultiPolygon coordinates.
+    The rings are read-only numpy arrays of shape (number of vertices, 2), without copy of the WKB.
+    """
+
+    offset = 9
+    polygons = list()
+
+    for _ in range(struct.unpack_from("<I", wkb, 5)[0]):
+        rings = struct.unpack_from("<I", wkb, offset + 5)[0]
+        offset += 9
+
+        polygon = list()
+        for _ in range(rings):
+            points = struct.unpack_from("<I", wkb, offset)[0]
+            offset += 4
+
+            polygon.append(np.frombuffer(wkb, dtype="<f8", count=points * 2, offset=offset).reshape(-1, 2))
+            offset += points * 16
+
+        polygons.append(polygon)
+
+    return polygons
+
+
+class SnapshotWriter():
+    """
+    Write a snapshot record by record. The records are buffered and written by batch of batch_size,
+    the whole snapshot is never held in memory.
+
+    Parameters :
+        path -> str, path of the snapshot file
+        metadata -> dict, metadata of the snapshot (e.g. created, env, type)
+        batch_size -> int (default = 100), number of records per batch
+
+    Usage :
+        with SnapshotWriter("snapshot.arrow", {"type": "hoheitsgebiet"}) as writer:
+            writer.write({"uuid": , "number": , "name": , "name_de": , ..., "polygons": , "bbox": , "geometry_hash": })
+    """
+
+    def __init__(self, path: str, metadata: dict, batch_size: int = 100):
+        self.path = path
+        self.batch_size = batch_size
+
+        self.__schema = SCHEMA.with_metadata({"snapshot": json.dumps(metadata)})
+        self.__sink = pa.OSFile(path, "wb")
+        self.__writer = pa.ipc.new_file(self.__sink, self.__schema)
+        self.__buffer = {name: list() for name in self.__schema.names}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def write(self, record: dict):
+        """
+        Add an extent subtemplate to the snapshot. The record gives the uuid, number, names (name, name_de, ...),
+        polygons (MultiPolygon coordinates), bbox (dict with west, east, south, north) and geometry_hash.
+        """
+
+        for name in ["uuid", "number", "name"] + [f"name_{lang}" for lang in LANGS] + ["geometry_hash"]:
+            self.__buffer[name].append(None if record.get(name) is None else str(record[name]))
+
+        self.__buffer["geometry"].append(to_wkb(record["polygons"]))
+
+        for side in ["west", "east", "south", "north"]:
+            self.__buffer[f"bbox_{side}"].append(record["bbox"][side])
+
+        if len(self.__buffer["uuid"]) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Write the buffered records as a batch"""
+
+        if len(self.__buffer["uuid"]) == 0:
+            return
+
+        self.__writer.write_batch(pa.RecordBatch.from_pydict(self.__buffer, schema=self.__schema))
+
+        for values in self.__buffer.values():
+            values.clear()
+
+    def close(self):
+        """Write the remaining records and close the file"""
+
+        self.flush()
+        self.__writer.close()
+        self.__sink.close()
+
+
+def read_snapshot(path: str) -> pa.Table:
+    """Open a snapshot memory-mapped. The columns are only read when used."""
+
+    return pa.ipc.open_file(pa.memory_map(path, "r")).read_all()
+
+
+def snapshot_metadata(table: pa.Table) -> dict:
+    """Returns the metadata of a snapshot (created, env, type)"""
+
+    return json.loads(table.schema.metadata[b"snapshot"])
+
+
+def compare_snapshots(old_path: str, new_path: str) -> dict:
+    """
+    Compare two snapshots (e.g. from different dates) by uuid, without loading the geometries.
+
+    Returns a dictionnary of dataframes :
+        added : subtemplates only in the new snapshot
+        removed : subtemplates only in the old snapshot
+        renamed : subtemplates with a different name (name_old, name_new)
+        geometry_changed : subtemplates with a different geometry (geometry_hash)
+    """
+
+    columns = ["uuid", "number", "name", "geometry_hash"]
+
+    old = read_snapshot(old_path).select(columns).to_pandas()
+    new = read_snapshot(new_path).select(columns).to_pandas()
+
+    df = old.merge(new, on="uuid", how="outer", suffixes=("_old", "_new"), indicator=True)
+    both = df[df["_merge"] == "both"]
+
+    return {
+        "added": new[new["uuid"].isin(df.loc[df["_merge"] == "right_only", "uuid"])].reset_index(drop=True),
+        "removed": old[old["uuid"].isin(df.loc[df["_merge"] == "left_only", "uuid"])].reset_index(drop=True),
+        "renamed": both.loc[both["name_old"] != both["name_new"], ["uuid", "number_new", "name_old", "name_new"]]
+                       .rename(columns={"number_new": "number"}).reset_index(drop=True),
+        "geometry_changed": both.loc[both["geometry_hash_old"] != both["geometry_hash_new"],
+                                     ["uuid", "number_new", "name_new"]]
+                                .rename(columns={"number_new": "number", "name_new": "name"}).reset_index(drop=True),
+    }
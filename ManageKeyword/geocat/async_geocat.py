@@ -0,0 +1,104 @@
+import asyncio
+import functools
+from concurrent.futures import ThreadPoolExecutor
+from requests.adapters import HTTPAdapter
+from .geocat import GeocatAPI
+
+
+class AsyncGeocatAPI():
+    """
+    Asynchronous client for the geocat Restful API with a bounded number of requests in flight.
+
+    The authentication (XSRF Token, http authentication, proxies) is negotiated once by GeocatAPI.
+    Its session is then mounted with a connection pool large enough to keep one keep-alive
+    connection per concurrent request. Requests are sent from a dedicated thread pool and awaited
+    from asyncio, so many records can be processed at the same time without re-implementing the
+    proxy and token negotiation.
+
+    Parameters :
+        env -> str (default = 'int'), can be set to 'prod'
+        max_concurrency -> int (default = 20), maximum number of requests in flight
+        api -> GeocatAPI (default = None), an already authenticated GeocatAPI to reuse
+
+    Usage :
+        client = AsyncGeocatAPI(env="int", max_concurrency=30)
+        metadatas = asyncio.run(client.get_metadata_from_mef_many(uuids))
+    """
+
+    def __init__(self, env: str = 'int', max_concurrency: int = 20, api: GeocatAPI = None):
+        self.api = api if api is not None else GeocatAPI(env=env)
+        self.env = self.api.env
+        self.session = self.api.session
+        self.max_concurrency = max_concurrency
+
+        adapter = HTTPAdapter(pool_connections=max_concurrency, pool_maxsize=max_concurrency)
+        self.session.mount("https://", adapter)
+        self.session.mount("http://", adapter)
+
+        self.__executor = ThreadPoolExecutor(max_workers=max_concurrency,
+                                             thread_name_prefix="geocat")
+        self.__semaphores = dict()
+
+    def __semaphore(self) -> asyncio.Semaphore:
+        """Semaphore bounding the requests in flight, one per running event loop"""
+        loop = asyncio.get_running_loop()
+        if loop not in self.__semaphores:
+            self.__semaphores[loop] = asyncio.Semaphore(self.max_concurrency)
+        return self.__semaphores[loop]
+
+    async def _run(self, func, *args):
+        """Run a blocking call of the session in the thread pool, within the in-flight limit"""
+        async with self.__semaphore():
+            loop = asyncio.get_running_loop()
+            return await loop.run_in_executor(self.__executor, func, *args)
+
+    def close(self):
+        """Shutdown the thread pool. The client can't be used anymore afterwards"""
+        self.__executor.shutdown(wait=True)
+
+    async def get_metadata_from_mef(self, uuid: str, direct: bool = False) -> bytes:
+        """
+        Get metadata XML from MEF (metadata exchange format).
+        Same arguments as GeocatAPI.get_metadata_from_mef.
+        """
+        return await self._run(self.api.get_metadata_from_mef, uuid, direct)
+
+    async def get_metadata_from_mef_many(self, uuids: list, direct: bool = False) -> dict:
+        """
+        Get metadata XML of many records concurrently.
+        Returns a dictionnary {uuid: metadata}, metadata is None when the record could not be fetched.
+        """
+        metadatas = await asyncio.gather(*[self.get_metadata_from_mef(uuid, direct) for uuid in uuids])
+        return dict(zip(uuids, metadatas))
+
+    async def edit_metadata(self, uuid: str, body: list, updateDateStamp: str = 'false') -> object:
+        """
+        Edit a metadata by giving sets of xpath and xml.
+        Same arguments as GeocatAPI.edit_metadata. Returns the response of the batchediting request.
+        """
+        return await self._run(self.api.edit_metadata, uuid, body, updateDateStamp)
+
+    async def edit_metadata_many(self, edits: dict, updateDateStamp: str = 'false') -> dict:
+        """
+        Edit many metadata concurrently.
+
+        Args:
+            edits : {uuid: body, ...} with body as expected by edit_metadata
+            updateDateStamp : 'true' or 'false', default = 'false'.
+
+        Returns:
+            A dictionnary {uuid: response}
+        """
+        uuids = list(edits)
+        responses = await asyncio.gather(*[self.edit_metadata(uuid, edits[uuid], updateDateStamp)
+                                           for uuid in uuids])
+        return dict(zip(uuids, responses))
+
+    async def backup_metadata(self, uuids: list, archive: bool = False) -> str:
+        """
+        Backup list of metadata as MEF zip file, downloading max_concurrency metadata at the same time.
+        Same as GeocatAPI.backup_metadata, returns the backup directory.
+        """
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(None, functools.partial(self.api.backup_metadata, uuids,
+                                                                  workers=self.max_concurrency, archive=archive))
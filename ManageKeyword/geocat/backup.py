@@ -0,0 +1,166 @@
+import os
+import json
+import hashlib
+import threading
+from datetime import datetime
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from zipfile import ZipFile, ZIP_STORED
+import requests
+from . import utils
+
+CHUNK_SIZE = 64 * 1024
+MANIFEST = "manifest.json"
+ARCHIVE = "MetadataBackup.zip"
+
+
+def download_mef(session: object, env: str, uuid: str, path: str) -> dict:
+    """
+    Download the MEF of a metadata to the given path, streaming the response body in chunks.
+    Returns {"size": , "sha256": } of the file, None if the metadata could not be downloaded.
+    """
+
+    headers = {"accept": "application/x-gn-mef-2-zip"}
+
+    proxy_error = True
+    while proxy_error:
+        try:
+            response = session.get(url=env + f"/geonetwork/srv/api/0.1/records/{uuid}/formatters/zip",
+                                   headers=headers, stream=True)
+        except requests.exceptions.ProxyError:
+            print("Proxy Error Occured, retry connection")
+        else:
+            proxy_error = False
+
+    with response:
+        if response.status_code != 200:
+            return None
+
+        sha256 = hashlib.sha256()
+        size = 0
+
+        with open(path + ".part", "wb") as f:
+            for chunk in response.iter_content(chunk_size=CHUNK_SIZE):
+                f.write(chunk)
+                sha256.update(chunk)
+                size += len(chunk)
+
+    os.replace(path + ".part", path)
+
+    return {"size": size, "sha256": sha256.hexdigest()}
+
+
+def backup_metadata(session: object, env: str, uuids: list, backup_dir: str, workers: int = 8,
+                    archive: bool = False) -> dict:
+    """
+    Backup a list of metadata as MEF zip files in backup_dir, downloading them with a pool of workers.
+
+    If archive is True, all MEF are gathered in a single archive (MetadataBackup.zip) instead of one
+    file per metadata. A manifest (manifest.json) gives for each metadata the file (or archive member),
+    its size and sha256 checksum, and lists the metadata that could not be backup.
+
+    Returns the manifest as dictionnary.
+    """
+
+    manifest = {
+        "created": datetime.now().isoformat(timespec="seconds"),
+        "env": env,
+        "archive": ARCHIVE if archive else None,
+        "records": dict(),
+        "failed": list(),
+    }
+
+    lock = threading.Lock()
+    zip_archive = ZipFile(os.path.join(backup_dir, ARCHIVE), "w", compression=ZIP_STORED,
+                          allowZip64=True) if archive else None
+
+    def backup(uuid: str) -> dict:
+        path = os.path.join(backup_dir, f"{uuid}.zip")
+        record = download_mef(session, env, uuid, path)
+
+        if record is None or zip_archive is None:
+            return record
+
+        # The MEF are already compressed, they are stored as is in the archive
+        with lock:
+            zip_archive.write(path, arcname=f"{uuid}.zip")
+        os.remove(path)
+
+        return record
+
+    print("Backup metadata : ", end="\r")
+
+    try:
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            futures = {executor.submit(backup, uuid): uuid for uuid in dict.fromkeys(uuids)}
+
+            count = 0
+            for future in as_completed(futures):
+                uuid = futures[future]
+                count += 1
+
+                try:
+                    record = future.result()
+                except (requests.exceptions.RequestException, OSError):
+                    record = None
+
+                if record is None:
+                    print(f"{utils.warningred('The following Metadata could not be backup : ') + uuid}")
+                    manifest["failed"].append(uuid)
+                else:
+                    manifest["records"][uuid] = {"file": f"{uuid}.zip", **record}
+
+                print(f"Backup metadata : {round((count / len(futures)) * 100, 1)}%", end="\r")
+
+    finally:
+        if zip_archive is not None:
+            zip_archive.close()
+
+        with open(os.path.join(backup_dir, MANIFEST), "w", encoding="utf-8") as f:
+            json.dump(manifest, f, indent=2)
+
+    print(f"Backup metadata : {utils.okgreen('Done')}")
+    print(f"Backup available at : {backup_dir}")
+
+    return manifest
+
+
+def verify_backup(backup_dir: str) -> dict:
+    """
+    Verify the MEF of a backup against the sizes and checksums of its manifest.
+    Returns a dictionnary {uuid: True/False}, False if the MEF is missing or corrupted.
+    """
+
+    with open(os.path.join(backup_dir, MANIFEST), "r", encoding="utf-8") as f:
+        manifest = json.load(f)
+
+    zip_archive = ZipFile(os.path.join(backup_dir, manifest["archive"])) if manifest["archive"] else None
+
+    results = dict()
+
+    try:
+        for uuid, record in manifest["records"].items():
+
+            sha256 = hashlib.sha256()
+            size = 0
+
+            try:
+                if zip_archive is not None:
+                    f = zip_archive.open(record["file"])
+                else:
+                    f = open(os.path.join(backup_dir, record["file"]), "rb")
+            except (KeyError, OSError):
+                results[uuid] = False
+                continue
+
+            with f:
+                for chunk in iter(lambda: f.read(CHUNK_SIZE), b""):
+                    sha256.update(chunk)
+                    size += len(chunk)
+
+            results[uuid] = size == record["size"] and sha256.hexdigest() == record["sha256"]
+
+    finally:
+        if zip_archive is not None:
+            zip_archive.close()
+
+    return results
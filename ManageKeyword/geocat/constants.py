@@ -20,6 +20,13 @@ ENV = {
     'prod': 'https://www.geocat.ch',
 }
 
+# Root element of the XML of each kind of reusable object (subtemplate)
+RO_ROOT = {
+    'contact': '<che:CHE_CI_ResponsibleParty',
+    'extent': '<gmd:EX_Extent',
+    'format': '<gmd:MD_Format',
+}
+
 PROXY = [
     {
         "http": "proxy-bvcol.admin.ch:8080",
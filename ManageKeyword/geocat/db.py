@@ -0,0 +1,84 @@
+import os
+import getpass
+import weakref
+from uuid import uuid4
+from contextlib import contextmanager
+from dotenv import load_dotenv
+from psycopg2.pool import ThreadedConnectionPool
+
+HOST = "database-lb.geocat.swisstopo.cloud"
+ITERSIZE = 2000
+
+
+class GeocatDB():
+    """
+    Access to the geocat database through a pool of connections, shared between threads.
+
+    The credentials are read from the .env file of the package (DB_USERNAME, DB_PASSWORD),
+    asked otherwise. Queries are always parameterised, the parameters are passed to psycopg2
+    and never formatted in the SQL string.
+
+    Parameters :
+        database -> str, name of the database (geocat-int, geocat-prod)
+        minconn -> int (default = 1), number of connections opened at start
+        maxconn -> int (default = 8), maximum number of connections
+    """
+
+    def __init__(self, database: str, minconn: int = 1, maxconn: int = 8):
+
+        # Access database credentials from .env variable if exist
+        env_path = os.path.join(os.path.dirname(__file__), '.env')
+        load_dotenv(dotenv_path=env_path)
+
+        db_username = os.getenv('DB_USERNAME')
+        db_password = os.getenv('DB_PASSWORD')
+
+        if db_username is None or db_password is None:
+            db_username = getpass.getpass("Geocat Database Username : ")
+            db_password = getpass.getpass("Geocat Database Password : ")
+
+        self.__pool = ThreadedConnectionPool(minconn, maxconn, host=HOST, database=database,
+                                             user=db_username, password=db_password)
+
+        # Connections are closed when the object is garbage collected or at exit
+        self.__finalizer = weakref.finalize(self, self.__pool.closeall)
+
+    @contextmanager
+    def connection(self):
+        """
+        Context manager giving a connection of the pool, within a transaction.
+        The transaction is committed (rolled back on error) and the connection returned to the pool.
+        """
+
+        connection = self.__pool.getconn()
+
+        try:
+            with connection:
+                yield connection
+        finally:
+            self.__pool.putconn(connection)
+
+    def stream(self, query: str, params: tuple = None, itersize: int = ITERSIZE):
+        """
+        Generator of the rows of a query, streamed from a server-side (named) cursor.
+        Rows are transferred by batch of itersize, the result is never fully loaded in memory.
+        """
+
+        with self.connection() as connection:
+            with connection.cursor(name=f"geocat_{uuid4().hex}") as cursor:
+                cursor.itersize = itersize
+                cursor.execute(query, params)
+
+                yield from cursor
+
+    def fetchone(self, query: str, params: tuple = None) -> tuple:
+        """Returns the first row of a query, None if no row"""
+
+        with self.connection() as connection:
+            with connection.cursor() as cursor:
+                cursor.execute(query, params)
+                return cursor.fetchone()
+
+    def close(self):
+        """Close all connections of the pool"""
+        self.__finalizer()
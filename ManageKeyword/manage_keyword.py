@@ -1,9 +1,15 @@
+import os
+import sys
 from datetime import datetime
 import requests
 from lxml import etree as ET
 from geocat.geocat import GeocatAPI
 from geocat import constants, utils
 
+# Progress journal shared with the other tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ClassLibrary"))
+from geocatJournal import ProgressJournal
+
 XML = "<gmd:descriptiveKeywords xmlns:gmd='http://www.isotc211.org/2005/gmd' "\
     "xmlns:xlink='http://www.w3.org/1999/xlink' " \
     "xlink:href='local://srv/api/registries/vocabularies/keyword?" \
@@ -142,7 +148,7 @@ class ManageKeyword:
         return keyword_id
 
     def add_keyword(self, uuids: list, keyword_id: str, thesaurus_id: str,
-                    backup: bool = True) -> None:
+                    backup: bool = True, journal: str = None) -> None:
         """
         Add a keyword to a list of metadata.
 
@@ -151,8 +157,18 @@ class ManageKeyword:
             keyword_id : the ID of the keyword to add
             thesaurus_id : the thesaurus ID where the keyword comes from
             backup : True or False. If True, backup all metadata before changes are made
+            journal : path of a progress journal file. If given, the metadata already processed
+                      by a previous run with the same journal are skipped
         """
 
+        step = f"add_keyword:{keyword_id}"
+
+        if journal is not None:
+            journal = ProgressJournal(journal)
+            todo = [uuid for uuid in uuids if not journal.isDone(uuid, step)]
+            print(f"Keyword already added in a previous run: {utils.okgreen(len(uuids) - len(todo))}")
+            uuids = todo
+
         if backup is True:
             self.api.backup_metadata(uuids)
 
@@ -183,6 +199,8 @@ class ManageKeyword:
             if self.__keyword_check(metadata=metadata, keyword_id=keyword_id):
                 logger.info(f"{count}/{len(uuids)} - {uuid} - Keyword already exists")
                 already_existing += 1
+                if journal is not None:
+                    journal.markDone(uuid, step)
                 continue
 
             if self.__thesaurus_check(metadata=metadata, thesaurus_id=thesaurus_id):
@@ -238,16 +256,22 @@ class ManageKeyword:
             if utils.process_ok(response):
                 logger.info(f"{count}/{len(uuids)} - {uuid} - Keyword successfuly added")
                 successful += 1
+                if journal is not None:
+                    journal.markDone(uuid, step)
             else:
                 logger.error(f"{count}/{len(uuids)} - {uuid} - Keyword unsuccessfuly added")
                 unsuccessful += 1
 
+        if journal is not None:
+            journal.flush()
+
         print(f"Add Keyword : {utils.okgreen('Done')}")
         print(f"Keyword successfuly added: {utils.okgreen(successful)}")
         print(f"Keyword already existing: {utils.okgreen(already_existing)}")
         print(f"Keyword unsuccessfuly added: {utils.warningred(unsuccessful)}")
 
-    def delete_keyword(self, uuids: list, keyword_id: str, backup: bool = True) -> None:
+    def delete_keyword(self, uuids: list, keyword_id: str, backup: bool = True,
+                       journal: str = None) -> None:
         """
         Delete a keyword from a list of metadata.
 
@@ -255,8 +279,18 @@ class ManageKeyword:
             uuids : a list of metadata uuid
             keyword_id : the ID of the keyword to delete
             backup : True or False. If True, backup all metadata before changes are made
+            journal : path of a progress journal file. If given, the metadata already processed
+                      by a previous run with the same journal are skipped
         """
 
+        step = f"delete_keyword:{keyword_id}"
+
+        if journal is not None:
+            journal = ProgressJournal(journal)
+            todo = [uuid for uuid in uuids if not journal.isDone(uuid, step)]
+            print(f"Keyword already deleted in a previous run: {utils.okgreen(len(uuids) - len(todo))}")
+            uuids = todo
+
         if backup is True:
             self.api.backup_metadata(uuids)
 
@@ -287,6 +321,8 @@ class ManageKeyword:
             if not self.__keyword_check(metadata=metadata, keyword_id=keyword_id):
                 logger.info(f"{count}/{len(uuids)} - {uuid} - Keyword doesn't exist")
                 not_existing += 1
+                if journal is not None:
+                    journal.markDone(uuid, step)
                 continue
 
             xpath = self.__keyword_check(metadata, keyword_id)
@@ -314,10 +350,15 @@ class ManageKeyword:
             if utils.process_ok(response):
                 logger.info(f"{count}/{len(uuids)} - {uuid} - Keyword successfuly deleted")
                 successful += 1
+                if journal is not None:
+                    journal.markDone(uuid, step)
             else:
                 logger.error(f"{count}/{len(uuids)} - {uuid} - Keyword unsuccessfuly deleted")
                 unsuccessful += 1
 
+        if journal is not None:
+            journal.flush()
+
         print(f"Delete Keyword : {utils.okgreen('Done')}")
         print(f"Keyword successfuly deleted: {utils.okgreen(successful)}")
         print(f"Keyword not existing: {utils.okgreen(not_existing)}")
@@ -1,17 +1,18 @@
 import getpass
-import os
 import sys
 import xml.etree.ElementTree as ET
 import json
 from datetime import datetime
 from zipfile import ZipFile
 import io
+from concurrent.futures import ThreadPoolExecutor
 import requests
 import urllib3
-from dotenv import load_dotenv
 import psycopg2
 from . import constants
 from . import utils
+from . import backup
+from .db import GeocatDB
 
 class GeocatAPI():
     """
@@ -34,6 +35,8 @@ class GeocatAPI():
         self.__password = getpass.getpass("Geocat Password : ")
         self.session = self.__get_token()
 
+        self.__db = None
+
     def __get_token(self) -> object:
         """Function to get the token and test which proxy is needed"""
         session = requests.Session()
@@ -68,29 +71,14 @@ class GeocatAPI():
 
         return session
 
-    def __db_connect(self) -> object:
-        """Connect to geocat DB and returns a psycopg2 connection object"""
-
-        # Access database credentials from .env variable if exist
-        env_path = os.path.join(os.path.dirname(__file__), '.env')
-        load_dotenv(dotenv_path=env_path)
-
-        db_username = os.getenv('DB_USERNAME')
-        db_password = os.getenv('DB_PASSWORD')
-
-        if db_username is None or db_password is None:
-            db_username = getpass.getpass("Geocat Database Username : ")
-            db_password = getpass.getpass("Geocat Database Password : ")
+    def __get_db(self) -> GeocatDB:
+        """Returns the pool of connections to geocat DB, created at first use"""
 
-        _env = [k for k, v in constants.ENV.items() if v == self.env][0]
+        if self.__db is None:
+            _env = [k for k, v in constants.ENV.items() if v == self.env][0]
+            self.__db = GeocatDB(database=f"geocat-{_env}")
 
-        connection = psycopg2.connect(
-                host="database-lb.geocat.swisstopo.cloud",
-                database=f"geocat-{_env}",
-                user=db_username,
-                password=db_password)
-
-        return connection
+        return self.__db
 
     def check_admin(self) -> bool:
         """
@@ -103,180 +91,140 @@ class GeocatAPI():
 
         return False
 
-    def get_uuids_all(self, valid_only: bool = False, published_only: bool = False,
-                      with_templates: bool = False) -> list:
+    def __get_uuids_page(self, parameters: dict, start: int) -> list:
         """
-        Get a list of metadata uuid of all records.
-        You can specify if you want only the valid and/or published records and the templates.
+        Get the metadata uuid of one page of the search service, starting at the given index.
         """
 
         headers = {"accept": "application/xml", "Content-Type": "application/xml"}
 
-        uuids = []
-        start = 1
-
-        while True:
-
-            facetq = str()
-
-            if valid_only:
-                facetq += "&isValid/1"
-            if published_only:
-                facetq += "&isPublishedToAll/y"
-
-            parameters = {
-                "from": start,
-            }
+        response = self.session.get(url=self.env + "/geonetwork/srv/fre/q", headers=headers,
+                                    params={**parameters, "from": start})
 
-            if len(facetq) > 0:
-                parameters["facet.q"] = facetq[1:]
+        xmlroot = ET.fromstring(response.content)
 
-            if with_templates:
-                parameters["_isTemplate"] = "y or n"
+        return [metadata.find("*/uuid").text for metadata in xmlroot.findall("metadata")]
 
-            response = self.session.get(url=self.env + "/geonetwork/srv/fre/q", headers=headers, params=parameters)
-
-            xmlroot = ET.fromstring(response.content)
-            metadatas = xmlroot.findall("metadata")
-
-            if len(metadatas) == 0:
-                break
-
-            for metadata in metadatas:
-                if metadata.find("*/uuid").text not in uuids:
-                    uuids.append(metadata.find("*/uuid").text)
-
-            start += 1499
-
-        return uuids
-
-    def get_uuids_by_group(self, group_id: str, valid_only: bool = False,
-                    published_only: bool = False, with_templates: bool = False) -> list:
+    def iter_uuids(self, parameters: dict = None, prefetch: bool = True) -> iter:
         """
-        Get a list of metadata uuid belonging to a given group.
-        You can specify if you want only the valid and/or published records and the templates.
+        Generator yielding the metadata uuid matching the parameters of the search service, page by page.
+        Each uuid is yielded only once.
+        If prefetch is True, the next page is requested while the current page is being consumed.
         """
 
-        headers = {"accept": "application/xml", "Content-Type": "application/xml"}
+        parameters = dict() if parameters is None else parameters
 
-        uuids = []
+        seen = set()
         start = 1
 
-        while True:
-
-            facetq = str()
+        with ThreadPoolExecutor(max_workers=1) as executor:
 
-            if valid_only:
-                facetq += "&isValid/1"
-            if published_only:
-                facetq += "&isPublishedToAll/y"
+            page = executor.submit(self.__get_uuids_page, parameters, start)
 
-            parameters = {
-                "_groupOwner": group_id,
-                "from": start,
-            }
+            while True:
 
-            if len(facetq) > 0:
-                parameters["facet.q"] = facetq[1:]
+                uuids = page.result()
 
-            if with_templates:
-                parameters["_isTemplate"] = "y or n"
+                if len(uuids) == 0:
+                    break
 
-            response = self.session.get(url=self.env + "/geonetwork/srv/fre/q", headers=headers, params=parameters)
+                start += 1499
 
-            xmlroot = ET.fromstring(response.content)
-            metadatas = xmlroot.findall("metadata")
+                if prefetch:
+                    page = executor.submit(self.__get_uuids_page, parameters, start)
 
-            if len(metadatas) == 0:
-                break
+                for uuid in uuids:
+                    if uuid not in seen:
+                        seen.add(uuid)
+                        yield uuid
 
-            for metadata in metadatas:
-                if metadata.find("*/uuid").text not in uuids:
-                    uuids.append(metadata.find("*/uuid").text)
+                if not prefetch:
+                    page = executor.submit(self.__get_uuids_page, parameters, start)
 
-            start += 1499
-
-        return uuids
-
-    def get_uuids_harvested(self) -> list:
+    @staticmethod
+    def __uuids_parameters(valid_only: bool = False, published_only: bool = False,
+                           with_templates: bool = False, facets: list = None) -> dict:
         """
-        Get a list of metadata uuid of all harvested records (no templates).
+        Build the parameters of the search service from the uuids filters.
         """
 
-        headers = {"accept": "application/xml", "Content-Type": "application/xml"}
+        facets = list() if facets is None else list(facets)
 
-        uuid = []
-        start = 1
+        if valid_only:
+            facets.append("isValid/1")
+        if published_only:
+            facets.append("isPublishedToAll/y")
 
-        while True:
-            parameters = {
-                "facet.q": "isHarvested/y",
-                "from": start,
-            }
+        parameters = dict()
 
-            response = self.session.get(url=self.env + "/geonetwork/srv/fre/q", headers=headers, params=parameters)
+        if len(facets) > 0:
+            parameters["facet.q"] = "&".join(facets)
 
-            xmlroot = ET.fromstring(response.content)
-            metadatas = xmlroot.findall("metadata")
+        if with_templates:
+            parameters["_isTemplate"] = "y or n"
 
-            if len(metadatas) == 0:
-                break
+        return parameters
 
-            for metadata in metadatas:
-                if metadata.find("*/uuid").text not in uuid:
-                    uuid.append(metadata.find("*/uuid").text)
+    def __uuids_output(self, parameters: dict, output: str) -> object:
+        """
+        Return the uuids matching the parameters as a list, a set or an iterator.
+        """
 
-            start += 1499
+        if output == "list":
+            return list(self.iter_uuids(parameters))
+        if output == "set":
+            return set(self.iter_uuids(parameters))
+        if output == "iter":
+            return self.iter_uuids(parameters)
 
-        return uuid
+        raise ValueError("output must be 'list', 'set' or 'iter'")
 
-    def get_uuids_notharvested(self, valid_only: bool = False, published_only: bool = False,
-                      with_templates: bool = False) -> list:
+    def get_uuids_all(self, valid_only: bool = False, published_only: bool = False,
+                      with_templates: bool = False, output: str = "list") -> object:
         """
-        Get a list of metadata uuid of all non harvested records.
+        Get a list of metadata uuid of all records.
         You can specify if you want only the valid and/or published records and the templates.
+        output can be set to "set" or "iter" to get a set or an iterator instead of a list.
         """
 
-        headers = {"accept": "application/xml", "Content-Type": "application/xml"}
+        parameters = self.__uuids_parameters(valid_only, published_only, with_templates)
 
-        uuids = []
-        start = 1
-
-        while True:
-
-            facetq = str()
+        return self.__uuids_output(parameters, output)
 
-            if valid_only:
-                facetq += "&isValid/1"
-            if published_only:
-                facetq += "&isPublishedToAll/y"
+    def get_uuids_by_group(self, group_id: str, valid_only: bool = False,
+                    published_only: bool = False, with_templates: bool = False, output: str = "list") -> object:
+        """
+        Get a list of metadata uuid belonging to a given group.
+        You can specify if you want only the valid and/or published records and the templates.
+        output can be set to "set" or "iter" to get a set or an iterator instead of a list.
+        """
 
-            parameters = {
-                "facet.q": "isHarvested/n",
-                "from": start,
-            }
+        parameters = self.__uuids_parameters(valid_only, published_only, with_templates)
+        parameters["_groupOwner"] = group_id
 
-            if len(facetq) > 0:
-                parameters["facet.q"] = facetq[1:]
+        return self.__uuids_output(parameters, output)
 
-            if with_templates:
-                parameters["_isTemplate"] = "y or n"
+    def get_uuids_harvested(self, output: str = "list") -> object:
+        """
+        Get a list of metadata uuid of all harvested records (no templates).
+        output can be set to "set" or "iter" to get a set or an iterator instead of a list.
+        """
 
-            response = self.session.get(url=self.env + "/geonetwork/srv/fre/q", headers=headers, params=parameters)
+        parameters = self.__uuids_parameters(facets=["isHarvested/y"])
 
-            xmlroot = ET.fromstring(response.content)
-            metadatas = xmlroot.findall("metadata")
+        return self.__uuids_output(parameters, output)
 
-            if len(metadatas) == 0:
-                break
-
-            for metadata in metadatas:
-                if metadata.find("*/uuid").text not in uuids:
-                    uuids.append(metadata.find("*/uuid").text)
+    def get_uuids_notharvested(self, valid_only: bool = False, published_only: bool = False,
+                      with_templates: bool = False, output: str = "list") -> object:
+        """
+        Get a list of metadata uuid of all non harvested records.
+        You can specify if you want only the valid and/or published records and the templates.
+        output can be set to "set" or "iter" to get a set or an iterator instead of a list.
+        """
 
-            start += 1499
+        parameters = self.__uuids_parameters(valid_only, published_only, with_templates, facets=["isHarvested/n"])
 
-        return uuids
+        return self.__uuids_output(parameters, output)
 
     def get_ro_uuids(self, valid_only: bool = False, published_only: bool = False) -> dict:
         """
@@ -289,56 +237,63 @@ class GeocatAPI():
             print(utils.warningred("You need to be admin to use this method"))
             return
 
-        uuids_contact = list()
-        uuids_extent = list()
-        uuids_format = list()
+        uuids = {kind: list() for kind in constants.RO_ROOT}
+
+        query = "SELECT uuid, left(data, 40) FROM public.metadata WHERE istemplate='s'"
 
+        if valid_only:
+            query += " AND id IN (SELECT metadataid FROM public.validation WHERE status=1 AND required=true)"
+        if published_only:
+            query += " AND id IN (SELECT metadataid FROM public.operationallowed WHERE groupid=1 AND operationid=0)"
+
+        # Only the beginning of the XML is transferred, enough to know the kind of RO
         try:
-            connection = self.__db_connect()
-
-            with connection.cursor() as cursor:
-
-                if valid_only and not published_only:
-                    cursor.execute("SELECT UUID,data FROM public.metadata WHERE istemplate='s'" \
-                    "AND id IN (SELECT metadataid FROM public.validation WHERE status=1 AND required=true)")
-
-                elif published_only and not valid_only:
-                    cursor.execute("SELECT UUID,data FROM public.metadata WHERE istemplate='s'" \
-                    "AND id IN (SELECT metadataid FROM public.operationallowed WHERE groupid=1 AND operationid=0)")
-                elif valid_only and published_only:
-                    cursor.execute("SELECT UUID,data FROM public.metadata WHERE istemplate='s'" \
-                    "AND id IN (SELECT metadataid FROM public.validation WHERE status=1 AND required=true)" \
-                    "AND id IN (SELECT metadataid FROM public.operationallowed WHERE groupid=1 AND operationid=0)")
-                else:
-                    cursor.execute("SELECT UUID,data FROM public.metadata WHERE istemplate='s'")
-
-                for row in cursor:
-                    if row[1].startswith("<che:CHE_CI_ResponsibleParty"):
-                        uuids_contact.append(row[0])
-                    elif row[1].startswith("<gmd:EX_Extent"):
-                        uuids_extent.append(row[0])
-                    elif row[1].startswith("<gmd:MD_Format"):
-                        uuids_format.append(row[0])
+            for uuid, head in self.__get_db().stream(query):
+                for kind, root in constants.RO_ROOT.items():
+                    if head.startswith(root):
+                        uuids[kind].append(uuid)
+                        break
 
         except (Exception, psycopg2.Error) as error:
             print("Error while fetching data from PostgreSQL", error)
 
         else:
-            return {
-                "contact": uuids_contact,
-                "extent": uuids_extent,
-                "format": uuids_format,
-            }
+            return uuids
+
+    def __get_metadata_from_xml(self, uuid: str) -> bytes:
+        """
+        Get metadata XML directly from the xml formatter. No zip to build and extract.
+        Returns None if the metadata could not be fetched.
+        """
 
-        finally:
-            if connection:
-                connection.close()
+        headers = {"accept": "application/xml"}
+        parameters = {"increasePopularity": "false", "addSchemaLocation": "true"}
 
-    def get_metadata_from_mef(self, uuid: str) -> bytes:
+        try:
+            response = self.session.get(url=self.env + f"/geonetwork/srv/api/0.1/records/{uuid}/formatters/xml",
+                                        headers=headers, params=parameters)
+        except requests.exceptions.RequestException:
+            return None
+
+        if response.status_code != 200 or not response.content.lstrip().startswith(b"<"):
+            return None
+
+        return response.content
+
+    def get_metadata_from_mef(self, uuid: str, direct: bool = False) -> bytes:
         """
         Get metadata XML from MEF (metadata exchange format).
+
+        If direct is True, the XML is fetched directly from the xml formatter, which is faster (no zip).
+        The MEF is only used as fallback. Caution : the xml formatter resolves the reusable objects,
+        their xlink:href attributes are not returned. Don't use it when the xlinks are needed.
         """
 
+        if direct:
+            metadata = self.__get_metadata_from_xml(uuid)
+            if metadata is not None:
+                return metadata
+
         headers = {"accept": "application/x-gn-mef-2-zip"}
 
         proxy_error = True
@@ -383,53 +338,21 @@ class GeocatAPI():
 
         return languages
 
-    def backup_metadata(self, uuids: list):
+    def backup_metadata(self, uuids: list, workers: int = 8, archive: bool = False) -> str:
         """
         Backup list of metadata as MEF zip file.
+        The MEF are downloaded with a pool of workers and streamed to disk. If archive is True, they are
+        gathered in a single archive instead of one file per metadata. A manifest with the size and
+        checksum of each MEF is written along, see backup.verify_backup.
+        Returns the backup directory.
         """
 
-        if sys.platform == "win32":
-
-            if not os.path.isdir(f"C:/Users/{os.getlogin()}/AppData/Local/geocat"):
-                os.mkdir(f"C:/Users/{os.getlogin()}/AppData/Local/geocat")
-
-            backup_dir = f"C:/Users/{os.getlogin()}/AppData/Local/geocat/MetadataBackup_{datetime.now().strftime('%Y%m%d-%H%M%S')}"
-            os.mkdir(backup_dir)
-
-        else:
-            print(utils.warningred("You are not on windows ! Directory to backup metadata not found !"))
-            return None
-
-        headers = {"accept": "application/x-gn-mef-2-zip"}
-
-        print("Backup metadata : ", end="\r")
-
-        count = 1
-        for uuid in uuids:
-
-            proxy_error = True
-            while proxy_error:
-                try:
-                    response = self.session.get(url=self.env + f"/geonetwork/srv/api/0.1/records/{uuid}/formatters/zip",
-                                                headers=headers)
-                except requests.exceptions.ProxyError:
-                    print("Proxy Error Occured, retry connection")
-                else:
-                    proxy_error = False
-
-            if response.status_code != 200:
-                print(f"{utils.warningred('The following Metadata could not be backup : ') + uuid}")
-                continue
-
-            with open(os.path.join(backup_dir, f"{uuid}.zip"), "wb") as f:
-                f.write(response.content)
+        backup_dir = utils.create_backup_dir(f"MetadataBackup_{datetime.now().strftime('%Y%m%d-%H%M%S')}")
 
-            print(f"Backup metadata : {round((count / len(uuids)) * 100, 1)}%", end="\r")
+        backup.backup_metadata(session=self.session, env=self.env, uuids=uuids, backup_dir=backup_dir,
+                               workers=workers, archive=archive)
 
-            count += 1
-
-        print(f"Backup metadata : {utils.okgreen('Done')}")
-        print(f"Backup available at : {backup_dir}")
+        return backup_dir
 
     def edit_metadata(self, uuid: str, body: list, updateDateStamp: str ='false') -> object:
         """
@@ -455,4 +378,47 @@ class GeocatAPI():
         response = self.session.put(self.env + "/geonetwork/srv/api/0.1/records/batchediting",
                                     params=params, headers=headers, data=body)
 
-        return response
\ No newline at end of file
+        return response
+
+    def edit_metadata_bulk(self, edits: dict, updateDateStamp: str = 'false', chunk_size: int = 100) -> dict:
+        """
+        Edit many metadata with as few batchediting requests as possible.
+        The metadata sharing the same edits (same xpath and value) are sent together, by chunks of chunk_size uuids.
+
+        Args:
+            edits : {uuid: body, ...} with body as expected by edit_metadata
+            updateDateStamp : 'true' or 'false', default = 'false'.
+            chunk_size : maximum number of uuids per request
+
+        Returns:
+            A dictionnary {uuid: {"success": True/False, "message": str}}
+        """
+        headers = {"accept": "application/json", "Content-Type": "application/json"}
+
+        # Group the metadata by identical body
+        groups = dict()
+        for uuid, body in edits.items():
+            groups.setdefault(json.dumps(body, sort_keys=True), list()).append(uuid)
+
+        results = dict()
+
+        for body, uuids in groups.items():
+            for i in range(0, len(uuids), chunk_size):
+
+                chunk = uuids[i:i + chunk_size]
+
+                params = {
+                    "uuids": chunk,
+                    "updateDateStamp": updateDateStamp,
+                }
+
+                try:
+                    response = self.session.put(self.env + "/geonetwork/srv/api/0.1/records/batchediting",
+                                                params=params, headers=headers, data=body)
+                except requests.exceptions.RequestException as error:
+                    results.update({uuid: {"success": False, "message": str(error)} for uuid in chunk})
+                    continue
+
+                results.update(utils.process_bulk(response, chunk))
+
+        return results
@@ -62,6 +62,42 @@ def warningred(text):
     return f"\033[91m{text}\033[00m"
 
 
+def get_geocat_dir(name: str = None) -> str:
+    """Returns the geocat local folder, or a sub directory of it. Created if it doesn't exist.
+
+    On windows : C:/Users/{login}/AppData/Local/geocat, otherwise ~/.cache/geocat
+
+    Args:
+        name: optional, the name of the sub directory
+
+    Returns:
+        The path of the directory
+    """
+    if sys.platform == "win32":
+        geocat_dir = f"C:/Users/{os.getlogin()}/AppData/Local/geocat"
+    else:
+        geocat_dir = os.path.join(os.path.expanduser("~"), ".cache", "geocat")
+
+    if name is not None:
+        geocat_dir = os.path.join(geocat_dir, name)
+
+    os.makedirs(geocat_dir, exist_ok=True)
+
+    return geocat_dir
+
+
+def create_backup_dir(name: str) -> str:
+    """Create a backup directory in the geocat local folder
+
+    Args:
+        name: required, the name of the backup directory
+
+    Returns:
+        The path of the backup directory
+    """
+    return get_geocat_dir(name)
+
+
 def process_ok(response):
     """
     Process the response of the geocat API requests.
@@ -87,4 +123,48 @@ def process_ok(response):
         else:
             return False
     else:
-        return False
\ No newline at end of file
+        return False
+
+
+def process_bulk(response, uuids: list) -> dict:
+    """
+    Process the response of a batchediting request sent for many metadata.
+
+    The records are matched with the metadataErrors and metadataInfos of the response.
+    A record is successful if it has an info and no error. Records without info were not
+    processed (not found, not editable or unchanged).
+
+    Args:
+        response:
+            object, required, the response object of the API request
+        uuids:
+            list, required, the uuids sent in the request
+
+    Returns:
+        dict: {uuid: {"success": True/False, "message": str}}
+    """
+    if response.status_code != 201:
+        return {uuid: {"success": False, "message": f"HTTP {response.status_code}"} for uuid in uuids}
+
+    r_json = json.loads(response.text)
+
+    errors = dict()
+    for reports in r_json.get("metadataErrors", dict()).values():
+        for report in reports:
+            errors.setdefault(report.get("uuid"), report.get("message", ""))
+
+    infos = dict()
+    for reports in r_json.get("metadataInfos", dict()).values():
+        for report in reports:
+            infos.setdefault(report.get("uuid"), report.get("message", ""))
+
+    results = dict()
+    for uuid in uuids:
+        if uuid in errors:
+            results[uuid] = {"success": False, "message": errors[uuid]}
+        elif uuid in infos:
+            results[uuid] = {"success": True, "message": infos[uuid]}
+        else:
+            results[uuid] = {"success": False, "message": "Not processed (not found, not editable or unchanged)"}
+
+    return results
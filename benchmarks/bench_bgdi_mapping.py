@@ -0,0 +1,178 @@
+"""
+Benchmark of the BGDI mapping (bgdi-geocat-mapping BGDIMapping)
+
+Compares, on a mapping exported from BGDIMapping (mapping.mapping.to_csv), the former row-wise
+building of the mapping (one pd.concat per record) and checks (iterrows) with the current
+mapping indexed by geocat UUID and vectorised checks. Only the building and the checks
+check_publish_status, check_keyword and check_status are measured. Their inputs (inventory,
+index, search results) are rebuilt from the exported mapping, so it runs offline.
+
+Usage : python bench_bgdi_mapping.py {mapping csv file}
+"""
+
+import os
+import sys
+import time
+import numpy as np
+import pandas as pd
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "bgdi-geocat-mapping"))
+from bgdi_mapping import BGDIMapping, MAPPING_COLUMNS, TechLayerNameInGDoc, GeocatIdInGDoc
+
+# Published status -> (isPublishedToAll, Layer on prod?)
+PUBLISHED = {
+    "Published": (True, 1),
+    "Unpublished": (False, 0),
+    "To unpublish": (True, np.nan),
+    "To publish": (False, 1),
+}
+
+
+class OfflineMapping(BGDIMapping):
+    """BGDIMapping with the inventory, index and search results given, without geocat"""
+
+    def __init__(self, inventory: pd.DataFrame, md_index: dict, searches: dict):
+        self.bgdi_inventory = inventory
+        self.md_index = md_index
+        self.searches = searches
+
+    def get_uuids(self, keywords: list = None, not_in_groups: list = None, q: str = None) -> list:
+        if q is not None:
+            return self.searches["obsolete"]
+        if not_in_groups is not None:
+            return self.searches["remove"]
+        return self.searches["keyword"]
+
+    def run(self) -> pd.DataFrame:
+        self.mapping = self.init_mapping()
+        self.check_publish_status()
+        self.check_keyword()
+        self.check_status()
+
+        return self.mapping
+
+
+class FormerMapping(OfflineMapping):
+    """Former row-wise building and checks"""
+
+    def init_mapping(self) -> pd.DataFrame:
+        mapping = pd.DataFrame(columns=MAPPING_COLUMNS)
+
+        for i, row in self.bgdi_inventory.reset_index().iterrows():
+            new_row = pd.DataFrame({"Geocat UUID": row.iloc[2], "Layer ID": row.iloc[1].strip()}, index=[0])
+            mapping = pd.concat([new_row, mapping.loc[:]]).reset_index(drop=True)
+
+        return mapping
+
+    def check_publish_status(self):
+        for i, row in self.bgdi_inventory.reset_index().iterrows():
+
+            index = self.mapping.index[self.mapping["Geocat UUID"] == row.iloc[2]].tolist()[0]
+
+            if self.md_index[row.iloc[2]]["isPublishedToAll"] and row["Layer on prod?"] in [1, 0]:
+                self.mapping.at[index, "Published"] = "Published"
+            elif not self.md_index[row.iloc[2]]["isPublishedToAll"] and row["Layer on prod?"] != 1:
+                self.mapping.at[index, "Published"] = "Unpublished"
+            elif self.md_index[row.iloc[2]]["isPublishedToAll"] and row["Layer on prod?"] not in [1, 0]:
+                self.mapping.at[index, "Published"] = "To unpublish"
+            elif not self.md_index[row.iloc[2]]["isPublishedToAll"] and row["Layer on prod?"] == 1:
+                self.mapping.at[index, "Published"] = "To publish"
+
+    def check_keyword(self):
+        uuids_keyword = self.get_uuids(keywords=[])
+
+        for i, row in self.mapping.iterrows():
+            if row.iloc[0] in uuids_keyword:
+                self.mapping.at[i, "Keyword"] = "Ok"
+            else:
+                self.mapping.at[i, "Keyword"] = "Add BGDI"
+
+        for uuid in self.get_uuids(keywords=[], not_in_groups=[]):
+            if uuid not in self.mapping["Geocat UUID"].unique():
+                new_row = pd.DataFrame({"Geocat UUID": uuid, "Keyword": "Remove BGDI"}, index=[0])
+                self.mapping = pd.concat([self.mapping, new_row]).reset_index(drop=True)
+
+        self.mapping = self.mapping[MAPPING_COLUMNS]
+
+    def check_status(self):
+        uuids_obsolete = self.get_uuids(q="+cl_status.key:obsolete")
+
+        for i, row in self.mapping.iterrows():
+            if row.iloc[0] in uuids_obsolete and row["Published"] in ["Unpublished", "To unpublish"]:
+                self.mapping.at[i, "Geocat Status"] = "Ok"
+            elif row.iloc[0] not in uuids_obsolete and row["Published"] in ["Published", "To publish"]:
+                self.mapping.at[i, "Geocat Status"] = "Ok"
+            elif row.iloc[0] in uuids_obsolete and row["Published"] in ["Published", "To publish"]:
+                self.mapping.at[i, "Geocat Status"] = "Remove obsolete"
+            elif row.iloc[0] not in uuids_obsolete and row["Published"] in ["Unpublished", "To unpublish"]:
+                self.mapping.at[i, "Geocat Status"] = "Add obsolete"
+
+
+def load_inputs(path: str) -> tuple:
+    """Rebuild the inventory, the index and the search results from an exported mapping"""
+
+    mapping = pd.read_csv(path)
+    bgdi = mapping[(mapping["Keyword"] != "Remove BGDI") & mapping["Published"].isin(list(PUBLISHED))]
+    bgdi = bgdi.drop_duplicates(subset="Geocat UUID")
+
+    inventory = pd.DataFrame({
+        TechLayerNameInGDoc: bgdi["Layer ID"].to_numpy(),
+        GeocatIdInGDoc: bgdi["Geocat UUID"].to_numpy(),
+        "Layer on prod?": [PUBLISHED[published][1] for published in bgdi["Published"]],
+    })
+
+    md_index = {uuid: {"isPublishedToAll": PUBLISHED[published][0], "_source": {}}
+                for uuid, published in zip(bgdi["Geocat UUID"], bgdi["Published"])}
+
+    unpublished = bgdi["Published"].isin(["Unpublished", "To unpublish"])
+    obsolete = ((bgdi["Geocat Status"] == "Ok") & unpublished) | (bgdi["Geocat Status"] == "Remove obsolete")
+
+    searches = {
+        "keyword": bgdi.loc[bgdi["Keyword"] == "Ok", "Geocat UUID"].tolist(),
+        "remove": mapping.loc[mapping["Keyword"] == "Remove BGDI", "Geocat UUID"].tolist(),
+        "obsolete": bgdi.loc[obsolete, "Geocat UUID"].tolist(),
+    }
+
+    return inventory, md_index, searches
+
+
+def run(mapping: OfflineMapping) -> dict:
+    """Build the mapping and run the checks"""
+
+    start = time.perf_counter()
+    result = mapping.run()
+
+    return {"duration": time.perf_counter() - start, "mapping": result}
+
+
+def main(path: str):
+
+    inventory, md_index, searches = load_inputs(path)
+
+    print(f"Benchmark on {len(inventory)} BGDI records, {len(searches['remove'])} records to remove")
+
+    results = {
+        "row-wise": run(FormerMapping(inventory, md_index, searches)),
+        "vectorised": run(OfflineMapping(inventory, md_index, searches)),
+    }
+
+    columns = ["Geocat UUID", "Layer ID", "Published", "Geocat Status", "Keyword"]
+
+    def rows(mapping: pd.DataFrame) -> list:
+        return list(mapping[columns].fillna("").astype(str).itertuples(index=False))
+
+    for name, result in results.items():
+        identical = rows(result["mapping"]) == rows(results["row-wise"]["mapping"])
+        print(f"{name:<10} : {result['duration']:.3f} s, same mapping as row-wise : {identical}")
+
+    speedup = results["row-wise"]["duration"] / results["vectorised"]["duration"]
+    print(f"vectorised speedup : {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit()
+
+    main(path=sys.argv[1])
@@ -0,0 +1,82 @@
+"""
+Benchmark of the bounding box computation of the admin boundaries extents (ManageAdminBoundaries)
+
+Compares, on every feature of a geojson file (e.g. the national boundaries) :
+
+    - GML (former) : parse the generated GML again, build lists of coordinates, then min/max
+    - GML (numpy) : UpdateSubtemplatesExtent._calculate_bbox_from_gml, posList parsed into numpy arrays
+    - coordinates : geometry_bbox on the geojson coordinates, no GML involved
+
+Usage : python bench_extent_bbox.py {geojson file}
+"""
+
+import os
+import sys
+import json
+import time
+import xml.etree.ElementTree as ET
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ManageAdminBoundaries"))
+from ManageAdminBoundaries import UpdateSubtemplatesExtent, geojson_to_geocatgml, geometry_bbox, feature_polygons
+
+NS = {
+    'gex': 'http://standards.iso.org/iso/19115/-3/gex/1.0',
+    'gml': 'http://www.opengis.net/gml/3.2',
+}
+
+
+def bbox_from_gml_lists(gml: str) -> dict:
+    """Former computation, parses the GML and builds lists of coordinates"""
+
+    all_coords = []
+    for poslist in ET.fromstring(gml).findall('.//gml:posList', NS):
+        coords = poslist.text.strip().split()
+        for i in range(0, len(coords), 2):
+            all_coords.append((float(coords[i]), float(coords[i+1])))
+
+    lons = [coord[0] for coord in all_coords]
+    lats = [coord[1] for coord in all_coords]
+
+    return {"west": min(lons), "east": max(lons), "south": min(lats), "north": max(lats)}
+
+
+def run(items: list, compute) -> dict:
+    """Compute the bbox of all items with the given function"""
+
+    start = time.perf_counter()
+    bboxes = [compute(item) for item in items]
+
+    return {"duration": time.perf_counter() - start, "bboxes": bboxes}
+
+
+def main(geojson: str):
+
+    with open(geojson, "rb") as file:
+        features = json.load(file)["features"]
+
+    # The GML are generated beforehand, only the bbox computation is measured
+    gmls = [geojson_to_geocatgml(feature) for feature in features]
+
+    print(f"Benchmark on {len(features)} features")
+
+    results = {
+        "GML (former)": run(gmls, bbox_from_gml_lists),
+        "GML (numpy)": run(gmls, lambda gml: UpdateSubtemplatesExtent._calculate_bbox_from_gml(None, gml, NS)),
+        "coordinates": run(features, lambda feature: geometry_bbox(feature_polygons(feature))),
+    }
+
+    for name, result in results.items():
+        identical = result["bboxes"] == results["GML (former)"]["bboxes"]
+        print(f"{name:<13} : {result['duration']:.3f} s, same bbox as former : {identical}")
+
+    speedup = results["GML (former)"]["duration"] / results["coordinates"]["duration"]
+    print(f"coordinates speedup : {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit()
+
+    main(geojson=sys.argv[1])
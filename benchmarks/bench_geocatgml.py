@@ -0,0 +1,98 @@
+"""
+Benchmark of the GML serialiser of the admin boundaries (ManageAdminBoundaries.geojson_to_geocatgml)
+
+Compares, on every feature of a geojson file (e.g. the national boundaries), the former serialiser
+concatenating the posList vertex by vertex with the current one formatting whole rings, with the
+coordinates as given and rounded to a precision.
+
+Usage : python bench_geocatgml.py {geojson file} {precision, default=7}
+"""
+
+import os
+import sys
+import json
+import time
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ManageAdminBoundaries"))
+from ManageAdminBoundaries import geojson_to_geocatgml
+
+
+def geojson_to_geocatgml_concat(geojson_feature: dict) -> str:
+    """Former serialiser, the posList is built by string concatenation vertex by vertex"""
+
+    gml_core = ""
+
+    if "coordinates" in geojson_feature["geometry"]:
+        exteriors = geojson_feature["geometry"]["coordinates"]
+    else:
+        exteriors = geojson_feature["geometry"]["geometries"][0]["coordinates"]
+
+    for exterior in exteriors:
+        gml_core += "<gml:surfaceMember><gml:Polygon><gml:exterior><gml:LinearRing><gml:posList>"
+
+        for coordinates in exterior[0]:
+            gml_core += f"{coordinates[0]} {coordinates[1]} "
+        gml_core = gml_core[:-1]
+
+        gml_core += "</gml:posList></gml:LinearRing></gml:exterior>"
+
+        for interior in exterior[1:]:
+            gml_core += "<gml:interior><gml:LinearRing><gml:posList>"
+
+            for coordinates in interior:
+                gml_core += f"{coordinates[0]} {coordinates[1]} "
+            gml_core = gml_core[:-1]
+
+            gml_core += "</gml:posList></gml:LinearRing></gml:interior>"
+
+        gml_core += "</gml:Polygon></gml:surfaceMember>"
+
+    return "<gml:MultiSurface>" + gml_core + "</gml:MultiSurface>"
+
+
+def run(features: list, serialise) -> dict:
+    """Serialise all features with the given function"""
+
+    size = 0
+    start = time.perf_counter()
+
+    for feature in features:
+        size += len(serialise(feature))
+
+    return {"duration": time.perf_counter() - start, "chars": size}
+
+
+def main(geojson: str, precision: int):
+
+    with open(geojson, "rb") as file:
+        features = json.load(file)["features"]
+
+    vertices = 0
+    for feature in features:
+        geometry = feature["geometry"]
+        polygons = geometry["coordinates"] if "coordinates" in geometry else geometry["geometries"][0]["coordinates"]
+        vertices += sum(len(ring) for polygon in polygons for ring in polygon)
+
+    print(f"Benchmark on {len(features)} features, {vertices} vertices")
+
+    results = {
+        "concatenation": run(features, geojson_to_geocatgml_concat),
+        "rings": run(features, geojson_to_geocatgml),
+        f"rings ({precision} decimals)": run(features, lambda feature: geojson_to_geocatgml(feature, precision)),
+    }
+
+    for name, result in results.items():
+        print(f"{name:<22} : {result['duration']:.2f} s, {result['chars'] / 1024 / 1024:.1f} MB of GML")
+
+    for name in ["rings", f"rings ({precision} decimals)"]:
+        speedup = results["concatenation"]["duration"] / results[name]["duration"]
+        print(f"{name} speedup : {speedup:.2f}x")
+
+
+if __name__ == "__main__":
+
+    if len(sys.argv) < 2:
+        print(__doc__)
+        sys.exit()
+
+    main(geojson=sys.argv[1], precision=int(sys.argv[2]) if len(sys.argv) > 2 else 7)
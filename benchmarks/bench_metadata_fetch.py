@@ -0,0 +1,102 @@
+"""
+Micro-benchmark of the two ways of fetching a metadata XML with GeocatAPI.get_metadata_from_mef
+
+    - MEF : /records/{uuid}/formatters/zip, then extract metadata.xml from the zip
+    - direct : /records/{uuid}/formatters/xml (direct=True)
+
+For each path, measures the time to get the XML and parse it with lxml, and the bytes on the wire.
+
+Usage : python bench_metadata_fetch.py {number of records, default=50} {-prod}
+"""
+
+import io
+import os
+import sys
+import time
+from zipfile import ZipFile
+from lxml import etree as ET
+
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ManageKeyword"))
+from geocat.geocat import GeocatAPI
+from geocat import utils
+
+
+def fetch_mef(api: GeocatAPI, uuid: str) -> tuple:
+    """Returns the XML from the MEF and the number of bytes downloaded"""
+
+    response = api.session.get(url=api.env + f"/geonetwork/srv/api/0.1/records/{uuid}/formatters/zip",
+                               headers={"accept": "application/x-gn-mef-2-zip"})
+
+    with ZipFile(io.BytesIO(response.content)) as zip:
+        metadata = zip.open(f"{uuid}/metadata/metadata.xml").read()
+
+    return metadata, len(response.content)
+
+
+def fetch_direct(api: GeocatAPI, uuid: str) -> tuple:
+    """Returns the XML from the xml formatter and the number of bytes downloaded"""
+
+    response = api.session.get(url=api.env + f"/geonetwork/srv/api/0.1/records/{uuid}/formatters/xml",
+                               headers={"accept": "application/xml"},
+                               params={"increasePopularity": "false", "addSchemaLocation": "true"})
+
+    return response.content, len(response.content)
+
+
+def run(api: GeocatAPI, uuids: list, fetch) -> dict:
+    """Fetch and parse all metadata with the given function"""
+
+    downloaded = 0
+    start = time.perf_counter()
+
+    for uuid in uuids:
+        metadata, size = fetch(api, uuid)
+        ET.fromstring(metadata)
+        downloaded += size
+
+    duration = time.perf_counter() - start
+
+    return {"duration": duration, "per_record": duration / len(uuids), "bytes": downloaded}
+
+
+def main(number: int, env: str):
+
+    api = GeocatAPI(env=env)
+
+    uuids = list()
+    for uuid in api.get_uuids_all(published_only=True, output="iter"):
+        uuids.append(uuid)
+        if len(uuids) == number:
+            break
+
+    print(f"Benchmark on {len(uuids)} metadata")
+
+    # Warm-up, so the first connection setup is not measured
+    fetch_mef(api, uuids[0])
+    fetch_direct(api, uuids[0])
+
+    results = {
+        "MEF (zip)": run(api, uuids, fetch_mef),
+        "direct (xml)": run(api, uuids, fetch_direct),
+    }
+
+    for name, result in results.items():
+        print(f"{name:<15} : {result['duration']:.2f} s, {result['per_record'] * 1000:.0f} ms/record, "
+              f"{result['bytes'] / 1024:.0f} KB downloaded")
+
+    speedup = results["MEF (zip)"]["duration"] / results["direct (xml)"]["duration"]
+    print(f"direct path speedup : {utils.okgreen(f'{speedup:.2f}x')}")
+
+
+if __name__ == "__main__":
+
+    number = 50
+    env = "int"
+
+    for arg in sys.argv[1:]:
+        if arg == "-prod":
+            env = "prod"
+        else:
+            number = int(arg)
+
+    main(number=number, env=env)
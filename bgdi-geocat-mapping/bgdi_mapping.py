@@ -1,51 +1,61 @@
 import io
+import os
 import re
+import sys
+import json
+import hashlib
 import requests
+from collections import Counter
+from concurrent.futures import ThreadPoolExecutor
 from datetime import datetime
+import numpy as np
 import pandas as pd
 import logging
 import logging.config
 import settings
 import utils
-from lxml import etree as ET
+import capabilities
+from state import MappingState
 import geopycat
 
+# Progress journal and search scan shared with the other tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ClassLibrary"))
+from geocatJournal import ProgressJournal
+from geocatSearch import scanRecords
+
 # Corresponds to the column name in the google doc
 TechLayerNameInGDoc = "Layer/collection ID (technical layer name BGDI)"
 GeocatIdInGDoc = "Geocat ID"
 
+MAPPING_COLUMNS = ["Geocat UUID", "Layer ID", "Published", "Geocat Status", "Keyword", "Identifier",
+                   "WMS Link", "WMTS Link", "API3 Link", "Map Preview Link", "ODS Permalink"]
+
+# Columns of the checks reused from the state file for the records unchanged since the last run
+STATE_COLUMNS = ["Identifier", "WMS Link", "WMTS Link", "API3 Link", "Map Preview Link", "ODS Permalink"]
+
 class BGDIMapping(geopycat.geocat):
 
-    def __init__(self, bmd: str, **kwargs):
+    def __init__(self, bmd: str, state: str = None, **kwargs):
+        """
+        Args:
+            bmd: csv file with the BMD records
+            state: optional, path of the state file (SQLite) of the mapping. If given, the checks of the
+                   records unchanged since the last run are not run again, their results are reused.
+        """
 
         super().__init__(**kwargs)
 
         self.bmd = bmd
+        self.previous = dict()
 
         if not self.check_admin():
             print(geopycat.utils.warningred("You must be logged-in as Admin to use this tool !"))
             return
 
-        self.bgdi_inventory = self.get_bgdi_inventory().reset_index()
-        self.mapping = pd.DataFrame(columns=["Geocat UUID", "Layer ID", "Published",
-                                            "Geocat Status", "Keyword", "Identifier",
-                                            "WMS Link", "WMTS Link", "API3 Link", 
-                                            "Map Preview Link", "ODS Permalink"])
-
-        # initiate rows in mapping df
-        for i, row in self.bgdi_inventory.iterrows():
-            new_row = pd.DataFrame({"Geocat UUID": row[2], "Layer ID": row[1].strip()}, index=[0])
-            self.mapping = pd.concat([new_row,self.mapping.loc[:]]).reset_index(drop=True)
+        self.bgdi_inventory = self.get_bgdi_inventory().reset_index(drop=True)
+        self.mapping = self.init_mapping()
 
-        # get metadata index
-        print("Get Metadata Index : ", end="\r")
-        count = 1
-        self.md_index = dict()
-        for i, row in self.mapping.iterrows():
-            self.md_index[row[0]] = self.get_metadata_index(uuid=row[0])
-            print(f"Get Metadata Index : {round((count / len(self.mapping)) * 100, 1)}%", end="\r")
-            count += 1
-        print(f"Get Metadata Index : {geopycat.utils.okgreen('Done')}")
+        self.md_index = self.get_metadata_indexes(uuids=self.mapping.index.unique().tolist())
 
         self.wms = self.get_wms_layer()
         self.wmts = self.get_wmts_layer()
@@ -54,6 +64,16 @@ class BGDIMapping(geopycat.geocat):
         self.check_publish_status()
         self.check_keyword()
         self.check_status()
+
+        if state is not None:
+            state = MappingState(state)
+            fingerprints = self.get_fingerprints()
+
+            self.previous = {uuid: results for uuid, (fingerprint, results) in state.load().items()
+                             if fingerprints.get(uuid) == fingerprint}
+
+            print(f"Records changed since the last run : {len(fingerprints) - len(self.previous)}/{len(fingerprints)}")
+
         self.check_identifier()
         self.check_wms()
         self.check_wmts()
@@ -61,6 +81,23 @@ class BGDIMapping(geopycat.geocat):
         self.check_mappreview()
         self.check_ods_permalink()
 
+        if state is not None:
+            state.save(self.get_state_records(fingerprints))
+            state.close()
+
+    def init_mapping(self) -> pd.DataFrame:
+        """
+        Returns the mapping data frame with a row per record of the BGDI inventory, indexed by geocat UUID.
+        The rows are in reverse inventory order, as they have always been. The checks fill the other columns.
+        """
+
+        mapping = pd.DataFrame({"Geocat UUID": self.bgdi_inventory[GeocatIdInGDoc].to_numpy()[::-1],
+                                "Layer ID": self.bgdi_inventory[TechLayerNameInGDoc].to_numpy()[::-1]},
+                               columns=MAPPING_COLUMNS)
+        mapping.index = pd.Index(mapping["Geocat UUID"].to_numpy())
+
+        return mapping
+
     def get_bgdi_inventory(self):
         """f
         Get BGDI inventory from google BMD.
@@ -69,43 +106,49 @@ class BGDIMapping(geopycat.geocat):
         Returns a pandas df filtered with existing geocat UUID
         """
 
-        geocat_uuids = self.get_uuids()
+        geocat_uuids = set(self.get_uuids())
 
         # Get the google sheet and clean it
         response = requests.get(url=settings.GD_SHEET, proxies=self.session.proxies)
         df = pd.read_csv(io.StringIO(response.content.decode('utf-8')))
 
-        for i, row in df.iterrows():
-            if not pd.isnull(row[TechLayerNameInGDoc]):
-                df.at[i, TechLayerNameInGDoc] = \
-                row[TechLayerNameInGDoc].strip()
-
+        df[TechLayerNameInGDoc] = df[TechLayerNameInGDoc].str.strip()
         df=df.dropna(subset=[TechLayerNameInGDoc]).reset_index(drop=True)
 
+        # Layer ID and geocat UUID of the inventory, kept up to date while records are fixed or added
+        layer_ids = set(df[TechLayerNameInGDoc])
+        layer_index = dict(zip(df[TechLayerNameInGDoc][::-1], df.index[::-1]))
+        inventory_uuids = set(df[GeocatIdInGDoc].dropna())
+
         # Fix missing geocat UUID and missing records with the BMD
         bmd = pd.read_csv(self.bmd)
+        new_rows = list()
 
-        for i, row in bmd.iterrows():
-            if row["GEOCATUUID"] in geocat_uuids:
-                indexes = df.index[df[TechLayerNameInGDoc] == row["TECHPUBLAYERNAME"]].tolist()
-                if len(indexes) > 0:
-                    if pd.isnull(df[GeocatIdInGDoc][indexes[0]]) and row["GEOCATUUID"] not in df[GeocatIdInGDoc].unique():
-                        df.at[indexes[0], GeocatIdInGDoc] = row["GEOCATUUID"]
-                        print(f"{row['TECHPUBLAYERNAME']} : Geocat UUID fixed by BMD")
+        for layer_id, geocat_uuid, ingeststate in zip(bmd["TECHPUBLAYERNAME"], bmd["GEOCATUUID"], bmd["INGESTSTATE"]):
+            if geocat_uuid in geocat_uuids:
+                if layer_id in layer_index:
+                    if pd.isnull(df.at[layer_index[layer_id], GeocatIdInGDoc]) and geocat_uuid not in inventory_uuids:
+                        df.at[layer_index[layer_id], GeocatIdInGDoc] = geocat_uuid
+                        inventory_uuids.add(geocat_uuid)
+                        print(f"{layer_id} : Geocat UUID fixed by BMD")
 
-                if row["TECHPUBLAYERNAME"] not in df[TechLayerNameInGDoc].unique() and \
-                        row["GEOCATUUID"] not in df[GeocatIdInGDoc].unique():
+                if layer_id not in layer_ids and geocat_uuid not in inventory_uuids:
 
-                    new_row = {TechLayerNameInGDoc: row["TECHPUBLAYERNAME"], GeocatIdInGDoc: row["GEOCATUUID"]}
+                    new_row = {TechLayerNameInGDoc: layer_id, GeocatIdInGDoc: geocat_uuid}
 
-                    if row["INGESTSTATE"] == "Productive":
+                    if ingeststate == "Productive":
                         new_row["Layer on prod?"] = 1
-                    elif row["INGESTSTATE"] == "NotProductive":
+                    elif ingeststate == "NotProductive":
                         new_row["Layer on prod?"] = 0
 
-                    new_row = pd.DataFrame(new_row, index=[0])
-                    df = pd.concat([new_row,df.loc[:]]).reset_index(drop=True)
-                    print(f"{row['TECHPUBLAYERNAME']} : record added by BMD")
+                    new_rows.append(new_row)
+                    layer_ids.add(layer_id)
+                    inventory_uuids.add(geocat_uuid)
+                    print(f"{layer_id} : record added by BMD")
+
+        # The records added are on top of the inventory, the last one first
+        if len(new_rows) > 0:
+            df = pd.concat([pd.DataFrame(new_rows[::-1]), df]).reset_index(drop=True)
 
         # Fix missing geocat UUID and missing records with the geoadmin API3
         # Create a dictionnary {layerid: geocat uuid} from geoadmin API3
@@ -116,44 +159,125 @@ class BGDIMapping(geopycat.geocat):
         for i in response.json()["layers"]:
             layerid_geocatuuid[i["layerBodId"]] = i["idGeoCat"]
 
+        # Layers of the API3, part of the fingerprint of the records
+        self.api3_layers = set(layerid_geocatuuid)
+
         # fix wrong geocat UUID with the API
-        for i, row in df.iterrows():
-            if row[TechLayerNameInGDoc] in layerid_geocatuuid:
-                if layerid_geocatuuid[row[TechLayerNameInGDoc]] != row[GeocatIdInGDoc] \
-                and layerid_geocatuuid[row[TechLayerNameInGDoc]] not in df[GeocatIdInGDoc].unique():
-                    df.at[i, GeocatIdInGDoc] = layerid_geocatuuid[row[TechLayerNameInGDoc]]
-                    print(f"{row[TechLayerNameInGDoc]} : geocat uuid fixed by API")
+        inventory_uuids = Counter(df[GeocatIdInGDoc].dropna())
+
+        for i, layer_id, geocat_uuid in zip(df.index, df[TechLayerNameInGDoc], df[GeocatIdInGDoc]):
+            if layer_id in layerid_geocatuuid:
+                if layerid_geocatuuid[layer_id] != geocat_uuid \
+                and inventory_uuids[layerid_geocatuuid[layer_id]] == 0:
+                    df.at[i, GeocatIdInGDoc] = layerid_geocatuuid[layer_id]
+                    inventory_uuids[layerid_geocatuuid[layer_id]] += 1
+                    inventory_uuids[geocat_uuid] -= 1
+                    print(f"{layer_id} : geocat uuid fixed by API")
 
         # Fix missing record with the API
+        layer_ids = set(df[TechLayerNameInGDoc])
+        new_rows = list()
+
         for key, value in layerid_geocatuuid.items():
-            if key not in df[TechLayerNameInGDoc].unique() and value not in df[GeocatIdInGDoc].unique():
-                new_row = {TechLayerNameInGDoc: key, GeocatIdInGDoc: value, "INGESTSTATE": "Productive"}
-                new_row = pd.DataFrame(new_row, index=[0])
-                df = pd.concat([new_row,df.loc[:]]).reset_index(drop=True)
+            if key not in layer_ids and inventory_uuids[value] == 0:
+                new_rows.append({TechLayerNameInGDoc: key, GeocatIdInGDoc: value, "INGESTSTATE": "Productive"})
+                layer_ids.add(key)
+                inventory_uuids[value] += 1
                 print(f"{key} : record added by API")
+
+        if len(new_rows) > 0:
+            df = pd.concat([pd.DataFrame(new_rows[::-1]), df]).reset_index(drop=True)
         
         df=df.dropna(subset=[GeocatIdInGDoc]).reset_index(drop=True)
         df = df[df[GeocatIdInGDoc].isin(geocat_uuids)]
 
         return df
 
+    def fill_column(self, column: str, check):
+        """
+        Fills a column of the mapping data frame with check(uuid, layer_id) for every record,
+        except the ones whose BGDI keyword has to be removed. The records unchanged since
+        the last run (see state) get their previous result.
+        """
+
+        self.mapping[column] = [
+            np.nan if keyword == "Remove BGDI"
+            else self.previous[uuid][column] if uuid in self.previous
+            else check(uuid, layer_id)
+            for uuid, layer_id, keyword in zip(self.mapping.index, self.mapping["Layer ID"], self.mapping["Keyword"])
+        ]
+
+    def get_fingerprints(self) -> dict:
+        """
+        Returns the fingerprint of the inputs of the checks of each record of the BGDI {uuid: fingerprint} :
+        geocat links and resource identifiers, layer ID, WMS and WMTS layer, API3 layer and ODS relation.
+        The geocat change date is not used, the edits done with updateDateStamp=false (e.g. repair_all) don't change it.
+        The records that are several times in the mapping are left out, they are always checked.
+        """
+
+        fingerprints = dict()
+        duplicated = self.mapping.index.duplicated(keep=False)
+
+        for uuid, layer_id, keyword, is_duplicated in zip(self.mapping.index, self.mapping["Layer ID"],
+                                                           self.mapping["Keyword"], duplicated):
+            if keyword == "Remove BGDI" or is_duplicated:
+                continue
+
+            inputs = [
+                self.md_index[uuid]["_source"].get("link"),
+                self.md_index[uuid]["_source"].get("resourceIdentifier"),
+                layer_id,
+                self.wms.get(layer_id),
+                self.wmts.get(layer_id),
+                layer_id in self.api3_layers,
+                self.ods_id_mapping.get(uuid),
+            ]
+
+            fingerprints[uuid] = hashlib.sha1(json.dumps(inputs, ensure_ascii=False).encode("utf-8")).hexdigest()
+
+        return fingerprints
+
+    def get_state_records(self, fingerprints: dict) -> dict:
+        """
+        Returns the records to save in the state file {uuid: (fingerprint, results)}.
+        The records with a check not done (e.g. map.geo.admin layers not available) are left out.
+        """
+
+        records = dict()
+        results = self.mapping.loc[self.mapping.index.isin(list(fingerprints)), STATE_COLUMNS]
+
+        for uuid, values in zip(results.index, results.to_dict("records")):
+            if all(pd.notna(value) for value in values.values()):
+                records[uuid] = (fingerprints[uuid], values)
+
+        return records
+
+    def get_links(self, uuid: str) -> list:
+        """
+        Returns the links of the given metadata from the index
+        """
+
+        return self.md_index[uuid]["_source"].get("link", [])
+
     def check_publish_status(self):
         """
         Fills the mapping data frame with publishing status
         """
 
-        for i, row in self.bgdi_inventory.iterrows():
-
-            index = self.mapping.index[self.mapping["Geocat UUID"] == row[2]].tolist()[0]
+        published = np.array([self.md_index[uuid]["isPublishedToAll"] for uuid in self.mapping.index], dtype=bool)
+        # The mapping rows are in reverse inventory order (see init_mapping)
+        on_prod = self.bgdi_inventory["Layer on prod?"][::-1]
 
-            if self.md_index[row[2]]["isPublishedToAll"] and row["Layer on prod?"] in [1, 0]:
-                self.mapping.at[index, "Published"] = "Published"
-            elif not self.md_index[row[2]]["isPublishedToAll"] and row["Layer on prod?"] != 1:
-                self.mapping.at[index, "Published"] = "Unpublished"
-            elif self.md_index[row[2]]["isPublishedToAll"] and row["Layer on prod?"] not in [1, 0]:
-                self.mapping.at[index, "Published"] = "To unpublish"
-            elif not self.md_index[row[2]]["isPublishedToAll"] and row["Layer on prod?"] == 1:
-                self.mapping.at[index, "Published"] = "To publish"
+        self.mapping["Published"] = np.select(
+            [
+                published & on_prod.isin([1, 0]).to_numpy(),
+                ~published & (on_prod != 1).to_numpy(),
+                published & ~on_prod.isin([1, 0]).to_numpy(),
+                ~published & (on_prod == 1).to_numpy(),
+            ],
+            ["Published", "Unpublished", "To unpublish", "To publish"],
+            default=None
+        )
 
     def check_keyword(self):
         """
@@ -167,204 +291,157 @@ class BGDIMapping(geopycat.geocat):
 
         uuids_keyword = self.get_uuids(keywords=keywords)
 
-        for i, row in self.mapping.iterrows():
-            if row[0] in uuids_keyword:
-                self.mapping.at[i, "Keyword"] = "Ok"
-            else:
-                self.mapping.at[i, "Keyword"] = "Add BGDI"
+        self.mapping["Keyword"] = np.where(self.mapping.index.isin(uuids_keyword), "Ok", "Add BGDI")
 
         uuids = self.get_uuids(keywords=keywords, 
                                 not_in_groups=settings.BGDI_GROUP_ID)
-        for uuid in uuids:
-            if uuid not in self.mapping["Geocat UUID"].unique():
-                new_row = pd.DataFrame({"Geocat UUID": uuid, "Keyword": "Remove BGDI"}, index=[0])
-                self.mapping = pd.concat([self.mapping, new_row]).reset_index(drop=True)
-        
-        cols = ["Geocat UUID", "Layer ID", "Published", "Geocat Status", "Keyword", "Identifier",
-                "WMS Link", "WMTS Link", "API3 Link", "Map Preview Link", "ODS Permalink"]
-        self.mapping = self.mapping[cols]
+        uuids = [uuid for uuid in dict.fromkeys(uuids) if uuid not in self.mapping.index]
+
+        if len(uuids) > 0:
+            new_rows = pd.DataFrame({"Geocat UUID": uuids, "Keyword": "Remove BGDI"}, index=uuids, columns=MAPPING_COLUMNS)
+            self.mapping = pd.concat([self.mapping, new_rows])
 
     def check_status(self):
         """
         Fills the mapping data frame with geocat status info
         """
-        uuids_obsolete = self.get_uuids(q="+cl_status.key:obsolete")
-
-        for i, row in self.mapping.iterrows():
-            if row[0] in uuids_obsolete and row["Published"] in ["Unpublished", "To unpublish"]:
-                self.mapping.at[i, "Geocat Status"] = "Ok"
-            elif row[0] not in uuids_obsolete and row["Published"] in ["Published", "To publish"]:
-                self.mapping.at[i, "Geocat Status"] = "Ok"
-            elif row[0] in uuids_obsolete and row["Published"] in ["Published", "To publish"]:
-                self.mapping.at[i, "Geocat Status"] = "Remove obsolete"
-            elif row[0] not in uuids_obsolete and row["Published"] in ["Unpublished", "To unpublish"]:
-                self.mapping.at[i, "Geocat Status"] = "Add obsolete"
+        obsolete = self.mapping.index.isin(self.get_uuids(q="+cl_status.key:obsolete"))
+        published = self.mapping["Published"].isin(["Published", "To publish"]).to_numpy()
+        unpublished = self.mapping["Published"].isin(["Unpublished", "To unpublish"]).to_numpy()
+
+        self.mapping["Geocat Status"] = np.select(
+            [
+                obsolete & unpublished,
+                ~obsolete & published,
+                obsolete & published,
+                ~obsolete & unpublished,
+            ],
+            ["Ok", "Ok", "Remove obsolete", "Add obsolete"],
+            default=None
+        )
 
     def check_identifier(self):
         """
         Fills the mapping data frame with geocat identifier info
         """
-        for i, row in self.mapping.iterrows():
-            if row["Keyword"] != "Remove BGDI":
-                if "resourceIdentifier" in self.md_index[row[0]]["_source"]:
-                    for j in self.md_index[row[0]]["_source"]["resourceIdentifier"]:
-                        if j["code"] == row[1]:
-                            self.mapping.at[i, "Identifier"] = "Ok"
-                            break
-                        else:
-                            self.mapping.at[i, "Identifier"] = "Fix identifier"
-                else:
-                    self.mapping.at[i, "Identifier"] = "Add identifier"
+
+        def status(uuid: str, layer_id: str) -> str:
+            if "resourceIdentifier" not in self.md_index[uuid]["_source"]:
+                return "Add identifier"
+
+            for identifier in self.md_index[uuid]["_source"]["resourceIdentifier"]:
+                if identifier["code"] == layer_id:
+                    return "Ok"
+
+            return "Fix identifier"
+
+        self.fill_column("Identifier", status)
 
     def check_wms(self):
         """
         Fills the mapping data frame with WMS Link info
         """
 
-        for i, row in self.mapping.iterrows():
-
-            if row["Keyword"] == "Remove BGDI":
-                continue
-
+        def status(uuid: str, layer_id: str) -> str:
             wms_ok = False
             wms_tofix = False
 
-            if "link" in self.md_index[row[0]]["_source"]:
-                for link in self.md_index[row[0]]["_source"]["link"]:
-                    if "OGC:WMS" in link["protocol"] and re.search("^https:\/\/wms\.geo\.admin\.ch\/\?SERVICE=WMS&VERSION=1\.3\.0&REQUEST=GetCapabilities(&lang=(fr|de|it|en))?$", link["urlObject"]["default"]) and link["nameObject"]["default"] == row[1]:
-                        wms_ok = True
-                    elif "OGC:WMS" in link["protocol"] and "wms.geo.admin.ch" in link["urlObject"]["default"]:
-                        wms_tofix = True
-
-            if row[1] in self.wms:
-                if wms_ok and not wms_tofix:
-                    self.mapping.at[i, "WMS Link"] = "WMS"
-                elif wms_ok and wms_tofix:
-                    self.mapping.at[i, "WMS Link"] = "Fix WMS"
-                elif not wms_ok and wms_tofix:
-                    self.mapping.at[i, "WMS Link"] = "Fix WMS"
-                else:
-                    self.mapping.at[i, "WMS Link"] = "Add WMS"
+            for link in self.get_links(uuid):
+                if "OGC:WMS" in link["protocol"] and re.search("^https:\/\/wms\.geo\.admin\.ch\/\?SERVICE=WMS&VERSION=1\.3\.0&REQUEST=GetCapabilities(&lang=(fr|de|it|en))?$", link["urlObject"]["default"]) and link["nameObject"]["default"] == layer_id:
+                    wms_ok = True
+                elif "OGC:WMS" in link["protocol"] and "wms.geo.admin.ch" in link["urlObject"]["default"]:
+                    wms_tofix = True
 
-            else:
-                if wms_ok or wms_tofix:
-                    self.mapping.at[i, "WMS Link"] = "Remove WMS"
-                else:
-                    self.mapping.at[i, "WMS Link"] = "No WMS"
+            if layer_id in self.wms:
+                if wms_tofix:
+                    return "Fix WMS"
+                return "WMS" if wms_ok else "Add WMS"
+
+            return "Remove WMS" if wms_ok or wms_tofix else "No WMS"
+
+        self.fill_column("WMS Link", status)
 
     def check_wmts(self):
         """
         Fills the mapping data frame with WMTS Link info
         """
 
-        for i, row in self.mapping.iterrows():
-
-            if row["Keyword"] == "Remove BGDI":
-                continue
-
+        def status(uuid: str, layer_id: str) -> str:
             wmts_ok = False
             wmts_tofix = False
 
-            if "link" in self.md_index[row[0]]["_source"]:
-                for link in self.md_index[row[0]]["_source"]["link"]:
-                    if "OGC:WMTS" in link["protocol"] and re.search("^https:\/\/wmts\.geo\.admin\.ch(\/EPSG\/(3857|21781|4326))?\/1\.0\.0\/WMTSCapabilities\.xml(\?lang=(de|fr|it|en))?$", link["urlObject"]["default"]) and link["nameObject"]["default"] == row[1]:
-                        wmts_ok = True
-                    elif "OGC:WMTS" in link["protocol"] and "wmts.geo.admin.ch" in link["urlObject"]["default"]:
-                        wmts_tofix = True
-
-            if row[1] in self.wmts:
-                if wmts_ok and not wmts_tofix:
-                    self.mapping.at[i, "WMTS Link"] = "WMTS"
-                elif wmts_ok and wmts_tofix:
-                    self.mapping.at[i, "WMTS Link"] = "Fix WMTS"
-                elif not wmts_ok and wmts_tofix:
-                    self.mapping.at[i, "WMTS Link"] = "Fix WMTS"
-                else:
-                    self.mapping.at[i, "WMTS Link"] = "Add WMTS"
+            for link in self.get_links(uuid):
+                if "OGC:WMTS" in link["protocol"] and re.search("^https:\/\/wmts\.geo\.admin\.ch(\/EPSG\/(3857|21781|4326))?\/1\.0\.0\/WMTSCapabilities\.xml(\?lang=(de|fr|it|en))?$", link["urlObject"]["default"]) and link["nameObject"]["default"] == layer_id:
+                    wmts_ok = True
+                elif "OGC:WMTS" in link["protocol"] and "wmts.geo.admin.ch" in link["urlObject"]["default"]:
+                    wmts_tofix = True
 
-            else:
-                if wmts_ok or wmts_tofix:
-                    self.mapping.at[i, "WMTS Link"] = "Remove WMTS"
-                else:
-                    self.mapping.at[i, "WMTS Link"] = "No WMTS"       
+            if layer_id in self.wmts:
+                if wmts_tofix:
+                    return "Fix WMTS"
+                return "WMTS" if wmts_ok else "Add WMTS"
+
+            return "Remove WMTS" if wmts_ok or wmts_tofix else "No WMTS"
+
+        self.fill_column("WMTS Link", status)
 
     def check_api(self):
         """
         Fills the mapping data frame with geoadmin API3 Link info
         """
 
-        for i, row in self.mapping.iterrows():
-
-            if row["Keyword"] == "Remove BGDI":
-                continue
-
+        def status(uuid: str, layer_id: str) -> str:
             api3_ok = False
             api3_tofix = False
 
-            if "link" in self.md_index[row[0]]["_source"]:
-                for link in self.md_index[row[0]]["_source"]["link"]:
-                    if "ESRI:REST" in link["protocol"] and link["urlObject"]["default"] == f"{settings.API3_URL}/{row[1]}":
-                        api3_ok = True
-                    elif "ESRI:REST" in link["protocol"] and "api3.geo.admin.ch" in link["urlObject"]["default"]:
-                        api3_tofix = True
+            for link in self.get_links(uuid):
+                if "ESRI:REST" in link["protocol"] and link["urlObject"]["default"] == f"{settings.API3_URL}/{layer_id}":
+                    api3_ok = True
+                elif "ESRI:REST" in link["protocol"] and "api3.geo.admin.ch" in link["urlObject"]["default"]:
+                    api3_tofix = True
 
-            response = self.session.get(url=f"{settings.API3_URL}/{row[1]}")
+            response = self.session.get(url=f"{settings.API3_URL}/{layer_id}")
             if response.status_code == 200:
                 if api3_tofix:
-                    self.mapping.at[i, "API3 Link"] = "Fix API3"
-                    continue
+                    return "Fix API3"
+                return "API3" if api3_ok else "Add API3"
 
-                if api3_ok:
-                    self.mapping.at[i, "API3 Link"] = "API3"
-                else:
-                    self.mapping.at[i, "API3 Link"] = "Add API3"
-            else:
-                if api3_ok or api3_tofix:
-                    self.mapping.at[i, "API3 Link"] = "Remove API3"
-                else:
-                    self.mapping.at[i, "API3 Link"] = "No API3"
+            return "Remove API3" if api3_ok or api3_tofix else "No API3"
+
+        self.fill_column("API3 Link", status)
 
     def check_mappreview(self):
         """
         Fills the mapping data frame with map.geo.admin preview Link info
         """
 
-        map_layer_ids = list()
+        map_layer_ids = set()
 
         response = self.session.get("https://api3.geo.admin.ch/rest/services/api/MapServer", proxies=self.session.proxies, verify=False)
 
         if response.status_code == 200:
             for layer in response.json()["layers"]:
-                map_layer_ids.append(layer["layerBodId"])
+                map_layer_ids.add(layer["layerBodId"])
         else:
             print(f"Erreur lors de la récupération des layers: {response.status_code}")
             return
 
-        for i, row in self.mapping.iterrows():
+        def status(uuid: str, layer_id: str) -> str:
+            map_preview = False
 
-            if row["Keyword"] == "Remove BGDI":
-                continue
+            for link in self.get_links(uuid):
 
-            map_preview = False
+                # Check if metadata has link to map portal
+                if re.search(f"map\..*\.admin\.ch.*layers=.*{layer_id}($|[&,/])", link["urlObject"]["default"]):
+                    map_preview = True
 
-            if "link" in self.md_index[row[0]]["_source"]:
-                for link in self.md_index[row[0]]["_source"]["link"]:
+            if layer_id in map_layer_ids:
+                return "Map preview" if map_preview else "Add map preview"
 
-                    # Check if metadata has link to map portal
-                    if re.search(f"map\..*\.admin\.ch.*layers=.*{row[1]}($|[&,/])", link["urlObject"]["default"]):
-                        map_preview = True
+            # Do not remove preview since it can have other valid layers
+            return "No map preview"
 
-            if row[1] in map_layer_ids:
-                if map_preview:
-                    self.mapping.at[i, "Map Preview Link"] = "Map preview"
-                else:
-                    self.mapping.at[i, "Map Preview Link"] = "Add map preview"
-            else:
-                if map_preview:
-                    # Do not remove preview since it can have other valid layers
-                    self.mapping.at[i, "Map Preview Link"] = "No map preview"
-                else:
-                    self.mapping.at[i, "Map Preview Link"] = "No map preview"
+        self.fill_column("Map Preview Link", status)
 
     def check_ods_permalink(self):
         """
@@ -372,49 +449,59 @@ class BGDIMapping(geopycat.geocat):
         it must have a correct ODS premalink.
         """
 
-        # Check if record is in ODS
-        for i, row in self.mapping.iterrows():
+        def status(uuid: str, layer_id: str) -> str:
+            links = self.get_links(uuid)
+            has_ods_permalink = any(link["protocol"] == "OPENDATA:SWISS" for link in links)
 
-            if row["Keyword"] == "Remove BGDI":
-                continue
+            # Case where geocat record not in ODS
+            if uuid not in self.ods_id_mapping:
+                return "Remove ODS Permalink" if has_ods_permalink else "No ODS Permalink"
 
-            has_ods_permalink = False
+            # Case where geocat record in ODS
+            for link in links:
+                if re.search(f"^https:\/\/opendata\.swiss\/.*\/perma\/{self.ods_id_mapping[uuid]}$", link["urlObject"]["default"]):
+                    return "ODS Permalink"
 
-            if "link" in self.md_index[row[0]]["_source"]:
-                for link in self.md_index[row[0]]["_source"]["link"]:
-                    if link["protocol"] == "OPENDATA:SWISS":
-                        has_ods_permalink = True
-                        break
+            return "Fix ODS Permalink" if has_ods_permalink else "Add ODS Permalink"
 
-            # Case where geocat record not in ODS
-            if row[0] not in self.ods_id_mapping:
-                
-                # Not in ODS but ODS permalink
-                if has_ods_permalink:
-                    self.mapping.at[i, "ODS Permalink"] = "Remove ODS Permalink"
-                
-                # Not in ODS and no ODS permalink
-                else:
-                    self.mapping.at[i, "ODS Permalink"] = "No ODS Permalink"
+        self.fill_column("ODS Permalink", status)
 
-            # Case where geocat record in ODS
-            else:
+    def get_metadata_indexes(self, uuids: list, batch_size: int = 500) -> dict:
+        """
+        Get the index documents of a list of metadata with terms queries of batch_size UUID,
+        only with the fields used by the checks (isPublishedToAll, resourceIdentifier and link).
+
+        Returns a dictionnary {uuid: index document}. The metadata not found in the index
+        get an empty unpublished document.
+        """
+        print("Get Metadata Index : ", end="\r")
 
-                has_correct_ods_permalink = False
+        md_index = dict()
+        includes = ["uuid", "isPublishedToAll", "resourceIdentifier", "link"]
 
-                if "link" in self.md_index[row[0]]["_source"]:
-                    for link in self.md_index[row[0]]["_source"]["link"]:
-                        if re.search(f"^https:\/\/opendata\.swiss\/.*\/perma\/{self.ods_id_mapping[row[0]]}$", link["urlObject"]["default"]):
-                           has_correct_ods_permalink = True
-                           break
-                
-                if has_correct_ods_permalink:
-                    self.mapping.at[i, "ODS Permalink"] = "ODS Permalink"
-                else:
-                    if has_ods_permalink:
-                        self.mapping.at[i, "ODS Permalink"] = "Fix ODS Permalink"
-                    else:
-                        self.mapping.at[i, "ODS Permalink"] = "Add ODS Permalink"
+        for i in range(0, len(uuids), batch_size):
+            body = {"query": {"terms": {"uuid": uuids[i:i + batch_size]}}}
+
+            for hit in scanRecords(self.session, self.env + settings.ES_SEARCH_PATH, body, includes):
+                # isPublishedToAll is added to the hits by geocat, the indexed field is the fallback
+                if "isPublishedToAll" not in hit:
+                    hit["isPublishedToAll"] = hit["_source"].get("isPublishedToAll") in [True, "true"]
+
+                md_index[hit["_source"]["uuid"]] = hit
+
+            print(f"Get Metadata Index : {round((min(i + batch_size, len(uuids)) / len(uuids)) * 100, 1)}%", end="\r")
+
+        missing = [uuid for uuid in uuids if uuid not in md_index]
+
+        for uuid in missing:
+            md_index[uuid] = {"isPublishedToAll": False, "_source": {}}
+
+        print(f"Get Metadata Index : {geopycat.utils.okgreen('Done')}")
+
+        if len(missing) > 0:
+            print(geopycat.utils.warningred(f"Metadata not found in the index : {', '.join(missing)}"))
+
+        return md_index
 
     def get_ods_permalink(self):
         """
@@ -460,94 +547,53 @@ class BGDIMapping(geopycat.geocat):
         """
         Get layer id and title in 4 languages from swisstopo WMS
         """
-        out = dict()
-
-        # DE
-        response = self.session.get(f"{settings.WMS_URL}&lang=de")
-        root = ET.fromstring(response.content)
-
-        for i in root.xpath(".//wms:Layer[1]//wms:Layer",
-                                namespaces=settings.NS):
-
-            out[i.find("wms:Name", namespaces=settings.NS).text] = {
-                "de": f'WMS-BGDI Dienst, Layer "{i.find("wms:Title", namespaces=settings.NS).text}"'
-                }
-
-        # FR
-        response = self.session.get(f"{settings.WMS_URL}&lang=fr")
-        root = ET.fromstring(response.content)
-
-        for i in root.xpath(".//wms:Layer[1]//wms:Layer",
-                                namespaces=settings.NS):
-
-            out[i.find("wms:Name", namespaces=settings.NS).text]["fr"] = \
-                f'Service WMS-IFDG, couche "{i.find("wms:Title", namespaces=settings.NS).text}"'
+        titles = capabilities.load_capabilities(
+            self.session, {lang: f"{settings.WMS_URL}&lang={lang}" for lang in ["de", "fr", "it", "en"]}, "wms")
 
-        # IT
-        response = self.session.get(f"{settings.WMS_URL}&lang=it")
-        root = ET.fromstring(response.content)
+        out = {layer: {"de": f'WMS-BGDI Dienst, Layer "{title}"'} for layer, title in titles["de"].items()}
 
-        for i in root.xpath(".//wms:Layer[1]//wms:Layer",
-                                namespaces=settings.NS):
+        for layer, title in titles["fr"].items():
+            if layer in out:
+                out[layer]["fr"] = f'Service WMS-IFDG, couche "{title}"'
 
-            out[i.find("wms:Name", namespaces=settings.NS).text]["it"] = \
-                f'Servizio WMS-IFDG, strato "{i.find("wms:Title", namespaces=settings.NS).text}"'
+        for layer, title in titles["it"].items():
+            if layer in out:
+                out[layer]["it"] = f'Servizio WMS-IFDG, strato "{title}"'
 
-        # FR
-        response = self.session.get(f"{settings.WMS_URL}&lang=en")
-        root = ET.fromstring(response.content)
+        for layer, title in titles["en"].items():
+            if layer in out:
+                out[layer]["en"] = f'WMS-FSDI service, layer "{title}"'
 
-        for i in root.xpath(".//wms:Layer[1]//wms:Layer",
-                                namespaces=settings.NS):
-
-            out[i.find("wms:Name", namespaces=settings.NS).text]["en"] = \
-                f'WMS-FSDI service, layer "{i.find("wms:Title", namespaces=settings.NS).text}"' 
-    
         return out
 
     def get_wmts_layer(self) -> dict:
         """
         Get layer id and title in 4 languages from swisstopo WMTS
         """
-        out = dict()
-
-        response = self.session.get("https://wmts.geo.admin.ch/EPSG/2056/1.0.0/WMTSCapabilities.xml?lang=de")
-        root = ET.fromstring(response.content)
-
-        for i in root.xpath(".//wmts:Contents//wmts:Layer",
-                                namespaces=settings.NS):
-
-            out[i.find("ows:Identifier", namespaces=settings.NS).text] = {
-                "de": f'WMTS-BGDI Dienst, Layer "{i.find("ows:Title", namespaces=settings.NS).text}"'
-                }
-
-        response = self.session.get(f"{settings.WMTS_URL}?lang=fr")
-        root = ET.fromstring(response.content)
-
-        for i in root.xpath(".//wmts:Contents//wmts:Layer",
-                                namespaces=settings.NS):
+        titles = capabilities.load_capabilities(
+            self.session,
+            {
+                "de": "https://wmts.geo.admin.ch/EPSG/2056/1.0.0/WMTSCapabilities.xml?lang=de",
+                "fr": f"{settings.WMTS_URL}?lang=fr",
+                "it": f"{settings.WMTS_URL}?lang=it",
+                "en": f"{settings.WMTS_URL}?lang=en",
+            },
+            "wmts")
 
-            out[i.find("ows:Identifier", namespaces=settings.NS).text]["fr"] = \
-                f'Service WMTS-IFDG, couche "{i.find("ows:Title", namespaces=settings.NS).text}"'
+        out = {layer: {"de": f'WMTS-BGDI Dienst, Layer "{title}"'} for layer, title in titles["de"].items()}
 
-        response = self.session.get(f"{settings.WMTS_URL}?lang=it")
-        root = ET.fromstring(response.content)
+        for layer, title in titles["fr"].items():
+            if layer in out:
+                out[layer]["fr"] = f'Service WMTS-IFDG, couche "{title}"'
 
-        for i in root.xpath(".//wmts:Contents//wmts:Layer",
-                                namespaces=settings.NS):
+        for layer, title in titles["it"].items():
+            if layer in out:
+                out[layer]["it"] = f'Servizio WMTS-IFDG, strato "{title}"'
 
-            out[i.find("ows:Identifier", namespaces=settings.NS).text]["it"] = \
-                f'Servizio WMTS-IFDG, strato "{i.find("ows:Title", namespaces=settings.NS).text}"'
+        for layer, title in titles["en"].items():
+            if layer in out:
+                out[layer]["en"] = f'WMTS-FSDI service, layer "{title}"'
 
-        response = self.session.get(f"{settings.WMTS_URL}?lang=en")
-        root = ET.fromstring(response.content)
-
-        for i in root.xpath(".//wmts:Contents//wmts:Layer",
-                                namespaces=settings.NS):
-
-            out[i.find("ows:Identifier", namespaces=settings.NS).text]["en"] = \
-                f'WMTS-FSDI service, layer "{i.find("ows:Title", namespaces=settings.NS).text}"'
-    
         return out
 
     def repair_wmts(self, uuid: str):
@@ -555,7 +601,7 @@ class BGDIMapping(geopycat.geocat):
         Repair WMTS Link in the given metadata to match the BGDI
         """
 
-        if uuid not in self.mapping["Geocat UUID"].unique():
+        if uuid not in self.mapping.index:
             raise Exception("Metadata not in BGDI !")
 
         metadata = self.get_metadata_from_mef(uuid=uuid)
@@ -563,7 +609,7 @@ class BGDIMapping(geopycat.geocat):
             raise Exception("Metadata could not be fetch from geocat.ch !")
 
         body = list()
-        row = self.mapping.loc[self.mapping['Geocat UUID']==uuid]
+        row = self.mapping.loc[[uuid]]
 
         if row["WMTS Link"].iloc[0] in ["Add WMTS", "Fix WMTS"] and row["Published"].iloc[0] not in ["Unpublished", "To unpublish"]:
             body += utils.add_wmts(metadata, row["Layer ID"].iloc[0], self.wmts[row["Layer ID"].iloc[0]])
@@ -581,7 +627,7 @@ class BGDIMapping(geopycat.geocat):
         Repair API3 Link in the given metadata to match the BGDI
         """
 
-        if uuid not in self.mapping["Geocat UUID"].unique():
+        if uuid not in self.mapping.index:
             raise Exception("Metadata not in BGDI !")
 
         metadata = self.get_metadata_from_mef(uuid=uuid)
@@ -589,7 +635,7 @@ class BGDIMapping(geopycat.geocat):
             raise Exception("Metadata could not be fetch from geocat.ch !")
 
         body = list()
-        row = self.mapping.loc[self.mapping['Geocat UUID']==uuid]
+        row = self.mapping.loc[[uuid]]
 
         if row["API3 Link"].iloc[0] in ["Add API3", "Fix API3"] and row["Published"].iloc[0] not in ["Unpublished", "To unpublish"]:
             body += utils.add_api3(metadata, row["Layer ID"].iloc[0])
@@ -607,7 +653,7 @@ class BGDIMapping(geopycat.geocat):
         Repair Map preview Link in the given metadata to match the BGDI
         """
 
-        if uuid not in self.mapping["Geocat UUID"].unique():
+        if uuid not in self.mapping.index:
             raise Exception("Metadata not in BGDI !")
 
         metadata = self.get_metadata_from_mef(uuid=uuid)
@@ -615,7 +661,7 @@ class BGDIMapping(geopycat.geocat):
             raise Exception("Metadata could not be fetch from geocat.ch !")
 
         body = list()
-        row = self.mapping.loc[self.mapping['Geocat UUID']==uuid]
+        row = self.mapping.loc[[uuid]]
 
         if row["Map Preview Link"].iloc[0] == "Add map preview" and row["Published"].iloc[0] not in ["Unpublished", "To unpublish"]:
             body += utils.add_mappreview(metadata, row["Layer ID"].iloc[0])
@@ -630,7 +676,7 @@ class BGDIMapping(geopycat.geocat):
         Repair ODS permalink in the given metadata to match the BGDI
         """
 
-        if uuid not in self.mapping["Geocat UUID"].unique():
+        if uuid not in self.mapping.index:
             raise Exception("Metadata not in BGDI !")
 
         metadata = self.get_metadata_from_mef(uuid=uuid)
@@ -638,7 +684,7 @@ class BGDIMapping(geopycat.geocat):
             raise Exception("Metadata could not be fetch from geocat.ch !")
 
         body = list()
-        row = self.mapping.loc[self.mapping['Geocat UUID']==uuid]
+        row = self.mapping.loc[[uuid]]
 
         if row["ODS Permalink"].iloc[0] in ["Add ODS Permalink", "Fix ODS Permalink"] and row["Published"].iloc[0] not in ["Unpublished", "To unpublish"]:
             body += utils.add_ods_permalink(metadata, self.ods_id_mapping[uuid])
@@ -651,123 +697,157 @@ class BGDIMapping(geopycat.geocat):
 
             return response
 
-    def repair_metadata(self, uuid: str):
+    def plan_repair(self, uuid: str, metadata: bytes) -> list:
         """
-        Repair the given metadata to match the BGDI
+        Returns the batch editing body repairing the given metadata to match the BGDI, all the edits merged.
+
+        geocat applies the edits one after the other. Each repair is therefore computed on the metadata
+        as it will be once the previous repairs are applied (applied locally with MetadataDocument.apply_edits),
+        as if they were sent in separate requests.
         """
 
-        if uuid not in self.mapping["Geocat UUID"].unique():
-            raise Exception("Metadata not in BGDI !")
+        row = self.mapping.loc[[uuid]].iloc[0]
+        layer_id = row["Layer ID"]
+        published = row["Published"] not in ["Unpublished", "To unpublish"]
 
-        metadata = self.get_metadata_from_mef(uuid=uuid)
-        if metadata is None:
-            raise Exception("Metadata could not be fetch from geocat.ch !")
+        steps = list()
 
-        body = list()
-        row = self.mapping.loc[self.mapping['Geocat UUID']==uuid]
+        # Status
+        if row["Geocat Status"] == "Add obsolete":
+            steps.append((utils.add_status_obsolete,))
+        if row["Geocat Status"] == "Remove obsolete":
+            steps.append((utils.remove_status_obsolete,))
 
-        md_updated = False
+        # Keyword
+        if row["Keyword"] == "Add BGDI":
+            steps.append((utils.add_bgdi_keyword,))
+        if row["Keyword"] == "Remove BGDI":
+            steps.append((utils.remove_bgdi_keyword,))
 
-        # Publish
-        if row["Published"].iloc[0] == "To publish":
+        # Identifier
+        if row["Identifier"] == "Add identifier":
+            steps.append((utils.add_identifier, layer_id))
+
+        # WMS
+        if row["WMS Link"] in ["Add WMS", "Fix WMS"] and published:
+            steps.append((utils.add_wms, layer_id, self.wms[layer_id]))
+        if row["WMS Link"] == "Remove WMS":
+            steps.append((utils.remove_wms,))
 
-            response = self.session.put(f"{self.env}/geonetwork/srv/api/records/{uuid}/publish")
+        # WMTS
+        if row["WMTS Link"] in ["Add WMTS", "Fix WMTS"] and published:
+            steps.append((utils.add_wmts, layer_id, self.wmts[layer_id]))
+        if row["WMTS Link"] == "Remove WMTS":
+            steps.append((utils.remove_wmts,))
 
-            md_updated = True
+        # API3
+        if row["API3 Link"] in ["Add API3", "Fix API3"] and published:
+            steps.append((utils.add_api3, layer_id))
+        if row["API3 Link"] == "Remove API3":
+            steps.append((utils.remove_api3,))
 
-            if response.status_code != 204:
-                raise Exception("Metadata could not be published !")
+        # Map preview
+        if row["Map Preview Link"] == "Add map preview" and published:
+            steps.append((utils.add_mappreview, layer_id))
 
-        elif row["Published"].iloc[0] == "To unpublish":
-            response = self.session.put(f"{self.env}/geonetwork/srv/api/records/{uuid}/unpublish")
+        # ODS Permalink
+        if row["ODS Permalink"] in ["Add ODS Permalink", "Fix ODS Permalink"] and published:
+            steps.append((utils.add_ods_permalink, self.ods_id_mapping[uuid]))
+        if row["ODS Permalink"] == "Remove ODS Permalink":
+            steps.append((utils.remove_ods_permalink,))
 
-            md_updated = True
+        # Parsed once, the lookups are shared by the repairs until the document is edited
+        doc = utils.MetadataDocument(metadata)
+        body = list()
 
-            if response.status_code != 204:
-                raise Exception("Metadata could not be unpublished !")          
+        for step, *args in steps:
+            edits = step(doc, *args)
+            doc.apply_edits(edits)
+            body += edits
 
-        # Status
-        if row["Geocat Status"].iloc[0] == "Add obsolete":
-            body += utils.add_status_obsolete(metadata)
+        return body
 
-        if row["Geocat Status"].iloc[0] == "Remove obsolete":
-            body += utils.remove_status_obsolete(metadata)
+    def repair_record(self, uuid: str) -> dict:
+        """
+        Repair the given metadata to match the BGDI : fetch it once, compute the edits, publish or
+        unpublish it and send all the edits in a single batch editing request.
 
-        # Keyword
-        if row["Keyword"].iloc[0] == "Add BGDI":
-            body += utils.add_bgdi_keyword(metadata)
+        Returns the outcome {"uuid": , "success": bool, "updated": bool, "edits": int, "message": str}
+        """
 
-        if row["Keyword"].iloc[0] == "Remove BGDI":
-            body += utils.remove_bgdi_keyword(metadata)
+        result = {"uuid": uuid, "success": False, "updated": False, "edits": 0, "message": ""}
 
-        # Identifier
-        if row["Identifier"].iloc[0] == "Add identifier":
-            body += utils.add_identifier(metadata, row["Layer ID"].iloc[0])
+        if uuid not in self.mapping.index:
+            result["message"] = "Metadata not in BGDI !"
+            return result
 
-        # WMS
-        if row["WMS Link"].iloc[0] in ["Add WMS", "Fix WMS"] and row["Published"].iloc[0] not in ["Unpublished", "To unpublish"]:
-            body += utils.add_wms(metadata, row["Layer ID"].iloc[0], self.wms[row["Layer ID"].iloc[0]])
+        metadata = self.get_metadata_from_mef(uuid=uuid)
+        if metadata is None:
+            result["message"] = "Metadata could not be fetch from geocat.ch !"
+            return result
 
-        if row["WMS Link"].iloc[0] == "Remove WMS":
-            body += utils.remove_wms(metadata)
+        # The edits are computed first, so nothing is changed on geocat if they can't be
+        try:
+            body = self.plan_repair(uuid, metadata)
+        except Exception as e:
+            result["message"] = f"Repair could not be computed : {e}"
+            return result
+
+        published = self.mapping.loc[[uuid], "Published"].iloc[0]
+
+        # Publish
+        if published in ["To publish", "To unpublish"]:
+            action = "publish" if published == "To publish" else "unpublish"
+            response = self.session.put(f"{self.env}/geonetwork/srv/api/records/{uuid}/{action}")
+
+            if response.status_code != 204:
+                result["message"] = f"Metadata could not be {action}ed !"
+                return result
+
+            result["updated"] = True
 
         if len(body) > 0:
             response = self.edit_metadata(uuid=uuid, body=body, updateDateStamp="false")
 
             if not geopycat.utils.process_ok(response):
-                raise Exception("Keyword or Identifier or WMS could not be repaired")
-            
-            md_updated = True
-        
-        # WMTS
-        if row["WMTS Link"].iloc[0] not in ["WMTS", "No WMTS"]:
-            response = self.repair_wmts(uuid)
-            if  response is not None:
+                result["message"] = "Metadata could not be repaired"
+                return result
 
-                if not geopycat.utils.process_ok(response):
-                    raise Exception("WMTS could not be repaired")
-                
-                md_updated = True
+            result["updated"] = True
+            result["edits"] = len(body)
 
-        # API3
-        if row["API3 Link"].iloc[0] not in ["API3", "No API3"]:
-            response = self.repair_api3(uuid)
-            if  response is not None:
-
-                if not geopycat.utils.process_ok(response):
-                    raise Exception("API3 could not be repaired")
-                
-                md_updated = True
+        result["success"] = True
+        result["message"] = "successfully repaired" if result["updated"] else "nothing to repair"
 
-        # Map preview
-        if row["Map Preview Link"].iloc[0] not in ["Map preview", "No map preview"]:
-            response = self.repair_mappreview(uuid)
-            if  response is not None:
+        return result
 
-                if not geopycat.utils.process_ok(response):
-                    raise Exception("Map Preview could not be repaired")
-                
-                md_updated = True
+    def repair_metadata(self, uuid: str):
+        """
+        Repair the given metadata to match the BGDI
+        """
 
-        # ODS Permalink
-        if row["ODS Permalink"].iloc[0] not in ["ODS Permalink", "No ODS Permalink"]:
-            response = self.repair_ods_permalink(uuid)
-            if  response is not None:
+        result = self.repair_record(uuid)
 
-                if not geopycat.utils.process_ok(response):
-                    raise Exception("ODS Permalink could not be repaired")
-                
-                md_updated = True
+        if not result["success"]:
+            raise Exception(result["message"])
 
         # Logging
-        if md_updated:
+        if result["updated"]:
             print(geopycat.utils.okgreen(f"{uuid} - Metadata successfully repaired"))
         else:
             print(geopycat.utils.warningred(f"{uuid} - Metadata has nothing to repair"))
 
-    def repair_all(self, tounpub: bool = False):
+    def repair_all(self, tounpub: bool = False, journal: str = None, workers: int = 8) -> dict:
         """
         Repair all metadata to match the BGDI
+
+        The metadata are repaired by a pool of workers concurrent requests, the results are logged in the
+        order of the mapping.
+
+        If a journal file path is given, the metadata successfully repaired are recorded in it
+        and skipped when repair_all is restarted with the same journal.
+
+        Returns a dictionnary {uuid: outcome}, see repair_record
         """
 
         logfile = f"BGDI-Mapping_{datetime.now().strftime('%Y%m%d-%H%M%S')}.log"
@@ -777,21 +857,44 @@ class BGDIMapping(geopycat.geocat):
         
         logger = logging.getLogger(__name__)
 
-        print("Repair all : ", end="\r")
-        count = 0
+        if journal is not None:
+            journal = ProgressJournal(journal)
+
+        # Each metadata is repaired once, even if it is several times in the mapping
+        seen = set()
+        uuids = list()
+
+        for uuid, published in zip(self.mapping.index, self.mapping["Published"]):
+            if uuid in seen:
+                continue
+
+            seen.add(uuid)
 
-        for i, row in self.mapping.iterrows():
+            if journal is not None and journal.isDone(uuid, "repair"):
+                logger.info(f"{uuid} - already repaired (journal)")
 
-            count += 1
+            elif published != "To unpublish" or tounpub:
+                uuids.append(uuid)
 
-            if row["Published"] != "To unpublish" or tounpub:
+        print("Repair all : ", end="\r")
+        results = dict()
 
-                try:
-                    self.repair_metadata(row["Geocat UUID"])
-                except Exception as e:
-                    logger.error(f"{row['Geocat UUID']} - {e}")
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            for result in executor.map(self.repair_record, uuids):
+                results[result["uuid"]] = result
+
+                if result["success"]:
+                    logger.info(f"{result['uuid']} - {result['message']}")
+                    if journal is not None:
+                        journal.markDone(result["uuid"], "repair")
                 else:
-                    logger.info(f"{row['Geocat UUID']} - successfully repaired")
-            
-            print(f"Repair all : {round((count / len(self.mapping.index)) * 100, 1)}%", end="\r")
-        print(f"Repair all : {geopycat.utils.okgreen('Done')}")
\ No newline at end of file
+                    logger.error(f"{result['uuid']} - {result['message']}")
+
+                print(f"Repair all : {round((len(results) / len(uuids)) * 100, 1)}%", end="\r")
+
+        if journal is not None:
+            journal.flush()
+
+        print(f"Repair all : {geopycat.utils.okgreen('Done')}")
+
+        return results
@@ -0,0 +1,160 @@
+"""
+Loader of the layers of the swisstopo GetCapabilities (WMS, WMTS) in several languages.
+
+The languages are fetched concurrently and the documents are parsed while they are downloaded
+(lxml iterparse), the layers being cleared once read, so the whole document is never held in memory.
+
+The layer titles are cached on disk, one json file per service and language. The cache is used when
+the service answers 304 Not Modified to the ETag of the cached document, or when the UpdateSequence of
+the document is the cached one (the download then stops after the root element).
+"""
+
+import os
+import json
+from concurrent.futures import ThreadPoolExecutor
+from lxml import etree as ET
+import settings
+
+# Layer element, and its name and title children, by service
+TAGS = {
+    "wms": {
+        "layer": f"{{{settings.NS['wms']}}}Layer",
+        "name": f"{{{settings.NS['wms']}}}Name",
+        "title": f"{{{settings.NS['wms']}}}Title",
+    },
+    "wmts": {
+        "layer": f"{{{settings.NS['wmts']}}}Layer",
+        "name": f"{{{settings.NS['ows']}}}Identifier",
+        "title": f"{{{settings.NS['ows']}}}Title",
+    },
+}
+
+
+def read_cache(path: str) -> dict:
+    """Returns the cached capabilities, None if there is no cache or if it can't be read (e.g. truncated file)"""
+
+    if not os.path.isfile(path):
+        return None
+
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            cache = json.load(file)
+    except (OSError, json.JSONDecodeError):
+        return None
+
+    if not isinstance(cache, dict) or "layers" not in cache:
+        return None
+
+    return cache
+
+
+def write_cache(path: str, cache: dict):
+    """Save the capabilities in the cache, in a temporary file renamed once complete"""
+
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+
+    with open(path + ".part", "w", encoding="utf-8") as file:
+        json.dump(cache, file, ensure_ascii=False)
+
+    os.replace(path + ".part", path)
+
+
+def parse_layers(stream, service: str, update_sequence: str = None) -> dict:
+    """
+    Parse the layers of a GetCapabilities stream into {"updateSequence": , "layers": {name: title}}.
+
+    The WMS root layer (the one grouping all the others) is skipped. If the updateSequence of the
+    document is the given one, the parsing stops after the root element and returns None.
+    """
+
+    tags = TAGS[service]
+    result = {"updateSequence": None, "layers": dict()}
+    depth = 0
+
+    for event, element in ET.iterparse(stream, events=("start", "end")):
+
+        if event == "start":
+            if result["updateSequence"] is None:
+                result["updateSequence"] = element.get("updateSequence", "")
+
+                if update_sequence and result["updateSequence"] == update_sequence:
+                    return None
+
+            if element.tag == tags["layer"]:
+                depth += 1
+
+            continue
+
+        if element.tag != tags["layer"]:
+            # Outside of the layers (e.g. the WMTS tile matrix sets), nothing is kept
+            if depth == 0:
+                element.clear()
+            continue
+
+        depth -= 1
+
+        if service == "wmts" or depth > 0:
+            name = element.find(tags["name"])
+            title = element.find(tags["title"])
+
+            if name is not None:
+                result["layers"][name.text] = title.text if title is not None else None
+
+        # Nested layers are read before their parent, the parent only needs its name and title
+        element.clear()
+
+    return result
+
+
+def load_layers(session, url: str, service: str, cache_path: str) -> dict:
+    """
+    Returns the layers {name: title} of a GetCapabilities document, from the cache if the document didn't change.
+    """
+
+    cache = read_cache(cache_path)
+    headers = dict()
+
+    if cache is not None and cache.get("etag"):
+        headers["If-None-Match"] = cache["etag"]
+
+    with session.get(url, headers=headers, stream=True) as response:
+
+        if response.status_code == 304:
+            return cache["layers"]
+
+        response.raise_for_status()
+        response.raw.decode_content = True
+
+        update_sequence = cache.get("updateSequence") if cache is not None else None
+        result = parse_layers(response.raw, service, update_sequence)
+
+        if result is None:
+            return cache["layers"]
+
+        result["etag"] = response.headers.get("ETag")
+
+    write_cache(cache_path, result)
+
+    return result["layers"]
+
+
+def load_capabilities(session, urls: dict, service: str, cache_dir: str = settings.CAPABILITIES_CACHE) -> dict:
+    """
+    Load the layers of a service in several languages concurrently.
+
+    Args:
+        session: requests session
+        urls: dict {language: GetCapabilities url}
+        service: 'wms' or 'wmts'
+        cache_dir: directory of the cache
+
+    Returns a dictionnary {language: {layer name: layer title}}
+    """
+
+    with ThreadPoolExecutor(max_workers=len(urls)) as executor:
+        futures = {
+            lang: executor.submit(load_layers, session, url, service, os.path.join(cache_dir, f"{service}_{lang}.json"))
+            for lang, url in urls.items()
+        }
+
+        return {lang: future.result() for lang, future in futures.items()}
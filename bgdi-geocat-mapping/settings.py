@@ -14,6 +14,11 @@ WMTS_URL = "https://wmts.geo.admin.ch/EPSG/3857/1.0.0/WMTSCapabilities.xml"
 
 API3_URL = "https://api3.geo.admin.ch/rest/services/api/MapServer"
 
+ES_SEARCH_PATH = "/geonetwork/srv/api/search/records/_search"
+
+# Directory of the cache of the WMS and WMTS layers
+CAPABILITIES_CACHE = ".capabilities_cache"
+
 NS = {
     "wms": "http://www.opengis.net/wms",
     "wmts": "http://www.opengis.net/wmts/1.0",
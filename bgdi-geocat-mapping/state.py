@@ -0,0 +1,66 @@
+import json
+import sqlite3
+
+
+class MappingState():
+    """
+    Persisted state (SQLite) of the BGDI mapping, to only re-check the records changed since the last run.
+
+    Each record of the mapping is stored with the fingerprint of the inputs of its checks
+    (geocat links and identifiers, capabilities layer, ODS relation, ...) and the results of these checks.
+    On the next run, the results of a record whose fingerprint didn't change are reused.
+
+    Parameters :
+        path -> str, path of the state file. Created if it doesn't exist.
+
+    Usage :
+        with MappingState("mapping_state.sqlite") as state:
+            previous = state.load()
+            ...
+            state.save({uuid: (fingerprint, results)})
+    """
+
+    def __init__(self, path: str):
+        self.path = path
+
+        self.__connection = sqlite3.connect(path)
+        self.__connection.execute(
+            "CREATE TABLE IF NOT EXISTS records ("
+            "uuid TEXT PRIMARY KEY, fingerprint TEXT NOT NULL, results TEXT NOT NULL)"
+        )
+        self.__connection.commit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __len__(self):
+        return self.__connection.execute("SELECT count(*) FROM records").fetchone()[0]
+
+    def load(self) -> dict:
+        """Returns the stored records {uuid: (fingerprint, results)}"""
+
+        return {
+            uuid: (fingerprint, json.loads(results))
+            for uuid, fingerprint, results in self.__connection.execute("SELECT uuid, fingerprint, results FROM records")
+        }
+
+    def save(self, records: dict):
+        """
+        Replace the stored records with the given ones {uuid: (fingerprint, results)}.
+        The records not given anymore (e.g. removed from the BGDI) are deleted.
+        """
+
+        with self.__connection:
+            self.__connection.execute("DELETE FROM records")
+            self.__connection.executemany(
+                "INSERT INTO records (uuid, fingerprint, results) VALUES (?, ?, ?)",
+                [(uuid, fingerprint, json.dumps(results, ensure_ascii=False))
+                 for uuid, (fingerprint, results) in records.items()]
+            )
+
+    def close(self):
+        """Close the state file"""
+        self.__connection.close()
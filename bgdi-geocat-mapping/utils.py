@@ -1,19 +1,86 @@
+import copy
+from typing import Union
 from lxml import etree as ET
 import geopycat
 import settings
 from urllib.parse import unquote
 
 
-def add_status_obsolete(metadata: bytes) -> list:
+class MetadataDocument():
+    """
+    Metadata parsed once, to compute several sets of edits on the same document.
+    The results of the XPath are cached (e.g. the transferOptions and onLine nodes, looked up by
+    most of the edit builders) until the document is modified with apply_edits.
+
+    Parameters :
+        metadata -> bytes, the XML of the metadata (e.g. from get_metadata_from_mef)
+    """
+
+    def __init__(self, metadata: bytes):
+        self.root = ET.fromstring(metadata)
+        self.tree = ET.ElementTree(self.root)
+        self.__xpath = dict()
+
+    def xpath(self, xpath: str) -> list:
+        """Returns the nodes matching the xpath (the list must not be modified)"""
+
+        if xpath not in self.__xpath:
+            self.__xpath[xpath] = self.root.xpath(xpath, namespaces=geopycat.settings.NS)
+
+        return self.__xpath[xpath]
+
+    def getpath(self, element: object) -> str:
+        """Returns the absolute xpath of an element of the document"""
+
+        return self.tree.getpath(element)
+
+    def tostring(self) -> bytes:
+        """Returns the XML of the document"""
+
+        return ET.tostring(self.root)
+
+    def apply_edits(self, body: list):
+        """
+        Apply batch editing edits (gn_delete, gn_add) on the document, in place and in order, as geocat does.
+        Used to compute the next edits on the metadata as it will be once the previous ones are applied.
+        The added elements are appended to their parent, which keeps the position of the elements used by the edits
+        (e.g. gmd:transferOptions[1]) but not necessarily the order of the schema.
+        """
+
+        for edit in body:
+            nodes = self.root.xpath(edit["xpath"], namespaces=geopycat.settings.NS)
+
+            if edit["value"] == "<gn_delete></gn_delete>":
+                for node in nodes:
+                    node.getparent().remove(node)
+
+            elif edit["value"].startswith("<gn_add>"):
+                fragment = ET.fromstring(edit["value"][len("<gn_add>"):-len("</gn_add>")])
+
+                for node in nodes:
+                    node.append(copy.deepcopy(fragment))
+
+        self.__xpath.clear()
+
+
+def as_document(metadata: Union[bytes, MetadataDocument]) -> MetadataDocument:
+    """Returns the given metadata as MetadataDocument, parsing it if given as bytes"""
+
+    if isinstance(metadata, MetadataDocument):
+        return metadata
+
+    return MetadataDocument(metadata)
+
+
+def add_status_obsolete(metadata: Union[bytes, MetadataDocument]) -> list:
     """
     Returns list of edits for the batch editing API request to add the status oboslete
     """
 
     body = []
-    root = ET.fromstring(metadata)
+    doc = as_document(metadata)
 
-    if len(root.xpath(".//gmd:identificationInfo//gmd:status/gmd:MD_ProgressCode",
-            namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(".//gmd:identificationInfo//gmd:status/gmd:MD_ProgressCode")) > 0:
 
         body.append(
             {
@@ -31,49 +98,44 @@ def add_status_obsolete(metadata: bytes) -> list:
 
     return body
 
-def remove_status_obsolete(metadata: bytes) -> list:
+def remove_status_obsolete(metadata: Union[bytes, MetadataDocument]) -> list:
     """
     Returns list of edits for the batch editing API request to remove the status oboslete
     """
 
     body = []
-    root = ET.fromstring(metadata)
-    tree = ET.ElementTree(root)
+    doc = as_document(metadata)
 
-    for i in root.xpath(".//gmd:identificationInfo//gmd:status/gmd:MD_ProgressCode[@codeListValue='obsolete']",
-                        namespaces=geopycat.settings.NS):
+    for i in doc.xpath(".//gmd:identificationInfo//gmd:status/gmd:MD_ProgressCode[@codeListValue='obsolete']"):
 
         body.append(
             {
-                "xpath": tree.getpath(i.getparent()),
+                "xpath": doc.getpath(i.getparent()),
                 "value": "<gn_delete></gn_delete>"
             }
         )
 
     return body
 
-def add_bgdi_keyword(metadata: bytes) -> list:
+def add_bgdi_keyword(metadata: Union[bytes, MetadataDocument]) -> list:
     """
     Returns list of edits for the batch editing API request to add the BGDI Keyword.
     """
 
     body = []
-    root = ET.fromstring(metadata)
-    tree = ET.ElementTree(root)
+    doc = as_document(metadata)
 
     # If a descriptiveKeywords section with geocat thesaurus exists, replace it with additional keyword
-    if len(root.xpath("./gmd:identificationInfo//gmd:descriptiveKeywords[contains(@xlink:href, 'thesaurus=local.theme.geocat.ch')]",
-            namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath("./gmd:identificationInfo//gmd:descriptiveKeywords[contains(@xlink:href, 'thesaurus=local.theme.geocat.ch')]")) > 0:
 
-        tag = root.xpath("./gmd:identificationInfo//gmd:descriptiveKeywords[contains(@xlink:href, 'thesaurus=local.theme.geocat.ch')]",
-                    namespaces=geopycat.settings.NS)[0]
+        tag = doc.xpath("./gmd:identificationInfo//gmd:descriptiveKeywords[contains(@xlink:href, 'thesaurus=local.theme.geocat.ch')]")[0]
 
         xlink = unquote(tag.attrib["{http://www.w3.org/1999/xlink}href"])
         ids = xlink.split("?")[-1].split("id=")[-1].split("&")[0] + "," + settings.BGDI_KW_ID[0]
 
         body.append(
             {
-                "xpath": tree.getpath(tag),
+                "xpath": doc.getpath(tag),
                 "value": "<gn_delete></gn_delete>"
             }
         )
@@ -97,17 +159,17 @@ def add_bgdi_keyword(metadata: bytes) -> list:
 
     return body
 
-def remove_bgdi_keyword(metadata: bytes) -> list:
+def remove_bgdi_keyword(metadata: Union[bytes, MetadataDocument]) -> list:
     """
     Returns list of edits for the batch editing API request to remove the BGDI Keyword.
     """
 
     body = []
-    root = ET.fromstring(metadata)
+    doc = as_document(metadata)
 
     # Delete all descriptiveKeywords that have only one keyword = BGDI
     xpath = f"./gmd:identificationInfo//gmd:descriptiveKeywords[((.//gmd:keyword/gco:CharacterString = 'BGDI Bundesgeodaten-Infrastruktur' or .//gmd:keyword/gmd:PT_FreeText//gmd:LocalisedCharacterString = 'BGDI Bundesgeodaten-Infrastruktur') and count(.//gmd:keyword)=1) or contains(@xlink:href, 'id={settings.BGDI_KW_ID[0]}&') or contains(@xlink:href, 'id={settings.BGDI_KW_ID[1]}&')]"
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
         body.append({
             "xpath": xpath,
             "value": "<gn_delete></gn_delete>"
@@ -115,7 +177,7 @@ def remove_bgdi_keyword(metadata: bytes) -> list:
 
     # Delete all gmd:keyword = BGDI in descriptiveKeywords that have more than one keyword
     xpath = "./gmd:identificationInfo//gmd:descriptiveKeywords[count(.//gmd:keyword)>1]//gmd:keyword[./gco:CharacterString = 'BGDI Bundesgeodaten-Infrastruktur' or ./gmd:PT_FreeText//gmd:LocalisedCharacterString = 'BGDI Bundesgeodaten-Infrastruktur']"
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
         body.append({
             "xpath": xpath,
             "value": "<gn_delete></gn_delete>"
@@ -126,7 +188,7 @@ def remove_bgdi_keyword(metadata: bytes) -> list:
     # Add one descriptiveKeywords with all ids
     xpath = f"./gmd:identificationInfo//gmd:descriptiveKeywords[contains(@xlink:href, '{settings.BGDI_KW_ID[0]}') or contains(@xlink:href, '{settings.BGDI_KW_ID[1]}')]"
     all_ids = list()
-    for i in root.xpath(xpath, namespaces=geopycat.settings.NS):
+    for i in doc.xpath(xpath):
 
         xlink = unquote(i.attrib["{http://www.w3.org/1999/xlink}href"])
         ids = xlink.split("?")[-1].split("id=")[-1].split("&")[0].split(",")
@@ -147,17 +209,17 @@ def remove_bgdi_keyword(metadata: bytes) -> list:
 
     return body
 
-def add_identifier(metadata: bytes, identifier: str) -> list:
+def add_identifier(metadata: Union[bytes, MetadataDocument], identifier: str) -> list:
     """
     Returns list of edits for the batch editing API request to add an identifier.
     """
 
     body = []
-    root = ET.fromstring(metadata)
+    doc = as_document(metadata)
 
     # If an identifier exists, erase it before adding a new one
     xpath = "./gmd:identificationInfo//gmd:citation//gmd:identifier"
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
@@ -171,13 +233,13 @@ def add_identifier(metadata: bytes, identifier: str) -> list:
 
     return body
 
-def add_wms(metadata: bytes, layer_id: str, layer_title: dict) -> list:
+def add_wms(metadata: Union[bytes, MetadataDocument], layer_id: str, layer_title: dict) -> list:
     """
     Returns list of edits for the batch editing API request to add WMS resource.
     """
 
     body = []
-    root = ET.fromstring(metadata)
+    doc = as_document(metadata)
     url = geopycat.utils.xmlify(settings.WMS_URL + "&lang=")
 
     value = settings.XML["resource"]
@@ -195,12 +257,11 @@ def add_wms(metadata: bytes, layer_id: str, layer_title: dict) -> list:
     value = value.replace("resource-desc-rm", geopycat.utils.xmlify(layer_title["de"]))
 
     # If no distribution section, we don't add WMS
-    if len(root.xpath("./gmd:distributionInfo", namespaces=geopycat.settings.NS)) == 0:
+    if len(doc.xpath("./gmd:distributionInfo")) == 0:
         return body
 
     # No transferOption
-    if len(root.xpath("./gmd:distributionInfo//gmd:transferOptions", 
-                        namespaces=geopycat.settings.NS)) == 0:
+    if len(doc.xpath("./gmd:distributionInfo//gmd:transferOptions")) == 0:
 
         body.append({
             "xpath": "./gmd:distributionInfo[1]/gmd:MD_Distribution",
@@ -220,17 +281,16 @@ def add_wms(metadata: bytes, layer_id: str, layer_title: dict) -> list:
             " and (.//gmd:URL[contains(text(), 'wms.geo.admin.ch')]"\
             " or .//che:LocalisedURL[contains(text(), 'wms.geo.admin.ch')])]"
 
-    number_tags = len(root.xpath("./gmd:distributionInfo//gmd:transferOptions",
-                    namespaces=geopycat.settings.NS))
+    number_tags = len(doc.xpath("./gmd:distributionInfo//gmd:transferOptions"))
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
             "value": "<gn_delete></gn_delete>"
         })
 
-        if number_tags == len(root.xpath(xpath, namespaces=geopycat.settings.NS)):
+        if number_tags == len(doc.xpath(xpath)):
 
             body.append({
                 "xpath": "./gmd:distributionInfo[1]/gmd:MD_Distribution",
@@ -250,7 +310,7 @@ def add_wms(metadata: bytes, layer_id: str, layer_title: dict) -> list:
             " and (.//gmd:URL[contains(text(), 'wms.geo.admin.ch')]"\
             " or .//che:LocalisedURL[contains(text(), 'wms.geo.admin.ch')])]"
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
@@ -264,13 +324,13 @@ def add_wms(metadata: bytes, layer_id: str, layer_title: dict) -> list:
 
     return body
 
-def remove_wms(metadata: bytes) -> list:
+def remove_wms(metadata: Union[bytes, MetadataDocument]) -> list:
     """
     Returns list of edits for the batch editing API request to remove WMS resource.
     """
 
     body = []
-    root = ET.fromstring(metadata)
+    doc = as_document(metadata)
 
     # transferOption with only one child and WMS
     xpath = "./gmd:distributionInfo//gmd:transferOptions[count(./*/*)=1"\
@@ -278,7 +338,7 @@ def remove_wms(metadata: bytes) -> list:
             " and (.//gmd:URL[contains(text(), 'wms.geo.admin.ch')]"\
             " or .//che:LocalisedURL[contains(text(), 'wms.geo.admin.ch')])]"
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
@@ -291,7 +351,7 @@ def remove_wms(metadata: bytes) -> list:
             " and (.//gmd:URL[contains(text(), 'wms.geo.admin.ch')]"\
             " or .//che:LocalisedURL[contains(text(), 'wms.geo.admin.ch')])]"
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
@@ -300,13 +360,13 @@ def remove_wms(metadata: bytes) -> list:
 
     return body
 
-def add_wmts(metadata: bytes, layer_id: str, layer_title: dict) -> list:
+def add_wmts(metadata: Union[bytes, MetadataDocument], layer_id: str, layer_title: dict) -> list:
     """
     Returns list of edits for the batch editing API request to add WMTS resource.
     """
 
     body = []
-    root = ET.fromstring(metadata)
+    doc = as_document(metadata)
     url = geopycat.utils.xmlify(settings.WMTS_URL + "?lang=")
 
     value = settings.XML["resource"]
@@ -324,12 +384,11 @@ def add_wmts(metadata: bytes, layer_id: str, layer_title: dict) -> list:
     value = value.replace("resource-desc-rm", geopycat.utils.xmlify(layer_title["de"]))
 
     # If no distribution section, we don't add WMTS
-    if len(root.xpath("./gmd:distributionInfo", namespaces=geopycat.settings.NS)) == 0:
+    if len(doc.xpath("./gmd:distributionInfo")) == 0:
         return body
 
     # No transferOption
-    if len(root.xpath("./gmd:distributionInfo//gmd:transferOptions", 
-                        namespaces=geopycat.settings.NS)) == 0:
+    if len(doc.xpath("./gmd:distributionInfo//gmd:transferOptions")) == 0:
 
         body.append({
             "xpath": "./gmd:distributionInfo[1]/gmd:MD_Distribution",
@@ -349,17 +408,16 @@ def add_wmts(metadata: bytes, layer_id: str, layer_title: dict) -> list:
             " and (.//gmd:URL[contains(text(), 'wmts.geo.admin.ch')]"\
             " or .//che:LocalisedURL[contains(text(), 'wmts.geo.admin.ch')])]"
 
-    number_tags = len(root.xpath("./gmd:distributionInfo//gmd:transferOptions",
-                    namespaces=geopycat.settings.NS))
+    number_tags = len(doc.xpath("./gmd:distributionInfo//gmd:transferOptions"))
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
             "value": "<gn_delete></gn_delete>"
         })
 
-        if number_tags == len(root.xpath(xpath, namespaces=geopycat.settings.NS)):
+        if number_tags == len(doc.xpath(xpath)):
 
             body.append({
                 "xpath": "./gmd:distributionInfo[1]/gmd:MD_Distribution",
@@ -379,7 +437,7 @@ def add_wmts(metadata: bytes, layer_id: str, layer_title: dict) -> list:
             " and (.//gmd:URL[contains(text(), 'wmts.geo.admin.ch')]"\
             " or .//che:LocalisedURL[contains(text(), 'wmts.geo.admin.ch')])]"
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
@@ -393,13 +451,13 @@ def add_wmts(metadata: bytes, layer_id: str, layer_title: dict) -> list:
 
     return body
 
-def remove_wmts(metadata: bytes) -> list:
+def remove_wmts(metadata: Union[bytes, MetadataDocument]) -> list:
     """
     Returns list of edits for the batch editing API request to remove WMTS resource.
     """
 
     body = []
-    root = ET.fromstring(metadata)
+    doc = as_document(metadata)
 
     # transferOption with only one child and WMTS
     xpath = "./gmd:distributionInfo//gmd:transferOptions[count(./*/*)=1"\
@@ -407,7 +465,7 @@ def remove_wmts(metadata: bytes) -> list:
             " and (.//gmd:URL[contains(text(), 'wmts.geo.admin.ch')]"\
             " or .//che:LocalisedURL[contains(text(), 'wmts.geo.admin.ch')])]"
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
@@ -420,7 +478,7 @@ def remove_wmts(metadata: bytes) -> list:
             " and (.//gmd:URL[contains(text(), 'wmts.geo.admin.ch')]"\
             " or .//che:LocalisedURL[contains(text(), 'wmts.geo.admin.ch')])]"
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
@@ -429,13 +487,13 @@ def remove_wmts(metadata: bytes) -> list:
 
     return body
 
-def add_api3(metadata: bytes, layer_id: str) -> list:
+def add_api3(metadata: Union[bytes, MetadataDocument], layer_id: str) -> list:
     """
     Returns list of edits for the batch editing API request to add API3 resource.
     """
 
     body = []
-    root = ET.fromstring(metadata)
+    doc = as_document(metadata)
 
     url =  f"{settings.API3_URL}/{layer_id}"
 
@@ -452,12 +510,11 @@ def add_api3(metadata: bytes, layer_id: str) -> list:
 
 
     # If no distribution section, we don't add API3
-    if len(root.xpath("./gmd:distributionInfo", namespaces=geopycat.settings.NS)) == 0:
+    if len(doc.xpath("./gmd:distributionInfo")) == 0:
         return body
 
     # No transferOption
-    if len(root.xpath("./gmd:distributionInfo//gmd:transferOptions", 
-                        namespaces=geopycat.settings.NS)) == 0:
+    if len(doc.xpath("./gmd:distributionInfo//gmd:transferOptions")) == 0:
 
         body.append({
             "xpath": "./gmd:distributionInfo[1]/gmd:MD_Distribution",
@@ -477,17 +534,16 @@ def add_api3(metadata: bytes, layer_id: str) -> list:
             " and (.//gmd:URL[contains(text(), 'api3.geo.admin.ch')]"\
             " or .//che:LocalisedURL[contains(text(), 'api3.geo.admin.ch')])]"
 
-    number_tags = len(root.xpath("./gmd:distributionInfo//gmd:transferOptions",
-                    namespaces=geopycat.settings.NS))
+    number_tags = len(doc.xpath("./gmd:distributionInfo//gmd:transferOptions"))
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
             "value": "<gn_delete></gn_delete>"
         })
 
-        if number_tags == len(root.xpath(xpath, namespaces=geopycat.settings.NS)):
+        if number_tags == len(doc.xpath(xpath)):
 
             body.append({
                 "xpath": "./gmd:distributionInfo[1]/gmd:MD_Distribution",
@@ -507,7 +563,7 @@ def add_api3(metadata: bytes, layer_id: str) -> list:
             " and (.//gmd:URL[contains(text(), 'api3.geo.admin.ch')]"\
             " or .//che:LocalisedURL[contains(text(), 'api3.geo.admin.ch')])]"
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
@@ -521,13 +577,13 @@ def add_api3(metadata: bytes, layer_id: str) -> list:
 
     return body
 
-def remove_api3(metadata: bytes) -> list:
+def remove_api3(metadata: Union[bytes, MetadataDocument]) -> list:
     """
     Returns list of edits for the batch editing API request to remove API3 resource.
     """
 
     body = []
-    root = ET.fromstring(metadata)
+    doc = as_document(metadata)
 
     # transferOption with only one child and API3
     xpath = "./gmd:distributionInfo//gmd:transferOptions[count(./*/*)=1"\
@@ -535,7 +591,7 @@ def remove_api3(metadata: bytes) -> list:
             " and (.//gmd:URL[contains(text(), 'api3.geo.admin.ch')]"\
             " or .//che:LocalisedURL[contains(text(), 'api3.geo.admin.ch')])]"
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
@@ -548,7 +604,7 @@ def remove_api3(metadata: bytes) -> list:
             " and (.//gmd:URL[contains(text(), 'api3.geo.admin.ch')]"\
             " or .//che:LocalisedURL[contains(text(), 'api3.geo.admin.ch')])]"
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
@@ -557,13 +613,13 @@ def remove_api3(metadata: bytes) -> list:
 
     return body
 
-def add_mappreview(metadata: bytes, layer_id: str) -> list:
+def add_mappreview(metadata: Union[bytes, MetadataDocument], layer_id: str) -> list:
     """
     Returns list of edits for the batch editing API request to add map preview resource.
     """
 
     body = []
-    root = ET.fromstring(metadata)
+    doc = as_document(metadata)
 
     url = f"https://map.geo.admin.ch/?layers={layer_id}"
 
@@ -578,12 +634,11 @@ def add_mappreview(metadata: bytes, layer_id: str) -> list:
 
 
     # If no distribution section, we don't add map preview
-    if len(root.xpath("./gmd:distributionInfo", namespaces=geopycat.settings.NS)) == 0:
+    if len(doc.xpath("./gmd:distributionInfo")) == 0:
         return body
 
     # No transferOption
-    if len(root.xpath("./gmd:distributionInfo//gmd:transferOptions", 
-                        namespaces=geopycat.settings.NS)) == 0:
+    if len(doc.xpath("./gmd:distributionInfo//gmd:transferOptions")) == 0:
 
         body.append({
             "xpath": "./gmd:distributionInfo[1]/gmd:MD_Distribution",
@@ -603,17 +658,16 @@ def add_mappreview(metadata: bytes, layer_id: str) -> list:
             " and (.//gmd:URL[contains(text(), 'admin.ch')]"\
             " or .//che:LocalisedURL[contains(text(), 'admin.ch')])]"
 
-    number_tags = len(root.xpath("./gmd:distributionInfo//gmd:transferOptions",
-                    namespaces=geopycat.settings.NS))
+    number_tags = len(doc.xpath("./gmd:distributionInfo//gmd:transferOptions"))
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
             "value": "<gn_delete></gn_delete>"
         })
 
-        if number_tags == len(root.xpath(xpath, namespaces=geopycat.settings.NS)):
+        if number_tags == len(doc.xpath(xpath)):
 
             body.append({
                 "xpath": "./gmd:distributionInfo[1]/gmd:MD_Distribution",
@@ -633,7 +687,7 @@ def add_mappreview(metadata: bytes, layer_id: str) -> list:
             " and (.//gmd:URL[contains(text(), 'admin.ch')]"\
             " or .//che:LocalisedURL[contains(text(), 'admin.ch')])]"
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
@@ -647,19 +701,19 @@ def add_mappreview(metadata: bytes, layer_id: str) -> list:
 
     return body
 
-def remove_ods_permalink(metadata: bytes) -> list:
+def remove_ods_permalink(metadata: Union[bytes, MetadataDocument]) -> list:
     """
     Returns list of edits for the batch editing API request to remove ODS permalink.
     """
 
     body = []
-    root = ET.fromstring(metadata)
+    doc = as_document(metadata)
 
     # transferOption with only one child and ODS permalink
     xpath = "./gmd:distributionInfo//gmd:transferOptions[count(./*/*)=1"\
             " and .//gmd:protocol/gco:CharacterString[text()='OPENDATA:SWISS']]"
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
@@ -670,7 +724,7 @@ def remove_ods_permalink(metadata: bytes) -> list:
     xpath = "./gmd:distributionInfo//gmd:transferOptions[count(./*/*)>1]//gmd:onLine["\
             " .//gmd:protocol/gco:CharacterString[text()='OPENDATA:SWISS']]"
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
@@ -679,14 +733,14 @@ def remove_ods_permalink(metadata: bytes) -> list:
 
     return body
 
-def add_ods_permalink(metadata: bytes, ods_uuid: str) -> list:
+def add_ods_permalink(metadata: Union[bytes, MetadataDocument], ods_uuid: str) -> list:
     """
     Returns list of edits for the batch editing API request to add ODS permalink.
     It first delete all existing ODS permalink. Hence used to add or fix ODS permalink
     """
 
     body = []
-    root = ET.fromstring(metadata)
+    doc = as_document(metadata)
 
     value = settings.XML["resource"]
     value = value.replace("resource-url-de", f"https://opendata.swiss/de/perma/{ods_uuid}")
@@ -708,12 +762,11 @@ def add_ods_permalink(metadata: bytes, ods_uuid: str) -> list:
 
 
     # If no distribution section, we don't add map preview
-    if len(root.xpath("./gmd:distributionInfo", namespaces=geopycat.settings.NS)) == 0:
+    if len(doc.xpath("./gmd:distributionInfo")) == 0:
         return body
 
     # No transferOption
-    if len(root.xpath("./gmd:distributionInfo//gmd:transferOptions", 
-                        namespaces=geopycat.settings.NS)) == 0:
+    if len(doc.xpath("./gmd:distributionInfo//gmd:transferOptions")) == 0:
 
         body.append({
             "xpath": "./gmd:distributionInfo[1]/gmd:MD_Distribution",
@@ -731,17 +784,16 @@ def add_ods_permalink(metadata: bytes, ods_uuid: str) -> list:
     xpath = "./gmd:distributionInfo//gmd:transferOptions[count(./*/*)=1" \
             " and .//gmd:protocol/gco:CharacterString[text()='OPENDATA:SWISS']]"
 
-    number_tags = len(root.xpath("./gmd:distributionInfo//gmd:transferOptions",
-                    namespaces=geopycat.settings.NS))
+    number_tags = len(doc.xpath("./gmd:distributionInfo//gmd:transferOptions"))
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
             "value": "<gn_delete></gn_delete>"
         })
 
-        if number_tags == len(root.xpath(xpath, namespaces=geopycat.settings.NS)):
+        if number_tags == len(doc.xpath(xpath)):
 
             body.append({
                 "xpath": "./gmd:distributionInfo[1]/gmd:MD_Distribution",
@@ -759,7 +811,7 @@ def add_ods_permalink(metadata: bytes, ods_uuid: str) -> list:
     xpath = "./gmd:distributionInfo//gmd:transferOptions[count(./*/*)>1]//gmd:onLine["\
             " .//gmd:protocol/gco:CharacterString[text()='OPENDATA:SWISS']]"
 
-    if len(root.xpath(xpath, namespaces=geopycat.settings.NS)) > 0:
+    if len(doc.xpath(xpath)) > 0:
 
         body.append({
             "xpath": xpath,
@@ -47,6 +47,9 @@ SEARCH_API_BODY = {
     "size": 3000
 }
 
+# Number of records per page when scanning the search API (search_after pagination)
+SEARCH_PAGE_SIZE = 3000
+
 MAIL_SENDER = "olivier.curdy@swisstopo.ch"
 
 MAIL_SUBJECT = "geocat.ch - Invalid URL in your metadata"
@@ -1,4 +1,5 @@
 import os
+import sys
 import logging
 from dotenv import load_dotenv
 import geopycat
@@ -8,6 +9,10 @@ import check_services_url
 from datetime import datetime
 import csv
 
+# Search scan shared with the other tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ClassLibrary"))
+from geocatSearch import scanRecords
+
 # Load environment variables from .env file
 load_dotenv()
 
@@ -53,7 +58,8 @@ def append_to_csv(file_path, data, columns):
 
 def get_metadata():
     try:
-        response = geocat.es_deep_search(body=config.SEARCH_API_BODY)
+        response = list(scanRecords(geocat.session, config.API_SEARCH_URL, body=config.SEARCH_API_BODY,
+                                    pageSize=config.SEARCH_PAGE_SIZE))
         if not response:
             logger.error("No metadata records found")
             return []
@@ -19,6 +19,14 @@ API_URL = API_URLS.get(ENVIRONMENT)
 # Page size for server-side search requests
 SEARCH_PAGE_SIZE = 200
 
+# Number of concurrent validation sessions
+VALIDATION_WORKERS = 4
+# Retries on HTTP 5xx / connection errors, with exponential backoff (seconds)
+VALIDATION_MAX_RETRIES = 3
+VALIDATION_RETRY_BACKOFF = 2
+# Validation results already written to this file are not validated again (resume)
+VALIDATION_CHECKPOINT_FILE = f"validation_checkpoint_{ENVIRONMENT}.jsonl"
+
 # Query used by the server search (GeoNetwork/ElasticSearch query_string).
 # Filter: non-harvested, invalid (0 = invalid, -1 = not yet validated),
 # exclude internal groups (42, 55, 50000150), published records.
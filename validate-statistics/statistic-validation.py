@@ -4,8 +4,18 @@ import json
 import logging
 import sys
 import csv
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from collections import Counter
+from datetime import datetime
+from typing import Any, Dict, List
 import config
 
+# Search scan shared with the other tools
+sys.path.append(os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "ClassLibrary"))
+from geocatSearch import scanRecords
+
 def setup_logging(debug: bool = False):
     """Configure logging"""
     logging_level = logging.DEBUG if debug else logging.INFO
@@ -21,32 +31,48 @@ class GeoNetworkValidationAnalyzer:
         self.base_url = base_url.rstrip('/')
         self.username = username
         self.password = password
-        self.session = requests.Session()
-        self.session.auth = (username, password)
-        
+        self.session = self._create_session()
+
+        # One authenticated session per validation worker (editor sessions are server-side state)
+        self._worker_sessions = threading.local()
+        self._checkpoint_lock = threading.Lock()
+
+    def _create_session(self) -> requests.Session:
+        """Create a new HTTP session with credentials and proxy"""
+        session = requests.Session()
+        session.auth = (self.username, self.password)
+
         # Configure proxy if defined
         if config.PROXY_HTTP or config.PROXY_HTTPS:
-            self.session.proxies = {
+            session.proxies = {
                 'http': config.PROXY_HTTP,
                 'https': config.PROXY_HTTPS
             }
-        
-        
+
+        return session
+
+    def _authenticate_session(self, session: requests.Session) -> bool:
+        """Retrieve the XSRF token of a session. Raises on HTTP errors."""
+        response = session.get(
+            f"{self.base_url}/me",
+            headers={"accept": "application/json"}
+        )
+        response.raise_for_status()
+
+        xsrf_token = response.cookies.get("XSRF-TOKEN")
+        if not xsrf_token:
+            return False
+
+        session.headers.update({
+            "X-XSRF-TOKEN": xsrf_token,
+            "accept": "application/json"
+        })
+        return True
+
     def authenticate(self) -> bool:
         """Authenticate and retrieve the XSRF token"""
         try:
-            response = self.session.get(
-                f"{self.base_url}/me",
-                headers={"accept": "application/json"}
-            )
-            response.raise_for_status()
-            
-            xsrf_token = response.cookies.get("XSRF-TOKEN")
-            if xsrf_token:
-                self.session.headers.update({
-                    "X-XSRF-TOKEN": xsrf_token,
-                    "accept": "application/json"
-                })
+            if self._authenticate_session(self.session):
                 logging.info("✅ Successfully authenticated")
                 return True
             else:
@@ -522,7 +548,39 @@ class GeoNetworkValidationAnalyzer:
         # ── Fallback: extract_detailed_errors() for legacy structures ──
         return self.extract_detailed_errors(report) if isinstance(report, dict) else errors
 
-    def validate_single_record(self, uuid: str) -> Dict[str, Any]:
+    def _request_with_retry(self, session: requests.Session, method: str, url: str,
+                            **kwargs) -> requests.Response:
+        """
+        Send a request, retrying with exponential backoff on 5xx responses
+        and connection errors (VALIDATION_MAX_RETRIES, VALIDATION_RETRY_BACKOFF).
+        """
+        for attempt in range(config.VALIDATION_MAX_RETRIES + 1):
+            try:
+                response = session.request(method, url, **kwargs)
+            except requests.exceptions.ConnectionError:
+                if attempt == config.VALIDATION_MAX_RETRIES:
+                    raise
+            else:
+                if response.status_code < 500 or attempt == config.VALIDATION_MAX_RETRIES:
+                    return response
+
+            delay = config.VALIDATION_RETRY_BACKOFF * (2 ** attempt)
+            logging.debug(f"🔁 {method} {url} failed, retry in {delay}s")
+            time.sleep(delay)
+
+    def _get_worker_session(self) -> requests.Session:
+        """Return the session of the current worker thread, created and authenticated on first use"""
+        session = getattr(self._worker_sessions, 'session', None)
+
+        if session is None:
+            session = self._create_session()
+            if not self._authenticate_session(session):
+                raise RuntimeError("XSRF token not found for worker session")
+            self._worker_sessions.session = session
+
+        return session
+
+    def validate_single_record(self, uuid: str, session: requests.Session = None) -> Dict[str, Any]:
         """
         Validate a single record with full XSD and Schematron errors.
 
@@ -533,16 +591,19 @@ class GeoNetworkValidationAnalyzer:
 
         Args:
             uuid: Metadata record UUID
+            session: authenticated session to use (default: the analyzer session)
 
         Returns:
             Dictionary {uuid, errors, has_errors, error_count}
         """
+        session = session if session is not None else self.session
         editor_url = f"{self.base_url}/records/{uuid}/editor"
         editor_opened = False
 
         try:
             # ── Step 1: Open editing session ──────────────────────────────
-            r_open = self.session.get(
+            r_open = self._request_with_retry(
+                session, "GET",
                 editor_url,
                 headers={"accept": "text/html,application/xhtml+xml,*/*"}
             )
@@ -557,7 +618,8 @@ class GeoNetworkValidationAnalyzer:
             editor_opened = True
 
             # ── Step 2: Internal validation (XSD + Schematron) ────────────
-            r_val = self.session.put(
+            r_val = self._request_with_retry(
+                session, "PUT",
                 f"{self.base_url}/records/{uuid}/validate/internal",
                 headers={"accept": "application/json"}
             )
@@ -594,7 +656,7 @@ class GeoNetworkValidationAnalyzer:
             # ── Step 3: Close editing session (always) ─────────────────────
             if editor_opened:
                 try:
-                    self.session.delete(
+                    session.delete(
                         editor_url,
                         params={"withChanges": "false"},
                         headers={"accept": "text/html,application/xhtml+xml,*/*"}
@@ -635,6 +697,104 @@ class GeoNetworkValidationAnalyzer:
 
         return results
 
+    def _load_checkpoint(self, checkpoint_file: str) -> Dict[str, Dict[str, Any]]:
+        """Read the results already written to the checkpoint file (JSONL, one result per line)"""
+        done: Dict[str, Dict[str, Any]] = {}
+
+        if not checkpoint_file or not os.path.isfile(checkpoint_file):
+            return done
+
+        with open(checkpoint_file, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    result = json.loads(line)
+                except json.JSONDecodeError:
+                    continue  # Line truncated by an interruption
+                done[result['uuid']] = result
+
+        return done
+
+    def _write_checkpoint(self, checkpoint, result: Dict[str, Any]) -> None:
+        """Append a result to the checkpoint file"""
+        if checkpoint is None:
+            return
+
+        with self._checkpoint_lock:
+            checkpoint.write(json.dumps(result, ensure_ascii=False) + "\n")
+            checkpoint.flush()
+
+    def _validate_in_worker(self, uuid: str) -> Dict[str, Any]:
+        """Validate a record with the session of the current worker"""
+        try:
+            session = self._get_worker_session()
+        except Exception as e:
+            logging.error(f"❌ Worker authentication failed: {e}")
+            return {
+                'uuid': uuid,
+                'errors': [f"Exception: {str(e)}"],
+                'has_errors': True,
+                'error_count': 1
+            }
+
+        return self.validate_single_record(uuid, session=session)
+
+    def validate_all_parallel(self, uuids: List[str], workers: int = 4,
+                              checkpoint_file: str = None) -> List[Dict[str, Any]]:
+        """
+        Validate records concurrently, each worker with its own authenticated session
+        (XSRF token and editor sessions are not shared between workers).
+
+        Every result is appended to checkpoint_file as soon as it is available.
+        Records already present in the checkpoint are not validated again, so an
+        interrupted run resumes where it stopped.
+
+        Args:
+            uuids: List of UUIDs to validate
+            workers: Number of concurrent sessions
+            checkpoint_file: Path of the JSONL checkpoint (None to disable)
+
+        Returns:
+            List of validation results per record, in the order of uuids
+        """
+        done = self._load_checkpoint(checkpoint_file)
+        todo = [uuid for uuid in dict.fromkeys(uuids) if uuid not in done]
+        total = len(uuids)
+
+        if done:
+            logging.info(f"♻️ {len(done)} records already validated in checkpoint, {len(todo)} remaining")
+
+        checkpoint = open(checkpoint_file, 'a', encoding='utf-8') if checkpoint_file else None
+
+        # Terminate a line truncated by an interruption before appending
+        if checkpoint is not None and checkpoint.tell() > 0:
+            with open(checkpoint_file, 'rb') as f:
+                f.seek(-1, os.SEEK_END)
+                if f.read(1) != b"\n":
+                    checkpoint.write("\n")
+
+        try:
+            with ThreadPoolExecutor(max_workers=workers) as executor:
+                futures = [executor.submit(self._validate_in_worker, uuid) for uuid in todo]
+
+                for future in as_completed(futures):
+                    result = future.result()
+                    done[result['uuid']] = result
+                    self._write_checkpoint(checkpoint, result)
+
+                    i = len(done)
+                    if result['has_errors']:
+                        logging.info(
+                            f"⚠️ [{i}/{total}] {result['uuid']}: {result['error_count']} error(s)"
+                        )
+                    elif i % 50 == 0 or i == total:
+                        logging.info(f"✅ [{i}/{total}] {(i / total) * 100:.1f}% processed")
+
+        finally:
+            if checkpoint is not None:
+                checkpoint.close()
+
+        return [done[uuid] for uuid in uuids if uuid in done]
+
     def _build_query_string_from_dict(self, query_dict: Dict[str, Any]) -> str:
         """
         Convert the filter dictionary (from SERVER_SEARCH_QUERY) into a
@@ -697,7 +857,7 @@ class GeoNetworkValidationAnalyzer:
     def search_records(self, query: Dict[str, Any], page_size: int = 100) -> List[str]:
         """
         Search for records via the GeoNetwork ElasticSearch API
-        (POST /search/records/_search) with automatic result pagination.
+        (POST /search/records/_search) with search_after pagination.
 
         Args:
             query: filter dictionary (SERVER_SEARCH_QUERY)
@@ -707,67 +867,35 @@ class GeoNetworkValidationAnalyzer:
             List of UUIDs found
         """
         uuids: List[str] = []
-        from_offset = 0
 
         query_string = self._build_query_string_from_dict(query)
         logging.info(f"🔎 Lucene query: {query_string}")
 
-        while True:
-            payload = {
-                "from": from_offset,
-                "size": page_size,
-                "query": {
-                    "bool": {
-                        "must": [
-                            {
-                                "query_string": {
-                                    "query": query_string,
-                                    "default_operator": "AND"
-                                }
-                            },
-                            {
-                                "terms": {
-                                    "isTemplate": ["n"]
-                                }
-                            }
-                        ]
+        es_query = {
+            "bool": {
+                "must": [
+                    {
+                        "query_string": {
+                            "query": query_string,
+                            "default_operator": "AND"
+                        }
+                    },
+                    {
+                        "terms": {
+                            "isTemplate": ["n"]
+                        }
                     }
-                },
-                "_source": ["uuid"]
+                ]
             }
+        }
 
-            try:
-                resp = self.session.post(
-                    f"{self.base_url}/search/records/_search",
-                    params={"bucket": "s101"},
-                    json=payload
-                )
-                resp.raise_for_status()
-                data = resp.json()
-
-                page_uuids = self._extract_uuids_from_search_result(data)
-                if not page_uuids:
-                    break
-
-                uuids.extend(page_uuids)
-
-                # Check ES total to stop pagination
-                total_info = data.get('hits', {}).get('total', {})
-                if isinstance(total_info, dict):
-                    total = total_info.get('value', 0)
-                elif isinstance(total_info, int):
-                    total = total_info
-                else:
-                    total = len(uuids)
-
-                if len(page_uuids) < page_size or from_offset + page_size >= total:
-                    break
-
-                from_offset += page_size
+        try:
+            for hit in scanRecords(self.session, f"{self.base_url}/search/records/_search", body={"query": es_query},
+                                   includes=["uuid"], pageSize=page_size, params={"bucket": "s101"}):
+                uuids.extend(self._extract_uuids_from_search_result({"hits": {"hits": [hit]}}))
 
-            except Exception as e:
-                logging.error(f"❌ Error searching for records: {e}")
-                break
+        except Exception as e:
+            logging.error(f"❌ Error searching for records: {e}")
 
         logging.info(f"🔎 {len(uuids)} records found for the query")
         return uuids
@@ -813,9 +941,14 @@ def main():
     os.makedirs(output_dir, exist_ok=True)
 
     logging.info(f"🔬 Individual validation (XSD + Schematron) via PUT /records/{{uuid}}/validate/internal")
-    logging.info(f"⏳ {len(uuids)} records to validate – this may take several minutes...")
+    logging.info(f"⏳ {len(uuids)} records to validate with {config.VALIDATION_WORKERS} workers – this may take several minutes...")
 
-    validation_data = analyzer.validate_all_individually(uuids)
+    checkpoint_file = os.path.join(script_dir, config.VALIDATION_CHECKPOINT_FILE)
+    validation_data = analyzer.validate_all_parallel(
+        uuids,
+        workers=config.VALIDATION_WORKERS,
+        checkpoint_file=checkpoint_file
+    )
 
     # === REPORTS ===
     logging.info("📇 Fetching contact information...")
@@ -827,6 +960,10 @@ def main():
     analyzer.generate_summary_report(statistics, os.path.join(output_dir, "validation_summary.txt"))
     analyzer.generate_error_distribution_csv(statistics, os.path.join(output_dir, "error_distribution.csv"))
 
+    # Reports are written, the next run starts from scratch
+    if os.path.isfile(checkpoint_file):
+        os.remove(checkpoint_file)
+
     # === FINAL SUMMARY ===
     logging.info("\n" + "="*50)
     logging.info("FINAL SUMMARY")